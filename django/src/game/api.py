@@ -63,14 +63,14 @@ class GameStateAPI(APIView):
             players = match["players"]
             state_summary = {
                 "match_id": match_id,
-                "status": "in_progress" if game_state.get("score") else "waiting",
+                "status": "in_progress" if game_state.score1 or game_state.score2 else "waiting",
                 "players": [
                     {
                         "username": get_display_name(p.user),
                         "elo": p.user.elo
                     } for p in players
                 ],
-                "score": game_state["score"],
+                "score": {"player1": game_state.score1, "player2": game_state.score2},
                 "created_at": match["created_at"]
             }
             return Response({
@@ -115,7 +115,7 @@ class MovePaddleAPI(APIView):
 
             # Update game state inputs
             player_number = f"player{player.player_number}"
-            match["game_state"]["inputs"][player_number] = -1 if direction == "up" else 1
+            match["game_state"].set_input(player_number, -1 if direction == "up" else 1)
 
             # Notify game loop via WebSocket
             channel_layer = get_channel_layer()
@@ -123,7 +123,7 @@ class MovePaddleAPI(APIView):
                 f"match_{match_id}",
                 {
                     "type": "game_update",
-                    "game_state": match["game_state"]
+                    "game_state": match["game_state"].to_dict()
                 }
             )
             return Response({
@@ -0,0 +1 @@
+# Offline benchmarks for the Pong game core, run with: python -m game.bench.<name>
@@ -0,0 +1,82 @@
+"""
+API player frames benchmark.
+
+Plays --matches scripted matches with the frames in delta mode, an API
+player on one side and a websocket client on the other sharing the match's
+encoder, as the consumers do. Checks after every --check-every ticks that
+the frame the API player holds is the whole state, equal to to_dict(), and
+reports the cost of encoding and storing a frame for the API player, and
+the entries it holds.
+
+    python -m game.bench.api_messages [--matches 50] [--ticks 3000] [--check-every 1]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+from ..pongAPI.api_consumer import APIConsumer
+from ..pongEngine import GameEngine, SWEPT
+from ..pongFrames import FrameEncoder, DELTA, JSON
+from ..pongHelper import BASE_TICK_RATE
+from .common import make_game_state, make_player, scripted_input, print_table
+
+async def play(index, ticks, check_every, tick_rate, rng):
+    """
+    Returns (ns spent in the API player's send_frame, frames, entries held, checks).
+    """
+
+    engine = GameEngine(tick_rate, SWEPT)
+    encoder = FrameEncoder(DELTA)
+    game_state = make_game_state(index, match_id=f"bench_{index}", seed=index)
+    api_player = APIConsumer(make_player(f"bench_{index}_api").user)
+    websocket_player = make_player(f"bench_{index}_ws")
+    websocket_player.frame_format = JSON
+    spent = checks = 0
+    for tick in range(ticks):
+        game_state.input1 = scripted_input(rng, game_state.pad1_y, game_state.ball_y)
+        game_state.input2 = scripted_input(rng, game_state.pad2_y, game_state.ball_y)
+        engine.step(game_state)
+        # The websocket client gets the delta first, as when it is player 1
+        encoder.payload(websocket_player, "game_state", game_state)
+        started = time.perf_counter_ns()
+        await api_player.send_frame(**encoder.payload(api_player, "game_state", game_state))
+        spent += time.perf_counter_ns() - started
+
+        if (tick + 1) % check_every == 0:
+            held = api_player.get_last_message("game_state")["game_state"]
+            expected = json.loads(json.dumps(game_state.to_dict()))
+            assert held == expected, (index, game_state.tick, held, expected)
+            checks += 1
+    return spent, ticks, len(api_player.messages), checks
+
+async def run(args):
+    rng = random.Random(args.matches)
+    spent = frames = checks = held = 0
+    for index in range(args.matches):
+        match_spent, match_frames, match_held, match_checks = await play(index, args.ticks, args.check_every, args.tick_rate, rng)
+        spent += match_spent
+        frames += match_frames
+        checks += match_checks
+        held = max(held, match_held)
+    print(f"{args.matches} matches, {args.ticks} ticks, delta frames at {args.tick_rate} Hz")
+    print_table(
+        ("frames", "checks", "us per frame", "entries held"),
+        [(f"{frames:,}", f"{checks:,}", f"{spent / frames / 1000:.2f}", held)],
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", type=int, default=50)
+    parser.add_argument("--ticks", type=int, default=3000)
+    parser.add_argument("--check-every", type=int, default=1)
+    parser.add_argument("--tick-rate", type=int, default=BASE_TICK_RATE)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
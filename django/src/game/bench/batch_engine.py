@@ -0,0 +1,125 @@
+"""
+BatchGameEngine benchmark.
+
+Checks that the batch engine reproduces GameEngine tick for tick, then
+measures full ticks per second (every match stepped once) for both engines.
+Both run the only configuration BatchGameEngine supports: discrete
+collisions at the base tick rate. Needs numpy, which the server doesn't.
+
+    python -m game.bench.batch_engine [--ticks 500] [--sizes 10 100 1000]
+"""
+
+import argparse
+import copy
+import random
+import time
+import numpy as np
+from ..pongEngine import GameEngine
+from .numpy_engine import BatchGameEngine
+from .common import make_game_state, scripted_input, print_table
+
+def snapshot(game_state):
+    return (
+        game_state.ball_x, game_state.ball_y,
+        game_state.dir_x, game_state.dir_y,
+        game_state.ball_speed,
+        game_state.pad1_y, game_state.pad2_y,
+        game_state.score1, game_state.score2,
+        game_state.count, game_state.ball_touched,
+    )
+
+def check_equivalence(matches, ticks, seed=42):
+    """
+    Steps both engines in lockstep and compares every field after every tick.
+    """
+
+    states = {f"m{i}": make_game_state(i, seed=seed * matches + i) for i in range(matches)}
+
+    # The batch engine works on copies, with their own copy of each match RNG
+    mirror = copy.deepcopy(states)
+    engine, batch = GameEngine(), BatchGameEngine(matches)
+    for key, game_state in mirror.items():
+        batch.add_match(key, game_state)
+
+    inputs_rng = random.Random(seed)
+    live = set(states)
+    compared = 0
+
+    for tick in range(ticks):
+        for key in batch.keys:
+            game_state = states[key]
+            for player, pad_y in (("player1", game_state.pad1_y), ("player2", game_state.pad2_y)):
+                value = scripted_input(inputs_rng, pad_y, game_state.ball_y)
+                game_state.set_input(player, value)
+                batch.set_input(key, player, value)
+
+        dict_finished = []
+        for key in batch.keys:
+            game_over, _ = engine.step(states[key])
+            if game_over:
+                dict_finished.append(key)
+        batch_finished = [key for key, _ in batch.step()]
+
+        if dict_finished != batch_finished:
+            return False, f"tick {tick}: finished {dict_finished} != {batch_finished}"
+        for key in list(live):
+            expected = snapshot(states[key])
+            actual = snapshot(batch.store(key, mirror[key]))
+            if expected != actual:
+                return False, f"tick {tick}, match {key}: {expected} != {actual}"
+            compared += 1
+        for key in dict_finished:
+            batch.remove_match(key)
+            live.discard(key)
+        if not live:
+            break
+
+    return True, f"{compared} match-ticks identical"
+
+def bench_dict(matches, ticks):
+    engine = GameEngine()
+    states = [make_game_state(i) for i in range(matches)]
+    inputs = np.random.default_rng(0).integers(-1, 2, size=(ticks, matches, 2)).tolist()
+
+    start = time.perf_counter()
+    for tick in range(ticks):
+        for i, game_state in enumerate(states):
+            game_state.input1, game_state.input2 = inputs[tick][i]
+            game_over, _ = engine.step(game_state)
+            if game_over:
+                states[i] = make_game_state(i)
+    return ticks / (time.perf_counter() - start)
+
+def bench_batch(matches, ticks):
+    batch = BatchGameEngine(matches)
+    for i in range(matches):
+        batch.add_match(i, make_game_state(i))
+    inputs = np.random.default_rng(0).integers(-1, 2, size=(ticks, 2, matches)).astype(np.int8)
+
+    start = time.perf_counter()
+    for tick in range(ticks):
+        batch.input1[:matches] = inputs[tick][0]
+        batch.input2[:matches] = inputs[tick][1]
+        for key, _ in batch.step():
+            batch.load(key, make_game_state(key))
+    return ticks / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ticks", type=int, default=500)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--check-ticks", type=int, default=20000)
+    args = parser.parse_args()
+
+    ok, detail = check_equivalence(64, args.check_ticks)
+    print(f"Equivalence with GameEngine: {'OK' if ok else 'MISMATCH'} ({detail})")
+
+    rows = []
+    for size in args.sizes:
+        dict_tps = bench_dict(size, args.ticks)
+        batch_tps = bench_batch(size, args.ticks)
+        rows.append((size, f"{dict_tps:,.0f}", f"{batch_tps:,.0f}", f"{batch_tps / dict_tps:.1f}x"))
+    print_table(("matches", "GameEngine ticks/s", "BatchGameEngine ticks/s", "speedup"), rows)
+
+if __name__ == "__main__":
+    main()
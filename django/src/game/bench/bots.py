@@ -0,0 +1,70 @@
+"""
+Server-side bot benchmark.
+
+Plays bot against bot matches for every pair of difficulty levels, with the
+BotController driving both paddles as the scheduler does, and reports the
+win rate of the first level, the rally length and the controller cost per
+bot and per tick.
+
+    python -m game.bench.bots [--matches 50] [--max-ticks 20000]
+"""
+
+import argparse
+import time
+from itertools import combinations_with_replacement
+from ..pongBots import BotController, BOT_LEVELS
+from ..pongEngine import GameEngine, SWEPT
+from ..pongHelper import BASE_TICK_RATE
+from .common import make_game_state, print_table
+
+def play(level1, level2, matches, max_ticks):
+    """
+    Returns (level1 wins, finished matches, ticks per point, ns per bot update).
+    """
+
+    engine = GameEngine(BASE_TICK_RATE, SWEPT)
+    controller = BotController(BASE_TICK_RATE, seed=7)
+    states = []
+    for index in range(matches):
+        game_state = make_game_state(index, match_id=f"match_{index}", seed=index)
+        controller.add(game_state.match_id, game_state, 1, level1)
+        controller.add(game_state.match_id, game_state, 2, level2)
+        states.append(game_state)
+
+    wins = finished = ticks = points = 0
+    update_ns = updates = 0
+    running = {game_state.match_id: game_state for game_state in states}
+    for _ in range(max_ticks):
+        if not running:
+            break
+        started = time.perf_counter_ns()
+        controller.update()
+        update_ns += time.perf_counter_ns() - started
+        updates += 2 * len(running)
+
+        for match_id, game_state in list(running.items()):
+            game_over, winner = engine.step(game_state)
+            ticks += 1
+            if game_over:
+                finished += 1
+                points += game_state.score1 + game_state.score2
+                wins += winner == game_state.header.player1.username
+                controller.remove(match_id)
+                del running[match_id]
+    return wins, finished, ticks / max(1, points), update_ns / max(1, updates)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", type=int, default=50)
+    parser.add_argument("--max-ticks", type=int, default=20000)
+    args = parser.parse_args()
+
+    rows = []
+    for level1, level2 in combinations_with_replacement(BOT_LEVELS, 2):
+        wins, finished, ticks_per_point, cost = play(level1, level2, args.matches, args.max_ticks)
+        rows.append((f"{level1} vs {level2}", f"{wins}/{finished}", f"{ticks_per_point:,.0f}", f"{cost:,.0f}"))
+    print(f"{args.matches} matches per pairing at {BASE_TICK_RATE} Hz")
+    print_table(("pairing", "first wins", "ticks/point", "ns/bot/tick"), rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Match checkpoint benchmark.
+
+Runs the given number of matches on the TickScheduler for --seconds, once
+without checkpoints, once with the Checkpointer writing to a file every
+--interval seconds and once with the same snapshot encoded in one go on
+the event loop. Reports the tick durations and how late the ticks
+started, which is where a checkpoint taken between two ticks would show.
+
+    python -m game.bench.checkpoint [--matches 300 600] [--seconds 5] [--interval 1]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+from ..pongCheckpoint import Checkpointer, FileCheckpointStore
+from ..pongHelper import BASE_TICK_RATE
+from ..pongScheduler import TickScheduler
+from .common import make_player, print_table
+from .workers import Load
+
+class LobbyLoad(Load):
+    """
+    Load whose matches are also listed like LobbyManager.active_matches.
+    """
+
+    def __init__(self, target, count):
+        self.active_matches = {}
+        super().__init__(target, count)
+
+    def add(self):
+        super().add()
+        for match_id in [match_id for match_id in self.active_matches if match_id not in self.target.matches]:
+            del self.active_matches[match_id]
+        match = self.target.matches[self.created]
+        players = [make_player(f"bench_{self.created}_a"), make_player(f"bench_{self.created}_b")]
+        self.active_matches[self.created] = {"players": players, "game_state": match.game_state, "created_at": None}
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+async def run(count, seconds, interval, mode, path):
+    """
+    Returns (tick ms list, tick lateness ms list, checkpoint ms list, file size).
+    """
+
+    loop = asyncio.get_running_loop()
+    TickScheduler._instance = None
+    scheduler = TickScheduler()
+    load = LobbyLoad(scheduler, count)
+
+    durations, lateness = [], []
+    tick = scheduler.tick
+    expected = [None]
+
+    async def timed_tick(steps=1):
+        started = loop.time()
+        if expected[0] is not None:
+            lateness.append((started - expected[0]) * 1000)
+        await tick(steps)
+        durations.append((loop.time() - started) * 1000)
+        expected[0] = max(started, expected[0] or started) + scheduler.interval * steps
+
+    scheduler.tick = timed_tick
+
+    saves = []
+    Checkpointer._instance = None
+    checkpoints = Checkpointer()
+    checkpoints.lobby = SimpleNamespace(active_matches=load.active_matches)
+    checkpoints.store = FileCheckpointStore(path)
+
+    async def checkpoint_loop():
+        while True:
+            await asyncio.sleep(interval)
+            started = time.perf_counter()
+            if mode == "checkpointer":
+                await checkpoints.save()
+            else:
+                # Same snapshot, encoded and written without leaving the loop
+                with open(path, "w", encoding="utf-8") as file:
+                    file.write(json.dumps(checkpoints.capture()))
+            saves.append((time.perf_counter() - started) * 1000)
+
+    writer = loop.create_task(checkpoint_loop()) if mode != "off" else None
+    await asyncio.sleep(seconds)
+    if writer is not None:
+        writer.cancel()
+    scheduler.matches.clear()
+    await asyncio.sleep(2 * scheduler.interval)
+    size = os.path.getsize(path) if mode != "off" else 0
+    return durations, lateness, saves, size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", type=int, nargs="+", default=[300, 600])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--interval", type=float, default=1)
+    args = parser.parse_args()
+    logging.getLogger('pong.scheduler').setLevel(logging.ERROR)
+    logging.getLogger('pong.checkpoint').setLevel(logging.ERROR)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "checkpoint.json")
+        for count in args.matches:
+            for mode in ("off", "checkpointer", "on the loop"):
+                durations, lateness, saves, size = asyncio.run(run(count, args.seconds, args.interval, mode, path))
+                rows.append((
+                    count, mode,
+                    f"{sum(durations) / len(durations):.2f}", f"{percentile(durations, 0.99):.2f}",
+                    f"{percentile(lateness, 0.99):.2f}", f"{max(lateness):.2f}",
+                    f"{sum(saves) / len(saves):.1f}" if saves else "-",
+                    f"{size / 1024:,.0f}" if size else "-",
+                ))
+    print(f"{BASE_TICK_RATE} Hz, {args.seconds:g}s per run, checkpoint every {args.interval:g}s")
+    print_table(("matches", "checkpoint", "tick ms", "p99 tick ms", "p99 late ms", "max late ms", "save ms", "file KiB"), rows)
+
+if __name__ == "__main__":
+    main()
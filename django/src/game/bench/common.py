@@ -0,0 +1,51 @@
+"""
+╔═══════════════════════════════════════════════════╗
+║                 Bench helpers                     ║
+╠═══════════════════════════════════════════════════╣
+║ Shared fixtures for the offline Pong benchmarks   ║
+║                                                   ║
+║ • Builds fake players without touching the DB     ║
+║ • Scripts paddle inputs that keep rallies going   ║
+║ • Formats benchmark results as aligned tables     ║
+╚═══════════════════════════════════════════════════╝
+"""
+
+from types import SimpleNamespace
+from ..pongHelper import PAD_HEIGHT, create_initial_game_state
+
+def make_player(username, elo=1000):
+    """
+    Returns an object shaped like a consumer, with a user attribute.
+    """
+
+    return SimpleNamespace(user=SimpleNamespace(id=hash(username), username=username, nickname=None, elo=elo))
+
+def make_game_state(index, match_id=None, seed=None):
+    """
+    Creates a fresh game state between two fake players.
+    """
+
+    return create_initial_game_state(make_player(f"bench_{index}_a"), make_player(f"bench_{index}_b"), match_id, seed=seed)
+
+def scripted_input(rng, pad_y, ball_y, skill=0.9):
+    """
+    Paddle input that follows the ball, missing now and then.
+    """
+
+    if rng.random() > skill:
+        return rng.choice((-1, 0, 1))
+    center = pad_y + PAD_HEIGHT / 2
+    if ball_y < center - 10:
+        return -1
+    if ball_y > center + 10:
+        return 1
+    return 0
+
+def print_table(headers, rows):
+    """
+    Prints rows as a plain aligned table.
+    """
+
+    widths = [max(len(str(value)) for value in column) for column in zip(headers, *rows)]
+    for line in [headers, *rows]:
+        print("  ".join(str(value).rjust(width) for value, width in zip(line, widths)))
@@ -0,0 +1,139 @@
+"""
+Determinism conformance check.
+
+Plays seeded matches with scripted inputs while recording the input changes,
+then replays every match from its header and input log alone and checks that
+the end states are bit-identical. Replays run in a fresh engine, in reverse
+order and interleaved, so neither match order nor shared state can leak in.
+
+    python -m game.bench.determinism [--matches 200] [--ticks 3000]
+    python -m game.bench.determinism --save streams.json
+    python -m game.bench.determinism --check streams.json
+
+--save writes the recorded streams with their end state digests, --check
+replays a saved file (e.g. from another machine) against those digests.
+"""
+
+import argparse
+import json
+import random
+import sys
+from ..pongEngine import GameEngine, DISCRETE, SWEPT
+from ..pongLockstep import InputLog, replay, state_digest
+from ..pongState import MatchHeader, PlayerInfo
+from .common import make_game_state, scripted_input, print_table
+
+def record(engine, matches, ticks, seed, skill=0.3):
+    """
+    Plays the matches, returns (header, changes, end_tick, digest) for each one.
+    """
+
+    inputs_rng = random.Random(seed)
+    recorded = []
+    for index in range(matches):
+        game_state = make_game_state(index, match_id=f"m{index}", seed=seed * matches + index)
+        log = InputLog()
+        for _ in range(ticks):
+            game_state.input1 = scripted_input(inputs_rng, game_state.pad1_y, game_state.ball_y, skill)
+            game_state.input2 = scripted_input(inputs_rng, game_state.pad2_y, game_state.ball_y, skill)
+            log.record(game_state)
+            game_over, _ = engine.step(game_state)
+            if game_over:
+                break
+        recorded.append((game_state.header, log.changes, game_state.tick, state_digest(game_state)))
+    return recorded
+
+def replay_interleaved(engine, recorded):
+    """
+    Replays every match one tick at a time, in reverse order.
+    """
+
+    runs = [(header, iter(sorted(changes)), end_tick) for header, changes, end_tick, _ in reversed(recorded)]
+    states = {}
+    for header, _, _ in runs:
+        states[header.match_id] = replay(header, (), engine, until_tick=0)
+    pending = {header.match_id: next(changes, None) for header, changes, _ in runs}
+
+    live = list(runs)
+    while live:
+        for run in list(live):
+            header, changes, end_tick = run
+            game_state = states[header.match_id]
+            change = pending[header.match_id]
+            while change is not None and change[0] <= game_state.tick:
+                game_state.set_input("player1" if change[1] == 1 else "player2", change[2])
+                change = next(changes, None)
+            pending[header.match_id] = change
+            game_over, _ = engine.step(game_state)
+            if game_over or game_state.tick >= end_tick:
+                live.remove(run)
+    return {match_id: state_digest(game_state) for match_id, game_state in states.items()}
+
+def check(engine, recorded):
+    """
+    Returns the number of matches whose replays match the recorded digest.
+    """
+
+    ok = 0
+    interleaved = replay_interleaved(engine, recorded)
+    for header, changes, end_tick, digest in recorded:
+        alone = state_digest(replay(header, changes, engine, until_tick=end_tick))
+        ok += alone == digest and interleaved[header.match_id] == digest
+    return ok
+
+def save(path, mode, recorded):
+    data = {"mode": mode, "matches": [{
+        "match_id": header.match_id,
+        "seed": header.seed,
+        "players": [header.player1._asdict(), header.player2._asdict()],
+        "changes": changes,
+        "end_tick": end_tick,
+        "digest": digest,
+    } for header, changes, end_tick, digest in recorded]}
+    with open(path, "w") as file:
+        json.dump(data, file)
+
+def load(path):
+    with open(path) as file:
+        data = json.load(file)
+    recorded = []
+    for match in data["matches"]:
+        player1, player2 = (PlayerInfo(**player) for player in match["players"])
+        header = MatchHeader(player1, player2, match["match_id"], seed=match["seed"])
+        changes = [tuple(change) for change in match["changes"]]
+        recorded.append((header, changes, match["end_tick"], match["digest"]))
+    return data["mode"], recorded
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", type=int, default=200)
+    parser.add_argument("--ticks", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skill", type=float, default=0.3, help="scripted players skill, lower ends matches sooner")
+    parser.add_argument("--save", metavar="FILE")
+    parser.add_argument("--check", metavar="FILE")
+    args = parser.parse_args()
+
+    if args.check:
+        mode, recorded = load(args.check)
+        ok = check(GameEngine(collision_mode=mode, deterministic=True), recorded)
+        print(f"{args.check}: {ok}/{len(recorded)} matches bit-identical")
+        sys.exit(0 if ok == len(recorded) else 1)
+
+    rows, failed = [], False
+    for mode in (DISCRETE, SWEPT):
+        for deterministic in (False, True):
+            recorded = record(GameEngine(collision_mode=mode, deterministic=deterministic), args.matches, args.ticks, args.seed, args.skill)
+            ok = check(GameEngine(collision_mode=mode, deterministic=deterministic), recorded)
+            changes = sum(len(changes) for _, changes, _, _ in recorded)
+            ticks = sum(end_tick for _, _, end_tick, _ in recorded)
+            finished = sum(end_tick < args.ticks for _, _, end_tick, _ in recorded)
+            rows.append((mode, "quantized" if deterministic else "float", ticks, finished, changes, f"{ok}/{len(recorded)}"))
+            failed |= ok != len(recorded)
+            if args.save and mode == SWEPT and deterministic:
+                save(args.save, mode, recorded)
+    print_table(("collision", "state", "ticks", "finished", "input changes", "bit-identical"), rows)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
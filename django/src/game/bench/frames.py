@@ -0,0 +1,72 @@
+"""
+Frame size benchmark.
+
+Plays scripted matches and encodes every tick as the consumers do: as full
+JSON frames, as delta JSON frames and as packed binary frames. Reports the
+websocket payload per match and per second, and the encode cost. With
+--snapshot-rate below the tick rate only snapshot ticks are encoded, with
+their server time and ball velocity.
+
+    python -m game.bench.frames [--matches 200] [--ticks 3000] [--snapshot-rate 20]
+"""
+
+import argparse
+import random
+import time
+from ..pongEngine import GameEngine, SWEPT
+from ..pongFrames import FrameEncoder, FULL, DELTA, BINARY, KEYFRAME_INTERVAL
+from ..pongHelper import BASE_TICK_RATE
+from .common import make_game_state, scripted_input, print_table
+
+def measure(mode, matches, ticks, tick_rate, snapshot_rate, keyframe_interval, seed=42):
+    """
+    Returns (bytes per match per second, encode ns per frame).
+    """
+
+    engine = GameEngine(tick_rate, SWEPT)
+    snapshot_every = max(1, round(tick_rate / snapshot_rate))
+    rng = random.Random(seed)
+    sent = frames = 0
+    encode_ns = 0
+    for index in range(matches):
+        game_state = make_game_state(index, match_id=f"match_{index}", seed=seed + index)
+        encoder = FrameEncoder(DELTA if mode == BINARY else mode, keyframe_interval, snapshots=snapshot_every > 1)
+        for _ in range(ticks):
+            game_state.input1 = scripted_input(rng, game_state.pad1_y, game_state.ball_y)
+            game_state.input2 = scripted_input(rng, game_state.pad2_y, game_state.ball_y)
+            game_over, _ = engine.step(game_state)
+            if game_over:
+                break
+            if game_state.tick % snapshot_every:
+                continue
+            started = time.perf_counter_ns()
+            if mode == BINARY:
+                message = encoder.binary("game_state", game_state)
+            else:
+                message = encoder.message("game_state", game_state).encode()
+            encode_ns += time.perf_counter_ns() - started
+            sent += len(message)
+            frames += 1
+    return sent / frames * tick_rate / snapshot_every, encode_ns / frames
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", type=int, default=200)
+    parser.add_argument("--ticks", type=int, default=3000)
+    parser.add_argument("--tick-rate", type=int, default=BASE_TICK_RATE)
+    parser.add_argument("--snapshot-rate", type=int, help="frames per second, defaults to the tick rate")
+    parser.add_argument("--keyframe-interval", type=int, default=KEYFRAME_INTERVAL)
+    args = parser.parse_args()
+    snapshot_rate = args.tick_rate / max(1, round(args.tick_rate / (args.snapshot_rate or args.tick_rate)))
+
+    rows = []
+    full_rate = None
+    for mode in (FULL, DELTA, BINARY):
+        rate, cost = measure(mode, args.matches, args.ticks, args.tick_rate, snapshot_rate, args.keyframe_interval)
+        full_rate = full_rate or rate
+        rows.append((mode, f"{rate / snapshot_rate:,.0f}", f"{rate:,.0f}", f"{rate / full_rate:.0%}", f"{cost:,.0f}"))
+    print(f"{args.tick_rate} Hz simulation, {snapshot_rate:g} Hz frames, keyframe every {args.keyframe_interval} frames, per recipient")
+    print_table(("mode", "bytes/frame", "bytes/s per match", "vs full", "encode ns/frame"), rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+GameState benchmark.
+
+Compares the slotted GameState with the nested dict it replaced:
+memory per match, engine CPU per tick and the cost of a wire frame.
+
+    python -m game.bench.game_state [--matches 10000] [--ticks 200]
+"""
+
+import argparse
+import copy
+import json
+import math
+import time
+import tracemalloc
+from ..pongEngine import GameEngine
+from ..pongHelper import CANVAS_WIDTH, CANVAS_HEIGHT, PAD_WIDTH, PAD_HEIGHT, PAD_SPEED, BALL_RADIUS
+from .common import make_game_state, print_table
+
+def legacy_state(game_state):
+    """
+    Rebuilds the former per-match nested dict, player_info included.
+    """
+
+    data = game_state.to_dict()
+    data["player_info"] = copy.deepcopy(data["player_info"])
+    del data["ballSpeed"]
+    return data
+
+def legacy_tick(game_state):
+    """
+    Former dict-based GameEngine.update_game_state, statement for statement.
+    """
+
+    game_state["pads"]["player1"]["y"] += game_state["inputs"]["player1"] * PAD_SPEED
+    game_state["pads"]["player2"]["y"] += game_state["inputs"]["player2"] * PAD_SPEED
+    game_state["pads"]["player1"]["y"] = max(0, min(game_state["pads"]["player1"]["y"], CANVAS_HEIGHT - PAD_HEIGHT))
+    game_state["pads"]["player2"]["y"] = max(0, min(game_state["pads"]["player2"]["y"], CANVAS_HEIGHT - PAD_HEIGHT))
+
+    ball_speed = game_state.get("ballSpeed", 5)
+    game_state["ball"]["x"] += game_state["directionBall"]["x"] * ball_speed
+    if game_state["ballTouched"]:
+        game_state["ball"]["y"] += game_state["directionBall"]["y"] * ball_speed
+
+    if game_state["ball"]["y"] <= 0 or game_state["ball"]["y"] >= CANVAS_HEIGHT - BALL_RADIUS:
+        game_state["directionBall"]["y"] *= -1
+
+    if (game_state["ball"]["x"] <= game_state["pads"]["player1"]["x"] + PAD_WIDTH and
+        game_state["ball"]["x"] >= game_state["pads"]["player1"]["x"] and
+        game_state["ball"]["y"] + BALL_RADIUS >= game_state["pads"]["player1"]["y"] and
+        game_state["ball"]["y"] <= game_state["pads"]["player1"]["y"] + PAD_HEIGHT):
+        legacy_collision(game_state, "player1")
+    if (game_state["ball"]["x"] + BALL_RADIUS >= game_state["pads"]["player2"]["x"] and
+        game_state["ball"]["x"] <= game_state["pads"]["player2"]["x"] + PAD_WIDTH and
+        game_state["ball"]["y"] + BALL_RADIUS >= game_state["pads"]["player2"]["y"] and
+        game_state["ball"]["y"] <= game_state["pads"]["player2"]["y"] + PAD_HEIGHT):
+        legacy_collision(game_state, "player2")
+
+    # Keep the ball in play, goals are outside the measured path
+    if game_state["ball"]["x"] <= 0 or game_state["ball"]["x"] >= CANVAS_WIDTH:
+        game_state["ball"]["x"] = CANVAS_WIDTH / 2
+    return game_state
+
+def legacy_collision(game_state, player):
+    pad = game_state["pads"][player]
+    impact = (game_state["ball"]["y"] + BALL_RADIUS / 2) - (pad["y"] + PAD_HEIGHT / 2)
+    bounce_angle = impact / (PAD_HEIGHT / 2) * (3.14159 / 3)
+    game_state["directionBall"]["x"] = math.cos(bounce_angle) if player == "player1" else -math.cos(bounce_angle)
+    game_state["directionBall"]["y"] = math.sin(bounce_angle)
+    magnitude = math.sqrt(game_state["directionBall"]["x"] ** 2 + game_state["directionBall"]["y"] ** 2)
+    game_state["directionBall"]["x"] /= magnitude
+    game_state["directionBall"]["y"] /= magnitude
+    game_state["count"] += 1
+    game_state["ballSpeed"] = 4 + (game_state["count"] * 0.3)
+    if player == "player1":
+        game_state["ball"]["x"] = pad["x"] + PAD_WIDTH + 1
+    else:
+        game_state["ball"]["x"] = pad["x"] - BALL_RADIUS - 1
+    game_state["ballTouched"] = True
+
+def measure_memory(build, matches):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = [build(i) for i in range(matches)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del kept
+    return size / matches
+
+def measure_ticks(states, step, ticks):
+    start = time.perf_counter()
+    for _ in range(ticks):
+        for game_state in states:
+            step(game_state)
+    return (time.perf_counter() - start) / (ticks * len(states)) * 1e9
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", type=int, default=10000)
+    parser.add_argument("--ticks", type=int, default=200)
+    args = parser.parse_args()
+
+    dict_bytes = measure_memory(lambda i: legacy_state(make_game_state(i)), args.matches)
+    slot_bytes = measure_memory(make_game_state, args.matches)
+
+    engine = GameEngine()
+    def slot_step(game_state):
+        engine.update_game_state(game_state)
+        if game_state.ball_x <= 0 or game_state.ball_x >= CANVAS_WIDTH:
+            game_state.ball_x = CANVAS_WIDTH / 2
+
+    sample = [make_game_state(i) for i in range(1000)]
+    dict_tick = measure_ticks([legacy_state(s) for s in sample], legacy_tick, args.ticks)
+    slot_tick = measure_ticks(sample, slot_step, args.ticks)
+    dict_frame = measure_ticks([legacy_state(s) for s in sample], json.dumps, 20)
+    slot_frame = measure_ticks(sample, lambda s: json.dumps(s.to_dict()), 20)
+
+    print_table(("", "dict", "GameState"), [
+        ("bytes per match", f"{dict_bytes:,.0f}", f"{slot_bytes:,.0f}"),
+        ("engine ns per match-tick", f"{dict_tick:,.0f}", f"{slot_tick:,.0f}"),
+        ("wire frame ns per match", f"{dict_frame:,.0f}", f"{slot_frame:,.0f}"),
+    ])
+
+if __name__ == "__main__":
+    main()
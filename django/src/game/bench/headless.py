@@ -0,0 +1,190 @@
+"""
+Headless match simulation.
+
+Plays full 3-point games through create_initial_game_state and GameEngine,
+with scripted or random paddle inputs and no sockets or database. Matches
+run side by side like in the TickScheduler: every tick steps each live
+match once and a finished match is replaced until --games have been played.
+
+Reports match-ticks per second, tick latency percentiles, memory allocated
+per tick (tracemalloc, measured on a separate pass) and the peak RSS.
+
+    python -m game.bench.headless [--games 2000] [--concurrent 100]
+    python -m game.bench.headless --save baseline.json
+    python -m game.bench.headless --compare baseline.json [--tolerance 0.1]
+
+--compare runs with the configuration stored in the baseline and exits
+with status 1 when throughput dropped by more than the tolerance.
+"""
+
+import argparse
+import json
+import platform
+import random
+import resource
+import sys
+import time
+import tracemalloc
+from ..pongEngine import GameEngine, DISCRETE, SWEPT
+from ..pongHelper import BASE_TICK_RATE
+from .common import make_game_state, scripted_input, print_table
+
+# Configuration keys stored in a baseline
+CONFIG_KEYS = ("games", "concurrent", "inputs", "skill", "collision", "tick_rate", "deterministic", "seed")
+
+class Simulation:
+    """
+    A pool of concurrent matches played until enough games are over.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.engine = GameEngine(config["tick_rate"], config["collision"], config["deterministic"])
+        self.rng = random.Random(config["seed"])
+        self.started = 0
+        self.finished = 0
+        self.match_ticks = 0
+        self.matches = [self.new_match() for _ in range(min(config["concurrent"], config["games"]))]
+
+    def new_match(self):
+        self.started += 1
+        return make_game_state(self.started, seed=self.config["seed"] * 1_000_003 + self.started)
+
+    def set_inputs(self, game_state):
+        if self.config["inputs"] == "random":
+            # Hold a random input for a few ticks, like a human would
+            if self.rng.random() < 0.1:
+                game_state.input1 = self.rng.choice((-1, 0, 1))
+            if self.rng.random() < 0.1:
+                game_state.input2 = self.rng.choice((-1, 0, 1))
+        else:
+            skill = self.config["skill"]
+            game_state.input1 = scripted_input(self.rng, game_state.pad1_y, game_state.ball_y, skill)
+            game_state.input2 = scripted_input(self.rng, game_state.pad2_y, game_state.ball_y, skill)
+
+    def tick(self):
+        """
+        Steps every live match once, replacing the finished ones.
+        """
+
+        matches = self.matches
+        for i in range(len(matches) - 1, -1, -1):
+            game_state = matches[i]
+            self.set_inputs(game_state)
+            game_over, _ = self.engine.step(game_state)
+            if game_over:
+                self.finished += 1
+                if self.started < self.config["games"]:
+                    matches[i] = self.new_match()
+                else:
+                    matches.pop(i)
+        self.match_ticks += len(matches)
+        return bool(matches)
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def measure(config):
+    """
+    Timed pass then allocation pass, returns the metrics dict.
+    """
+
+    simulation = Simulation(config)
+    durations = []
+    start = time.perf_counter()
+    while True:
+        tick_start = time.perf_counter_ns()
+        running = simulation.tick()
+        durations.append(time.perf_counter_ns() - tick_start)
+        if not running:
+            break
+    elapsed = time.perf_counter() - start
+    durations.sort()
+
+    # Same workload again under tracemalloc, for the bytes allocated within a tick
+    simulation = Simulation(config)
+    tracemalloc.start()
+    allocated = 0
+    ticks = 0
+    base, _ = tracemalloc.get_traced_memory()
+    while True:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        running = simulation.tick()
+        _, peak = tracemalloc.get_traced_memory()
+        allocated += peak - before
+        ticks += 1
+        if not running:
+            break
+    retained = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+
+    return {
+        "games": simulation.finished,
+        "ticks": len(durations),
+        "match_ticks": simulation.match_ticks,
+        "match_ticks_per_s": simulation.match_ticks / elapsed,
+        "ns_per_match_tick": elapsed * 1e9 / simulation.match_ticks,
+        "tick_p50_us": percentile(durations, 0.50) / 1000,
+        "tick_p90_us": percentile(durations, 0.90) / 1000,
+        "tick_p99_us": percentile(durations, 0.99) / 1000,
+        "tick_max_us": durations[-1] / 1000,
+        "alloc_bytes_per_tick": allocated / ticks,
+        "retained_bytes": retained,
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+def show(metrics, baseline=None):
+    rows = []
+    for name, value in metrics.items():
+        row = [name, f"{value:,.2f}" if isinstance(value, float) else f"{value:,}"]
+        if baseline is not None:
+            old = baseline.get(name)
+            row.append("" if old is None else f"{old:,.2f}" if isinstance(old, float) else f"{old:,}")
+            row.append(f"{(value - old) / old:+.1%}" if old else "")
+        rows.append(row)
+    headers = ("metric", "current") if baseline is None else ("metric", "current", "baseline", "change")
+    print_table(headers, rows)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--concurrent", type=int, default=100)
+    parser.add_argument("--inputs", choices=("scripted", "random"), default="scripted")
+    parser.add_argument("--skill", type=float, default=0.3, help="scripted players skill")
+    parser.add_argument("--collision", choices=(DISCRETE, SWEPT), default=DISCRETE)
+    parser.add_argument("--tick-rate", type=int, default=BASE_TICK_RATE)
+    parser.add_argument("--deterministic", action="store_true")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", metavar="FILE", help="store the results as a baseline")
+    parser.add_argument("--compare", metavar="FILE", help="run with the baseline configuration and compare")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed throughput drop for --compare")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        config = baseline["config"]
+    else:
+        config = {key: getattr(args, key) for key in CONFIG_KEYS}
+
+    print(f"Config: {config}")
+    metrics = measure(config)
+    show(metrics, baseline and baseline["metrics"])
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump({"config": config, "python": platform.python_version(), "metrics": metrics}, file, indent=2)
+        print(f"Baseline saved to {args.save}")
+
+    if baseline is not None:
+        old = baseline["metrics"]["match_ticks_per_s"]
+        if metrics["match_ticks_per_s"] < old * (1 - args.tolerance):
+            print(f"Regression: throughput dropped more than {args.tolerance:.0%}")
+            sys.exit(1)
+        print("Within tolerance")
+
+if __name__ == "__main__":
+    main()
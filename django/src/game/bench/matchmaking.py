@@ -0,0 +1,112 @@
+"""
+Matchmaking queue benchmark.
+
+Queues --players fake players (ELO around 1000, waits up to 20s) and
+compares the old list scan, which scored every waiting player against the
+seeker, with MatchmakingQueue.best_opponent(). Reports single lookups for
+--lookups seekers, whether both picked the same opponent, and a full
+find_matches_for_all() style pass. The old pass is timed over --sample
+seekers and extrapolated to the whole queue, as it takes minutes at 10k.
+
+    python -m game.bench.matchmaking [--players 1000 10000] [--lookups 200] [--sample 200]
+"""
+
+import argparse
+import random
+import time
+from ..pongQueue import MatchmakingQueue, MAX_ELO_GAP, MAX_WAIT, match_score
+from .common import make_player, print_table
+
+def fill(count, rng, now):
+    players = []
+    queue = MatchmakingQueue()
+    for index in range(count):
+        player = make_player(f"bench_{index}", elo=max(0, int(rng.gauss(1000, 200))))
+        player.match_id = None
+        if rng.random() < 0.1:
+            player._is_api = True
+        timestamp = now - rng.uniform(0, 20)
+        players.append((player, timestamp, player.user.elo))
+        queue.add(player, timestamp, player.user.elo)
+    return players, queue
+
+def scan(waiting, player, elo, now, skip=()):
+    """
+    Best opponent as the old loop over waiting_players found it.
+    """
+
+    best, best_score = None, float("inf")
+    for other, timestamp, other_elo in waiting:
+        if other is player or other.user.id in skip or other.match_id:
+            continue
+        score = match_score(abs(elo - other_elo), now - timestamp, hasattr(player, '_is_api') != hasattr(other, '_is_api'))
+        if score < best_score:
+            best, best_score = other, score
+    return best_score, best
+
+def old_pass(waiting, now, sample):
+    """
+    Seconds the old pass spent on its first sample seekers, and how many it matched.
+    """
+
+    taken = set()
+    started = time.perf_counter()
+    matched = 0
+    for player, timestamp, elo in waiting[:sample]:
+        if player.user.id in taken:
+            continue
+        score, other = scan(waiting, player, elo, now, taken | {player.user.id})
+        if other is not None and (score < MAX_ELO_GAP or now - timestamp > MAX_WAIT):
+            taken.update((player.user.id, other.user.id))
+            matched += 1
+    return time.perf_counter() - started, matched
+
+def new_pass(queue, now):
+    started = time.perf_counter()
+    matched = 0
+    for player, timestamp, elo in queue:
+        if player not in queue:
+            continue
+        waited_long = now - timestamp > MAX_WAIT
+        found = queue.best_opponent(player, elo, now, limit=float("inf") if waited_long else MAX_ELO_GAP)
+        if found and (found[0] < MAX_ELO_GAP or waited_long):
+            queue.remove(player)
+            queue.remove(found[1][0])
+            matched += 1
+    return time.perf_counter() - started, matched
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--sample", type=int, default=200)
+    args = parser.parse_args()
+
+    rows = []
+    for count in args.players:
+        rng = random.Random(count)
+        now = 1000.0
+        players, queue = fill(count, rng, now)
+        seekers = rng.sample(players, min(args.lookups, count))
+
+        started = time.perf_counter()
+        old = [scan(players, player, elo, now) for player, _, elo in seekers]
+        old_ms = (time.perf_counter() - started) * 1000 / len(seekers)
+        started = time.perf_counter()
+        new = [queue.best_opponent(player, elo, now) for player, _, elo in seekers]
+        new_ms = (time.perf_counter() - started) * 1000 / len(seekers)
+        same = sum(found is not None and found[1][0] is other for (_, other), found in zip(old, new))
+
+        sample = min(args.sample, count)
+        old_seconds, _ = old_pass(players, now, sample)
+        old_seconds *= count / sample
+        new_seconds, matched = new_pass(queue, now)
+
+        rows.append((
+            count, f"{old_ms:.3f}", f"{new_ms:.4f}", f"{same}/{len(seekers)}",
+            f"~{old_seconds:.2f}", f"{new_seconds:.3f}", matched,
+        ))
+    print_table(("players", "scan ms", "index ms", "same pick", "scan pass s (est.)", "index pass s", "matches"), rows)
+
+if __name__ == "__main__":
+    main()
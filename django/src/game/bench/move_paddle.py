@@ -0,0 +1,113 @@
+"""
+REST paddle input benchmark.
+
+Fills the lobby with --matches running matches and posts paddle inputs to
+the move_paddle view for random players, through DRF as a client would
+(authentication forced, no database). "scan" is the view as it was,
+walking every active match to find the caller's, "index" the current view
+using active_matches.for_user(). Reports the latency per request.
+
+    python -m game.bench.move_paddle [--matches 100 1000 5000] [--requests 2000]
+"""
+
+import argparse
+import logging
+import os
+import random
+import time
+from types import SimpleNamespace
+from .common import make_game_state, make_player, print_table
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+def scan_view(api_view, permission_classes, IsAuthenticated, Response, status, PaddleInputSerializer, lobby_manager):
+    """
+    move_paddle before the user index.
+    """
+
+    @api_view(['POST'])
+    @permission_classes([IsAuthenticated])
+    def move_paddle(request):
+        user = request.user
+        serializer = PaddleInputSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        input_value = serializer.validated_data['input']
+        match_data = None
+        player_number = None
+        match_id = None
+        for mid, match in lobby_manager.active_matches.items():
+            for i, player in enumerate(match['players']):
+                if hasattr(player, 'user') and player.user.id == user.id:
+                    match_data = match
+                    player_number = i + 1
+                    match_id = mid
+                    break
+            if match_data:
+                break
+
+        if not match_data:
+            return Response({'error': "L'utilisateur n'est pas dans une partie active"}, status=status.HTTP_404_NOT_FOUND)
+        match_data["game_state"].set_input(f"player{player_number}", input_value)
+        return Response({'status': 'success', 'input_processed': input_value, 'player_number': player_number, 'match_id': match_id})
+
+    return move_paddle
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "transcendence.settings")
+    import django
+    django.setup()
+    logging.disable(logging.WARNING)
+    from rest_framework import status
+    from rest_framework.decorators import api_view, permission_classes
+    from rest_framework.permissions import IsAuthenticated
+    from rest_framework.response import Response
+    from rest_framework.test import APIRequestFactory, force_authenticate
+    from ..pongAPI import api_views
+    from ..pongAPI.serializers import PaddleInputSerializer
+    from ..pongMatchIndex import ActiveMatches
+
+    lobby_manager = api_views.lobby_manager
+    views = {
+        "scan": scan_view(api_view, permission_classes, IsAuthenticated, Response, status, PaddleInputSerializer, lobby_manager),
+        "index": api_views.move_paddle,
+    }
+    factory = APIRequestFactory()
+    rows = []
+    for count in args.matches:
+        rng = random.Random(count)
+        lobby_manager.active_matches = ActiveMatches()
+        users = []
+        for index in range(count):
+            players = [make_player(f"bench_{index}_a"), make_player(f"bench_{index}_b")]
+            lobby_manager.active_matches[f"bench_{index}"] = {"players": players, "game_state": make_game_state(index), "created_at": None}
+            users.extend(SimpleNamespace(id=player.user.id, username=player.user.username, is_authenticated=True) for player in players)
+        callers = [rng.choice(users) for _ in range(args.requests)]
+
+        for name, view in views.items():
+            latencies = []
+            for user in callers:
+                request = factory.post("/api/pong/paddle/", {"input": rng.choice((-1, 0, 1))}, format="json")
+                force_authenticate(request, user=user)
+                started = time.perf_counter()
+                response = view(request)
+                latencies.append((time.perf_counter() - started) * 1000)
+                assert response.status_code == 200, response.data
+            rows.append((
+                count, name,
+                f"{sum(latencies) / len(latencies):.3f}", f"{percentile(latencies, 0.5):.3f}", f"{percentile(latencies, 0.99):.3f}",
+                f"{len(latencies) / (sum(latencies) / 1000):,.0f}",
+            ))
+    lobby_manager.active_matches = ActiveMatches()
+    print_table(("matches", "lookup", "mean ms", "p50 ms", "p99 ms", "req/s"), rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+import math
+import numpy as np
+from ..pongEngine import DISCRETE
+from ..pongHelper import CANVAS_WIDTH, CANVAS_HEIGHT, PAD_WIDTH, PAD_HEIGHT, PAD_SPEED, BALL_RADIUS, BALL_SPEED, BASE_TICK_RATE
+
+class BatchGameEngine:
+    """
+    ╔═══════════════════════════════════════════════════╗
+    ║              BatchGameEngine                      ║
+    ╠═══════════════════════════════════════════════════╣
+    ║ Vectorized physics for many Pong matches at once  ║
+    ║                                                   ║
+    ║ • Stores every live match in NumPy column arrays  ║
+    ║ • Steps pads, ball, walls and pads in one pass    ║
+    ║ • Mirrors GameEngine results match for match      ║
+    ║ • Loads from and writes back to game states       ║
+    ║ • Benchmark only: base tick rate, discrete mode   ║
+    ╚═══════════════════════════════════════════════════╝
+
+    Covers the GameEngine configuration of the equivalence check only:
+    no tick rate scaling, no swept collisions, no deterministic
+    quantization, and inputs are set directly, not buffered with sequence
+    numbers. The scheduler keeps stepping matches with GameEngine.
+    """
+
+    # Column name -> dtype, one array per hot field
+    COLUMNS = {
+        "ball_x": np.float64, "ball_y": np.float64,
+        "dir_x": np.float64, "dir_y": np.float64,
+        "speed": np.float64,
+        "pad1_x": np.float64, "pad1_y": np.float64,
+        "pad2_x": np.float64, "pad2_y": np.float64,
+        "input1": np.int8, "input2": np.int8,
+        "score1": np.int32, "score2": np.int32,
+        "count": np.int32,
+        "touched": np.bool_,
+    }
+
+    def __init__(self, capacity=64, tick_rate=BASE_TICK_RATE, collision_mode=DISCRETE, deterministic=False):
+        """
+        Allocate the column arrays for the given number of matches.
+        Refuses the GameEngine options it doesn't implement.
+        """
+
+        if tick_rate != BASE_TICK_RATE or collision_mode != DISCRETE or deterministic:
+            raise ValueError(
+                f"BatchGameEngine only runs {DISCRETE} collisions at {BASE_TICK_RATE} Hz without quantization, "
+                f"not {collision_mode} at {tick_rate} Hz (deterministic={deterministic})"
+            )
+        self.size = 0
+        self.keys = []
+        self.rngs = []
+        self.rows = {}
+        self._allocate(max(1, capacity))
+
+    def _allocate(self, capacity):
+        """
+        (Re)allocate the column arrays, keeping the live rows.
+        """
+
+        old = getattr(self, "ball_x", None)
+        for name, dtype in self.COLUMNS.items():
+            array = np.zeros(capacity, dtype=dtype)
+            if old is not None:
+                array[:self.size] = getattr(self, name)[:self.size]
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    #===========================================================#
+    #                MATCH MANAGEMENT                           #
+    #===========================================================#
+
+    def add_match(self, key, game_state):
+        """
+        Register a match under the given key and load its state.
+        """
+
+        if key in self.rows:
+            raise KeyError(f"Match {key} already registered")
+        if self.size == self.capacity:
+            self._allocate(self.capacity * 2)
+
+        row = self.size
+        self.size += 1
+        self.keys.append(key)
+        self.rngs.append(game_state.rng)
+        self.rows[key] = row
+        self.load(key, game_state)
+        return row
+
+    def remove_match(self, key):
+        """
+        Drop a match, moving the last row into its place.
+        """
+
+        row = self.rows.pop(key)
+        last = self.size - 1
+        if row != last:
+            for name in self.COLUMNS:
+                column = getattr(self, name)
+                column[row] = column[last]
+            moved_key = self.keys[last]
+            self.keys[row] = moved_key
+            self.rngs[row] = self.rngs[last]
+            self.rows[moved_key] = row
+        self.keys.pop()
+        self.rngs.pop()
+        self.size -= 1
+
+    def set_input(self, key, player, value):
+        """
+        Set the paddle input (-1, 0, 1) of a player in a match.
+        """
+
+        column = self.input1 if player == "player1" else self.input2
+        column[self.rows[key]] = value
+
+    def load(self, key, game_state):
+        """
+        Copy a GameState into the row of a match.
+        """
+
+        row = self.rows[key]
+        self.rngs[row] = game_state.rng
+        self.ball_x[row] = game_state.ball_x
+        self.ball_y[row] = game_state.ball_y
+        self.dir_x[row] = game_state.dir_x
+        self.dir_y[row] = game_state.dir_y
+        self.speed[row] = game_state.ball_speed
+        self.pad1_x[row] = game_state.pad1_x
+        self.pad1_y[row] = game_state.pad1_y
+        self.pad2_x[row] = game_state.pad2_x
+        self.pad2_y[row] = game_state.pad2_y
+        self.input1[row] = game_state.input1
+        self.input2[row] = game_state.input2
+        self.score1[row] = game_state.score1
+        self.score2[row] = game_state.score2
+        self.count[row] = game_state.count
+        self.touched[row] = game_state.ball_touched
+
+    def store(self, key, game_state):
+        """
+        Write the row of a match back into its GameState.
+        """
+
+        row = self.rows[key]
+        game_state.ball_x = float(self.ball_x[row])
+        game_state.ball_y = float(self.ball_y[row])
+        game_state.dir_x = float(self.dir_x[row])
+        game_state.dir_y = float(self.dir_y[row])
+        game_state.ball_speed = float(self.speed[row])
+        game_state.pad1_y = float(self.pad1_y[row])
+        game_state.pad2_y = float(self.pad2_y[row])
+        game_state.score1 = int(self.score1[row])
+        game_state.score2 = int(self.score2[row])
+        game_state.count = int(self.count[row])
+        game_state.ball_touched = bool(self.touched[row])
+        return game_state
+
+    #===========================================================#
+    #                GAME STATE                                 #
+    #===========================================================#
+
+    def step(self):
+        """
+        Advance every registered match by one frame.
+        Returns the (key, winner) pairs of the matches that just ended.
+        """
+
+        self.update_pads()
+        self.update_ball()
+        self.collision_wall()
+        self.collision_pad()
+        return self.check_goals()
+
+    def check_goals(self):
+        """
+        Scores goals, resets the ball and reports finished matches.
+        """
+
+        n = self.size
+        x = self.ball_x[:n]
+        scored2 = x <= 0
+        scored1 = (x >= CANVAS_WIDTH) & ~scored2
+        goals = np.flatnonzero(scored1 | scored2)
+        finished = []
+
+        # Goals are rare, resolve them row by row with the RNG of each match
+        for row in goals:
+            scorer = "player2" if scored2[row] else "player1"
+            self.reset_ball(row, scorer)
+            score = self.score2 if scorer == "player2" else self.score1
+            score[row] += 1
+            if score[row] >= 3:
+                finished.append((self.keys[row], scorer))
+        return finished
+
+    def reset_ball(self, row, scorer=None):
+        """
+        Resets the ball of one row to the center after a score.
+        """
+
+        self.ball_x[row] = CANVAS_WIDTH / 2 - BALL_RADIUS / 2
+        self.ball_y[row] = CANVAS_HEIGHT / 2 - BALL_RADIUS / 2
+        if scorer:
+            self.dir_x[row] = 1 if scorer == "player1" else -1
+        else:
+            self.dir_x[row] = 1 if self.rngs[row].random() < 0.5 else -1
+        self.dir_y[row] = 1 if self.rngs[row].random() < 0.5 else -1
+        self.speed[row] = BALL_SPEED
+        self.count[row] = 0
+        self.touched[row] = False
+
+    #===========================================================#
+    #                GAME PHYSICS                               #
+    #===========================================================#
+
+    def update_pads(self):
+        """
+        Updates paddle positions based on player inputs.
+        """
+
+        n = self.size
+        for pad, inputs in ((self.pad1_y, self.input1), (self.pad2_y, self.input2)):
+            pad[:n] += inputs[:n] * PAD_SPEED
+            np.clip(pad[:n], 0, CANVAS_HEIGHT - PAD_HEIGHT, out=pad[:n])
+
+    def update_ball(self):
+        """
+        Updates ball positions based on their direction and speed.
+        """
+
+        n = self.size
+        self.ball_x[:n] += self.dir_x[:n] * self.speed[:n]
+        touched = self.touched[:n]
+        self.ball_y[:n][touched] += self.dir_y[:n][touched] * self.speed[:n][touched]
+
+    def collision_wall(self):
+        """
+        Handles ball collisions with top and bottom walls.
+        """
+
+        n = self.size
+        y = self.ball_y[:n]
+        hit = (y <= 0) | (y >= CANVAS_HEIGHT - BALL_RADIUS)
+        self.dir_y[:n][hit] *= -1
+
+    def collision_pad(self):
+        """
+        Detects and handles ball collisions with paddles.
+        """
+
+        n = self.size
+        x, y = self.ball_x[:n], self.ball_y[:n]
+
+        # Left paddle (player1) collision
+        pad_x, pad_y = self.pad1_x[:n], self.pad1_y[:n]
+        hit = ((x <= pad_x + PAD_WIDTH) & (x >= pad_x) &
+               (y + BALL_RADIUS >= pad_y) & (y <= pad_y + PAD_HEIGHT))
+        self.handle_collision(np.flatnonzero(hit), "player1")
+
+        # Right paddle (player2) collision, evaluated after the left bounce like GameEngine
+        pad_x, pad_y = self.pad2_x[:n], self.pad2_y[:n]
+        hit = ((x + BALL_RADIUS >= pad_x) & (x <= pad_x + PAD_WIDTH) &
+               (y + BALL_RADIUS >= pad_y) & (y <= pad_y + PAD_HEIGHT))
+        self.handle_collision(np.flatnonzero(hit), "player2")
+
+    def handle_collision(self, rows, player):
+        """
+        Calculates ball bounce physics for the rows hitting a paddle.
+        """
+
+        if rows.size == 0:
+            return
+        pad_x = (self.pad1_x if player == "player1" else self.pad2_x)[rows]
+        pad_y = (self.pad1_y if player == "player1" else self.pad2_y)[rows]
+
+        # Bounces are sparse, use math so angles stay bit-identical to GameEngine
+        for row, px, py in zip(rows.tolist(), pad_x.tolist(), pad_y.tolist()):
+            impact = (self.ball_y[row] + BALL_RADIUS / 2) - (py + PAD_HEIGHT / 2)
+            bounce_angle = (impact / (PAD_HEIGHT / 2)) * (3.14159 / 3)
+            dir_x = math.cos(bounce_angle) if player == "player1" else -math.cos(bounce_angle)
+            dir_y = math.sin(bounce_angle)
+            magnitude = math.sqrt(dir_x ** 2 + dir_y ** 2)
+            self.dir_x[row] = dir_x / magnitude
+            self.dir_y[row] = dir_y / magnitude
+            self.ball_x[row] = px + PAD_WIDTH + 1 if player == "player1" else px - BALL_RADIUS - 1
+
+        # Increase ball speed with each hit
+        self.count[rows] += 1
+        self.speed[rows] = 4 + self.count[rows] * 0.3
+        self.touched[rows] = True
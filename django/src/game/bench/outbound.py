@@ -0,0 +1,88 @@
+"""
+Slow client benchmark.
+
+Broadcasts a match's frames at the tick rate to a few recipients, one of
+which reads its socket --slow-ms late. With direct sends (the old
+broadcast loop) every tick waits for the slow socket; with the per
+connection OutboundQueue the broadcast only queues, the slow recipient gets
+merged frames and the others keep the tick rate.
+
+    python -m game.bench.outbound [--seconds 3] [--recipients 4] [--slow-ms 60]
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from ..pongFrames import FrameEncoder, DELTA
+from ..pongHelper import BASE_TICK_RATE
+from ..pongOutbound import OutboundQueue
+from ..pongEngine import GameEngine, SWEPT
+from .common import make_game_state, print_table
+
+class Recipient:
+    """
+    Consumer stand-in whose socket takes delay seconds per message.
+    """
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.received = 0
+
+    async def write(self, text_data=None, bytes_data=None):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.received += 1
+
+async def run(queued, seconds, recipient_count, slow_ms, tick_rate):
+    recipients = [Recipient(slow_ms / 1000 if index == 0 else 0) for index in range(recipient_count)]
+    queues = []
+    if queued:
+        for recipient in recipients:
+            queue = OutboundQueue(recipient.write, 64, None)
+            queue.start()
+            queues.append(queue)
+
+    engine = GameEngine(tick_rate, SWEPT)
+    encoder = FrameEncoder(DELTA)
+    game_state = make_game_state(0, match_id="match_0", seed=1)
+    interval = 1 / tick_rate
+    ticks = 0
+    started = next_tick = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        game_state.input1 = game_state.input2 = (ticks // 40) % 3 - 1
+        engine.step(game_state)
+        payload = {"text_data": encoder.message("game_state", game_state)}
+        for index, recipient in enumerate(recipients):
+            if queued:
+                queues[index].put_frame(payload)
+            else:
+                await recipient.write(**payload)
+        ticks += 1
+        next_tick += interval
+        await asyncio.sleep(max(0, next_tick - time.perf_counter()))
+
+    elapsed = time.perf_counter() - started
+    dropped = sum(queue.dropped for queue in queues)
+    for queue in queues:
+        queue.close()
+    return ticks / elapsed, recipients[0].received / elapsed, recipients[-1].received / elapsed, dropped
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--recipients", type=int, default=4)
+    parser.add_argument("--slow-ms", type=float, default=60)
+    parser.add_argument("--tick-rate", type=int, default=BASE_TICK_RATE)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    rows = []
+    for name, queued in (("direct", False), ("queued", True)):
+        tick_rate, slow, fast, dropped = asyncio.run(run(queued, args.seconds, args.recipients, args.slow_ms, args.tick_rate))
+        rows.append((name, f"{tick_rate:.1f}", f"{slow:.1f}", f"{fast:.1f}", dropped))
+    print(f"{args.tick_rate} Hz target, {args.recipients} recipients, one reading {args.slow_ms:g} ms late")
+    print_table(("sends", "ticks/s", "slow frames/s", "others frames/s", "frames merged"), rows)
+
+if __name__ == "__main__":
+    main()
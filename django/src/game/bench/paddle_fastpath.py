@@ -0,0 +1,176 @@
+"""
+Paddle input fast path benchmark.
+
+Fills the lobby with --matches running matches between --users real
+users, then posts paddle inputs as ASGI requests, with a Bearer access
+token, two ways: "django", the Django application with its full
+middleware chain (JWT user lookup, last_seen write, sessions, CSRF,
+Prometheus) and the DRF move_paddle view, as served before; "fastpath",
+PaddleInputApp answering in front of it. "batch" posts --batch inputs
+with sequence numbers per request to the fast path. Requests are sent
+one after the other, --concurrency at a time. Reports the latency per
+request and the requests (and inputs) per second.
+
+Postgres isn't needed: the users live in a throwaway SQLite file.
+
+    python -m game.bench.paddle_fastpath [--matches 1000] [--requests 2000] [--concurrency 1 16]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+from .common import make_game_state, make_player, print_table
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+def setup_django(path):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "transcendence.settings")
+    from django.conf import settings
+    settings.DATABASES["default"] = {"ENGINE": "django.db.backends.sqlite3", "NAME": path}
+    # Tables of the users app built from the models, its migrations lag behind them
+    settings.MIGRATION_MODULES = {"users": None}
+    import django
+    django.setup()
+    logging.disable(logging.WARNING)
+    from django.core.management import call_command
+    call_command("migrate", run_syncdb=True, verbosity=0)
+
+def request(app, token, body):
+    """
+    Coroutine posting body to the paddle endpoint, returning (status, response).
+    """
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "POST", "scheme": "https", "path": "/api/pong/paddle/", "raw_path": b"/api/pong/paddle/",
+        "query_string": b"", "root_path": "", "server": ("testserver", 443), "client": ("127.0.0.1", 50000),
+        "headers": [
+            (b"host", b"testserver"),
+            (b"authorization", f"Bearer {token}".encode()),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    response = {}
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # Wait like a client that keeps the connection open
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        else:
+            response["body"] = response.get("body", b"") + message.get("body", b"")
+
+    async def run():
+        await app(scope, receive, send)
+        return response["status"], response.get("body", b"")
+
+    return run()
+
+async def measure(app, calls, concurrency):
+    """
+    Latencies in ms of the calls, concurrency of them in flight at a time.
+    """
+
+    latencies = []
+    pending = iter(calls)
+
+    async def worker():
+        for token, body in pending:
+            started = time.perf_counter()
+            status, content = await request(app, token, body)
+            latencies.append((time.perf_counter() - started) * 1000)
+            assert status == 200, (status, content)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - started
+
+async def run(args):
+    from django.contrib.auth import get_user_model
+    from django.core.asgi import get_asgi_application
+    from rest_framework_simplejwt.tokens import AccessToken
+    from asgiref.sync import sync_to_async
+    from ..pongAPI.api_inputs import PaddleInputApp
+    from ..pongLobby import LobbyManager
+    from ..pongMatchIndex import ActiveMatches
+
+    User = get_user_model()
+    users = await sync_to_async(lambda: [User.objects.create(username=f"bench_{index}", email=f"bench_{index}@pong.test") for index in range(args.users)])()
+    lobby_manager = LobbyManager()
+    lobby_manager.active_matches = ActiveMatches()
+    for index in range(args.matches):
+        players = [make_player(f"bench_{index}_a"), make_player(f"bench_{index}_b")]
+        # The real users play the first matches
+        for number, player in enumerate(players):
+            if 2 * index + number < len(users):
+                player.user = users[2 * index + number]
+        lobby_manager.active_matches[f"bench_{index}"] = {"players": players, "game_state": make_game_state(index), "created_at": None}
+    tokens = [str(AccessToken.for_user(user)) for user in users]
+
+    django_app = get_asgi_application()
+    fastpath = PaddleInputApp(django_app)
+    fastpath.enabled = True
+    rng = random.Random(args.matches)
+    seqs = {token: 0 for token in tokens}
+
+    def single():
+        return [(rng.choice(tokens), json.dumps({"input": rng.choice((-1, 0, 1))}).encode()) for _ in range(args.requests)]
+
+    def batch():
+        calls = []
+        for _ in range(args.requests):
+            token = rng.choice(tokens)
+            inputs = []
+            for _ in range(args.batch):
+                seqs[token] += 1
+                inputs.append({"input": rng.choice((-1, 0, 1)), "seq": seqs[token]})
+            calls.append((token, json.dumps({"inputs": inputs}).encode()))
+        return calls
+
+    rows = []
+    for concurrency in args.concurrency:
+        for name, app, calls, inputs in (
+            ("django", django_app, single(), 1),
+            ("fastpath", fastpath, single(), 1),
+            ("batch", fastpath, batch(), args.batch),
+        ):
+            # Warm up the token cache, the DB connection and the thread pool
+            await measure(app, calls[:50], 1)
+            latencies, seconds = await measure(app, calls, concurrency)
+            rows.append((
+                concurrency, name,
+                f"{sum(latencies) / len(latencies):.3f}", f"{percentile(latencies, 0.5):.3f}", f"{percentile(latencies, 0.99):.3f}",
+                f"{len(latencies) / seconds:,.0f}", f"{len(latencies) * inputs / seconds:,.0f}",
+            ))
+    lobby_manager.active_matches = ActiveMatches()
+    print(f"{args.matches} matches, {args.users} users, {args.requests} requests, batches of {args.batch}")
+    print_table(("concurrency", "path", "mean ms", "p50 ms", "p99 ms", "req/s", "inputs/s"), rows)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16])
+    parser.add_argument("--batch", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(os.path.join(directory, "bench.sqlite3"))
+        asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
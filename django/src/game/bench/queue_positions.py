@@ -0,0 +1,95 @@
+"""
+Queue position benchmark.
+
+Queues --players fake players, then runs --passes matchmaking passes in
+which --churn of the queue leaves (matched or cancelled) and as many
+newcomers join. After each pass the positions are updated two ways:
+every player walking the queue with enumerate to find their own rank, as
+each periodic_matchmaking task did, and MatchmakingQueue.moved(), which
+only looks behind the first departure and reports each changed position
+once. Reports the time per pass and the updates each way sends.
+
+    python -m game.bench.queue_positions [--players 1000 5000 10000] [--passes 20] [--churn 0.02]
+"""
+
+import argparse
+import random
+import time
+from ..pongQueue import MatchmakingQueue
+from .common import make_player, print_table
+
+def enumerate_positions(queue):
+    """
+    Every player looks for their own rank, as the per-player tasks did.
+    """
+
+    positions = {}
+    for player, _, _ in queue:
+        for position, (other, _, _) in enumerate(queue, 1):
+            if other is player:
+                positions[player.user.id] = position
+                break
+    return positions
+
+def run(count, passes, churn, rng, old_limit):
+    queue = MatchmakingQueue()
+    joined = 0
+
+    def join():
+        nonlocal joined
+        player = make_player(f"bench_{joined}", elo=int(rng.gauss(1000, 200)))
+        queue.add(player, joined, player.user.elo)
+        joined += 1
+
+    for _ in range(count):
+        join()
+
+    old_seconds = new_seconds = 0.0
+    old_sent = new_sent = 0
+    last = {}
+    for _ in range(passes):
+        leaving = rng.sample([player for player, _, _ in queue], int(count * churn))
+        for player in leaving:
+            queue.remove(player)
+        for _ in leaving:
+            join()
+
+        if count <= old_limit:
+            started = time.perf_counter()
+            positions = enumerate_positions(queue)
+            old_seconds += time.perf_counter() - started
+            old_sent += len(positions)
+            last = positions
+
+        started = time.perf_counter()
+        moved = queue.moved()
+        new_seconds += time.perf_counter() - started
+        new_sent += len(moved)
+
+    # Both agree on the final positions
+    if last:
+        assert all(queue.position(user_id) == position for user_id, position in last.items())
+    return old_seconds / passes, old_sent / passes, new_seconds / passes, new_sent / passes
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, nargs="+", default=[1000, 5000, 10000])
+    parser.add_argument("--passes", type=int, default=20)
+    parser.add_argument("--churn", type=float, default=0.02)
+    parser.add_argument("--old-limit", type=int, default=5000, help="skip the enumerate walk above this queue size")
+    args = parser.parse_args()
+
+    rows = []
+    for count in args.players:
+        old_s, old_sent, new_s, new_sent = run(count, args.passes, args.churn, random.Random(count), args.old_limit)
+        rows.append((
+            count,
+            f"{old_s * 1000:.1f}" if count <= args.old_limit else "-",
+            f"{old_sent:.0f}" if count <= args.old_limit else "-",
+            f"{new_s * 1000:.2f}", f"{new_sent:.0f}",
+        ))
+    print(f"{args.churn:.0%} of the queue replaced per pass, {args.passes} passes")
+    print_table(("players", "enumerate ms/pass", "sent/pass", "moved() ms/pass", "sent/pass"), rows)
+
+if __name__ == "__main__":
+    main()
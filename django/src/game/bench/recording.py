@@ -0,0 +1,97 @@
+"""
+Match recording benchmark.
+
+Plays scripted matches through a Recorder as the scheduler does, then
+reports the file size per match next to the JSON frames the same match
+would have sent, the cost of record() on the tick, and whether replaying
+the file through the GameEngine lands on the bit-identical final state.
+
+    python -m game.bench.recording [--matches 20] [--keyframe-interval 250]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from random import Random
+from ..pongEngine import GameEngine, SWEPT
+from ..pongHelper import BASE_TICK_RATE
+from ..pongLockstep import state_digest
+from ..pongRecorder import Recorder, ReplayCursor, load_recording, recording_name, replay_recording
+from .common import make_game_state, print_table, scripted_input
+
+def play(recorder, engine, index, max_ticks):
+    """
+    Returns (final state, ticks, JSON frame bytes, ns spent in record()).
+    """
+
+    rng = Random(index)
+    game_state = make_game_state(index, match_id=f"match_{index}", seed=index)
+    recording = recorder.start(game_state)
+    json_bytes = record_ns = 0
+    winner = None
+    for _ in range(max_ticks):
+        game_state.input1 = scripted_input(rng, game_state.pad1_y, game_state.ball_y)
+        game_state.input2 = scripted_input(rng, game_state.pad2_y, game_state.ball_y)
+        started = time.perf_counter_ns()
+        recording.record(game_state)
+        record_ns += time.perf_counter_ns() - started
+        game_over, winner = engine.step(game_state)
+        json_bytes += len(json.dumps({"type": "game_state", "game_state": game_state.to_dict()}))
+        if game_over:
+            break
+    recording.finish(game_state, winner)
+    return game_state, game_state.tick, json_bytes, record_ns
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", type=int, default=20)
+    parser.add_argument("--keyframe-interval", type=int, default=250)
+    parser.add_argument("--max-ticks", type=int, default=30000)
+    args = parser.parse_args()
+
+    engine = GameEngine(BASE_TICK_RATE, SWEPT)
+    with tempfile.TemporaryDirectory() as directory:
+        recorder = Recorder(directory, args.keyframe_interval, BASE_TICK_RATE, SWEPT, False)
+        played = [play(recorder, engine, index, args.max_ticks) for index in range(args.matches)]
+
+        # Let the writer thread drain its queue, each chunk is closed before the next
+        recorder._writer.write(os.path.join(directory, "done"), b"")
+        while not os.path.exists(os.path.join(directory, "done")):
+            time.sleep(0.01)
+
+        rows, identical = [], 0
+        for index, (game_state, ticks, json_bytes, record_ns) in enumerate(played):
+            path = os.path.join(directory, recording_name(game_state.match_id))
+            recording = load_recording(path)
+            started = time.perf_counter()
+            replayed = replay_recording(recording)
+            replay_ms = (time.perf_counter() - started) * 1000
+            identical += state_digest(replayed) == state_digest(game_state)
+
+            # Seek to the middle, then play to the end
+            cursor = ReplayCursor(recording)
+            started = time.perf_counter()
+            cursor.seek(ticks // 2)
+            seek_ms = (time.perf_counter() - started) * 1000
+            while cursor.advance(100):
+                pass
+            identical_seek = state_digest(cursor.game_state) == state_digest(game_state)
+
+            if index < 5:
+                rows.append((
+                    game_state.match_id, ticks, f"{os.path.getsize(path):,}", f"{json_bytes:,}",
+                    f"{record_ns / ticks:,.0f}", f"{replay_ms:,.1f}", f"{seek_ms:,.1f}", "yes" if identical_seek else "NO",
+                ))
+
+        sizes = [os.path.getsize(os.path.join(directory, recording_name(state.match_id))) for state, *_ in played]
+        json_total = sum(json_bytes for _, _, json_bytes, _ in played)
+
+    print(f"{args.matches} matches at {BASE_TICK_RATE} Hz, keyframe every {args.keyframe_interval} ticks")
+    print_table(("match", "ticks", "file B", "JSON frames B", "record ns/tick", "replay ms", "seek ms", "seek exact"), rows)
+    print(f"average file: {sum(sizes) / len(sizes) / 1024:,.1f} KiB, JSON frames: {json_total / len(sizes) / 1024:,.1f} KiB")
+    print(f"replays bit-identical: {identical}/{args.matches}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Spectator fan-out benchmark.
+
+Publishes a running match to a growing number of viewers, each behind its
+own OutboundQueue, and reports the time the match loop spends per frame in
+SpectatorHub.publish(). For comparison, "per viewer" serializes the frame
+and awaits the send once per viewer, as the player broadcasts used to.
+
+    python -m game.bench.spectators [--viewers 10 100 1000] [--frames 500]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from ..pongEngine import GameEngine, SWEPT
+from ..pongOutbound import OutboundQueue
+from ..pongSpectators import SpectatorHub, match_channel
+from .common import make_game_state, print_table
+
+class Viewer:
+    """
+    SpectatorConsumer stand-in, with an outbound queue and no socket.
+    """
+
+    def __init__(self):
+        self.spectating = None
+        self.outbound = OutboundQueue(self.write, 64, None)
+        self.outbound.start()
+
+    async def write(self, text_data=None, bytes_data=None):
+        pass
+
+async def run(viewer_count, frames):
+    hub = SpectatorHub()
+    hub.every = 1
+    engine = GameEngine(tick_rate=50, collision_mode=SWEPT)
+    game_state = make_game_state(0, seed=1)
+    hub.open_feed("bench", game_state)
+    viewers = [Viewer() for _ in range(viewer_count)]
+    for viewer in viewers:
+        hub.watch(viewer, match_channel("bench"))
+
+    hub_ns = direct_ns = 0
+    for tick in range(frames):
+        game_state.input1 = game_state.input2 = (tick // 40) % 3 - 1
+        engine.step(game_state)
+
+        started = time.perf_counter_ns()
+        hub.publish("bench")
+        hub_ns += time.perf_counter_ns() - started
+
+        started = time.perf_counter_ns()
+        for viewer in viewers:
+            await viewer.write(text_data=json.dumps({"type": "game_state", "game_state": game_state.to_dict()}))
+        direct_ns += time.perf_counter_ns() - started
+
+        # Let the writer tasks drain their queues
+        await asyncio.sleep(0)
+
+    for viewer in viewers:
+        hub.unwatch(viewer)
+        viewer.outbound.close()
+    hub.close_feed("bench")
+    return hub_ns / frames / 1000, direct_ns / frames / 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--viewers", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--frames", type=int, default=500)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    rows = []
+    for count in args.viewers:
+        hub_us, direct_us = asyncio.run(run(count, args.frames))
+        rows.append((count, f"{hub_us:,.1f}", f"{direct_us:,.1f}", f"{direct_us / hub_us:.1f}x"))
+    print(f"Match loop time per frame, {args.frames} frames")
+    print_table(("viewers", "hub us/frame", "per viewer us/frame", "speedup"), rows)
+
+if __name__ == "__main__":
+    main()
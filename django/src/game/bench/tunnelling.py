@@ -0,0 +1,72 @@
+"""
+Tunnelling check for the ball/paddle collision modes.
+
+Throws the ball at a paddle that covers its path, at increasing rally counts
+(ballSpeed = 4 + count * 0.3) and tick rates, and counts how often it goes
+through the paddle or leaves the field through a wall.
+
+    python -m game.bench.tunnelling [--trials 500]
+"""
+
+import argparse
+import math
+import random
+from ..pongEngine import GameEngine, DISCRETE, SWEPT
+from ..pongHelper import CANVAS_HEIGHT, PAD_HEIGHT, PAD_WIDTH, BALL_RADIUS
+from .common import make_game_state, print_table
+
+def throw(engine, rng, count):
+    """
+    Returns (tunnelled, left_field) for one ball thrown at player1.
+    """
+
+    game_state = make_game_state(0)
+    game_state.count = count
+    game_state.ball_speed = 4 + count * 0.3
+    game_state.ball_touched = True
+    game_state.ball_x = rng.uniform(200, 700)
+    game_state.ball_y = rng.uniform(BALL_RADIUS, CANVAS_HEIGHT - 2 * BALL_RADIUS)
+    angle = rng.uniform(-math.pi / 3, math.pi / 3)
+    game_state.dir_x, game_state.dir_y = -math.cos(angle), math.sin(angle)
+
+    # Park the paddle where the path (unfolded over wall bounces) meets its face,
+    # so any goal means the ball went through it
+    span = CANVAS_HEIGHT - BALL_RADIUS
+    travel = game_state.ball_x - (game_state.pad1_x + PAD_WIDTH)
+    unfolded = (game_state.ball_y + game_state.dir_y / -game_state.dir_x * travel) % (2 * span)
+    impact_y = unfolded if unfolded <= span else 2 * span - unfolded
+    game_state.pad1_y = max(0, min(impact_y - PAD_HEIGHT / 2, CANVAS_HEIGHT - PAD_HEIGHT))
+
+    left_field = False
+    for _ in range(10000):
+        engine.update_game_state(game_state)
+        if not -1e-9 <= game_state.ball_y <= CANVAS_HEIGHT - BALL_RADIUS + 1e-9:
+            left_field = True
+        if game_state.dir_x > 0:
+            return False, left_field
+        if game_state.ball_x <= 0:
+            return True, left_field
+    return False, left_field
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trials", type=int, default=500)
+    parser.add_argument("--rates", type=int, nargs="+", default=[20, 30, 50, 60])
+    parser.add_argument("--counts", type=int, nargs="+", default=[0, 20, 50, 100, 200])
+    args = parser.parse_args()
+
+    rows = []
+    for rate in args.rates:
+        for count in args.counts:
+            row = [rate, count, f"{(4 + count * 0.3) * 50 / rate:.1f}"]
+            for mode in (DISCRETE, SWEPT):
+                engine, rng = GameEngine(rate, mode), random.Random(count * 1000 + rate)
+                results = [throw(engine, rng, count) for _ in range(args.trials)]
+                row.append(f"{sum(t for t, _ in results) / args.trials:.1%}")
+                row.append(f"{sum(w for _, w in results) / args.trials:.1%}")
+            rows.append(row)
+    print(f"Paddle width {PAD_WIDTH}px, {args.trials} throws per cell")
+    print_table(("Hz", "rally", "px/tick", "discrete through", "discrete out", "swept through", "swept out"), rows)
+
+if __name__ == "__main__":
+    main()
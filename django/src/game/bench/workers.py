@@ -0,0 +1,138 @@
+"""
+Worker pool scaling benchmark.
+
+Finds how many concurrent matches can run at the server tick rate, first on
+the ASGI event loop (TickScheduler) then with 1 to N worker processes
+(WorkerPool). The load is ramped until a probe drops ticks: a probe holds
+the given number of matches for --seconds, paddle inputs change randomly on
+the ASGI side and every finished match is replaced by a new one.
+
+    python -m game.bench.workers [--workers 1 2 4] [--seconds 3]
+
+Each worker needs a core of its own, plus one for the ASGI process.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import time
+from ..pongEngine import SWEPT
+from ..pongHelper import BASE_TICK_RATE
+from ..pongScheduler import TickScheduler, ScheduledMatch
+from ..pongWorkers import WorkerPool
+from .common import make_game_state, print_table
+
+class Load:
+    """
+    Keeps a fixed number of matches running on a scheduler or a pool.
+    """
+
+    def __init__(self, target, count):
+        self.target = target
+        self.rng = random.Random(count)
+        self.frames = 0
+        self.created = 0
+        self.ended = 0
+        for _ in range(count):
+            self.add()
+
+    def add(self):
+        self.created += 1
+        game_state = make_game_state(self.created, seed=self.created)
+        match_id = self.created
+
+        async def on_frame():
+            self.frames += 1
+            if self.rng.random() < 0.05:
+                game_state.set_input(self.rng.choice(("player1", "player2")), self.rng.choice((-1, 0, 1)))
+
+        async def on_game_over(winner_username):
+            self.ended += 1
+            self.add()
+
+        async def on_abort():
+            pass
+
+        self.target.add_match(ScheduledMatch(match_id, game_state, lambda: True, on_frame, on_game_over, on_abort))
+
+async def probe(workers, count, seconds):
+    """
+    Runs count matches for the given time, returns (ok, frame_ratio, missed, cpu_share).
+    """
+
+    loop = asyncio.get_running_loop()
+    background = set()
+
+    def spawn(coro):
+        task = loop.create_task(coro)
+        background.add(task)
+        task.add_done_callback(background.discard)
+
+    if workers:
+        target = WorkerPool(workers, BASE_TICK_RATE, SWEPT, False, 1, spawn)
+        target.start()
+        # Let the workers boot before loading them
+        await asyncio.sleep(1)
+    else:
+        TickScheduler._instance = None
+        target = TickScheduler()
+        target.spawn = spawn
+
+    load = Load(target, count)
+    await asyncio.sleep(0.5)
+    frames, cpu, started = load.frames, time.process_time(), time.perf_counter()
+    missed_before = sum(w["missed_ticks"] for w in target.get_stats()) if workers else target.missed_ticks
+    await asyncio.sleep(seconds)
+    elapsed = time.perf_counter() - started
+    ratio = (load.frames - frames) / (count * BASE_TICK_RATE * elapsed)
+    cpu_share = (time.process_time() - cpu) / elapsed
+    missed = (sum(w["missed_ticks"] for w in target.get_stats()) if workers else target.missed_ticks) - missed_before
+
+    if workers:
+        target.stop()
+    else:
+        target.matches.clear()
+        await asyncio.sleep(2 * target.interval)
+    for task in list(background):
+        task.cancel()
+    return ratio >= 0.95 and missed == 0, ratio, missed, cpu_share
+
+async def capacity(workers, args):
+    """
+    Ramps the match count until a probe fails, returns the last passing probe.
+    """
+
+    best = (0, 0.0, 0, 0.0)
+    count = args.start * max(workers, 1)
+    while count <= args.max:
+        ok, ratio, missed, cpu_share = await probe(workers, count, args.seconds)
+        print(f"  {workers or 'in-process'} x {count} matches: frames {ratio:.0%}, missed {missed}, ASGI CPU {cpu_share:.0%}")
+        if not ok:
+            break
+        best = (count, ratio, missed, cpu_share)
+        count = int(count * args.growth)
+    return best
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, cores}))
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--start", type=int, default=100, help="first probe, per worker")
+    parser.add_argument("--growth", type=float, default=1.5)
+    parser.add_argument("--max", type=int, default=100000)
+    args = parser.parse_args()
+
+    # Overloaded probes are expected, keep the per-tick warnings out of the report
+    logging.getLogger('pong.scheduler').setLevel(logging.ERROR)
+    print(f"{cores} cores, {BASE_TICK_RATE} Hz")
+    rows = []
+    for workers in [0, *args.workers]:
+        count, ratio, _, cpu_share = asyncio.run(capacity(workers, args))
+        rows.append((workers or "in-process", count, f"{ratio:.0%}", f"{cpu_share:.0%}"))
+    print_table(("workers", "max matches", "frames delivered", "ASGI CPU"), rows)
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,11 @@ import traceback
 from datetime import datetime
 from channels.db import database_sync_to_async
 from asgiref.sync import sync_to_async
+from ..pongSpectators import SpectatorHub
+from ..pongBots import is_bot
+from ..pongHelper import game_setting
+from ..pongFrames import JSON_FULL
+from .api_messages import MessageRing, message_type, parse
 
 # DEBUG
 logger = logging.getLogger('pong.api')
@@ -16,41 +21,52 @@ class APIConsumer:
         self.match_id = None
         self.player_number = None
         self.scope = {"user": user} if user else {}
-        self.messages = []
+        # LAST FRAME + EVENTS, BOUNDED
+        self.messages = MessageRing(game_setting('PONG_API_MESSAGE_BUFFER', 64))
+        # WHOLE STATE IN EVERY FRAME, THE RING ONLY KEEPS THE LAST ONE
+        self.frame_format = JSON_FULL
         self.is_connected = True
         self._is_api = True
+        # MatchTicket of a REST matchmaking request
+        self.ticket = None
         self.channel_name = f"api_consumer_{user.username}_{datetime.now().timestamp()}" if user else "api_consumer_unknown"
         logger.info(f"APIConsumer créé pour {user.username if user else 'utilisateur inconnu'}")
     
     async def send(self, text_data):
         try:
-            if isinstance(text_data, str):
-                data = json.loads(text_data)
-            else:
-                data = text_data
-            
-            self.messages.append(data)
-            logger.debug(f"Message stocké pour {self.user.username if self.user else 'inconnu'}: {data.get('type', 'unknown')}")
+            # STORED AS SENT, ONLY CONTROL MESSAGES PARSED
+            kind = message_type(text_data)
+            self.messages.append(text_data, kind)
+            logger.debug(f"Message stocké pour {self.user.username if self.user else 'inconnu'}: {kind or 'unknown'}")
             
             # MATCHMAKING QUEUE
-            if data.get('type') == 'match_created':
+            if kind == 'match_created':
+                data = parse(text_data)
                 self.match_id = data.get('match_id')
                 self.player_number = data.get('player_number')
                 logger.info(f"Match créé pour API user {self.user.username}: match_id={self.match_id}, player_number={self.player_number}")
+                if self.ticket is not None:
+                    self.ticket.resolve(data)
         except Exception as e:
             logger.error(f"Erreur dans APIConsumer.send: {str(e)}")
             traceback.print_exc()
-    
-    def get_last_message(self):
-        if self.messages:
-            return self.messages[-1]
+
+    # GAME FRAMES, NO SOCKET TO BACK UP
+    async def send_frame(self, text_data=None, bytes_data=None):
+        await self.send(text_data)
+
+    def get_last_message(self, kind=None):
+        entry = self.messages.last(kind)
+        if entry:
+            return parse(entry[2])
         return None
     
-    def get_messages(self):
-        return self.messages
+    # MESSAGES AFTER A CURSOR, WITH THE CURSOR TO READ FROM NEXT
+    def get_messages(self, after=0):
+        return self.messages.cursor, [parse(raw) for _, _, raw in self.messages.read(after)]
     
     def clear_messages(self):
-        self.messages = []
+        self.messages.clear()
     
     async def close(self):
         self.is_connected = False
@@ -72,7 +88,6 @@ class APIMatchConsumer(APIConsumer):
     def __init__(self, user=None):
         super().__init__(user)
         logger.info(f"APIMatchConsumer créé pour {user.username if user else 'inconnu'}")
-        self.match_task = None
         
     # MATCHCONSUMER - MATCHMAKING
     async def authenticate(self, token):
@@ -83,52 +98,72 @@ class APIMatchConsumer(APIConsumer):
         
         # CREATE LOBBY
         from ..pongLobby import LobbyManager
+        from ..pongScheduler import TickScheduler, ScheduledMatch
+        from ..pongFrames import FrameEncoder
         lobby_manager = LobbyManager()
         
-        try:
-            # IS MATCH OK
-            match_data = lobby_manager.active_matches.get(match_id)
-            if not match_data:
-                logger.error(f"APIConsumer.run_game_loop: match {match_id} introuvable")
-                return
-                
-            # CREATE GAME
-            from ..pongEngine import GameEngine
-            game_engine = GameEngine()
-            
-            # GET PLAYER
-            players = match_data["players"]
-            game_state = match_data["game_state"]
-            
-            logger.info(f"APIMatchConsumer: démarrage game loop pour match {match_id} avec joueurs: {[p.user.username for p in players if hasattr(p, 'user')]}")
+        # IS MATCH OK
+        match_data = lobby_manager.active_matches.get(match_id)
+        if not match_data:
+            logger.error(f"APIConsumer.run_game_loop: match {match_id} introuvable")
+            return
             
-            # MATCHCONSUMMER COPY
-            while True:
-                await asyncio.sleep(0.02)  # 50 FPS
-                all_connected = all(hasattr(player, 'is_connected') and player.is_connected for player in players)
-                if not all_connected:
-                    logger.info(f"Match {match_id} terminé: un joueur s'est déconnecté")
-                    break
-                game_engine.update_game_state(game_state)
-                game_over, winner_username = await game_engine.check_goals(game_state)
-                if game_over:
-                    logger.info(f"Match {match_id} terminé: {winner_username} a gagné")
-                    await self.handle_match_result(lobby_manager, match_id, winner_username)
-                    break
-                for player in players:
-                    if hasattr(player, 'send'):
-                        await player.send(json.dumps({
-                            "type": "game_state",
-                            "game_state": game_state
-                        }))
+        # GET PLAYER
+        players = match_data["players"]
+        game_state = match_data["game_state"]
         
-        except asyncio.CancelledError:
-            logger.info(f"Game loop annulée pour match {match_id}")
-        except Exception as e:
-            logger.error(f"Erreur dans game loop pour match {match_id}: {e}")
-            traceback.print_exc()
+        logger.info(f"APIMatchConsumer: démarrage game loop pour match {match_id} avec joueurs: {[p.user.username for p in players if hasattr(p, 'user')]}")
+        
+        # SHARED GAME LOOP
+        scheduler = TickScheduler()
+        encoder = FrameEncoder(snapshots=scheduler.sends_snapshots)
+        SpectatorHub().open_feed(match_id, game_state)
+        scheduler.add_match(ScheduledMatch(
+            match_id,
+            game_state,
+            is_active=lambda: all(self.is_player_connected(player, match_id) for player in players),
+            on_frame=lambda: self.broadcast_game_state(match_id, players, game_state, encoder),
+            on_game_over=lambda winner_username: self.handle_match_result(lobby_manager, match_id, winner_username),
+            on_abort=lambda: self.handle_match_abort(match_id),
+            on_crash=lambda: self.handle_match_crash(lobby_manager, match_id, players)
+        ))
+
+    # API PLAYERS CLOSE, WEB PLAYERS LEAVE THE MATCH
+    @staticmethod
+    def is_player_connected(player, match_id):
+        if hasattr(player, 'is_connected'):
+            return player.is_connected
+        return getattr(player, 'match_id', None) == match_id
+
+    async def broadcast_game_state(self, match_id, players, game_state, encoder):
+        for player in players:
+            if hasattr(player, 'send'):
+                await player.send_frame(**encoder.payload(player, "game_state", game_state))
+        SpectatorHub().publish(match_id)
+
+    async def handle_match_abort(self, match_id):
+        logger.info(f"Match {match_id} terminé: un joueur s'est déconnecté")
+        SpectatorHub().close_feed(match_id, {"type": "match_aborted"})
+    
+    # SERVER LOST THE MATCH, NO WINNER, NO ELO
+    async def handle_match_crash(self, lobby_manager, match_id, players):
+        logger.error(f"Match {match_id} interrompu par le serveur, aucun résultat")
+        SpectatorHub().close_feed(match_id, {"type": "match_aborted"})
+        if match_id in lobby_manager.active_matches:
+            del lobby_manager.active_matches[match_id]
+        for player in players:
+            try:
+                await player.send(json.dumps({
+                    "type": "match_aborted",
+                    "message": "Partie interrompue par le serveur, aucun résultat enregistré"
+                }))
+            except Exception as e:
+                logger.error(f"Erreur lors de l'envoi de l'interruption à {player.user.username if hasattr(player, 'user') else 'inconnu'}: {e}")
+            player.match_id = None
+            player.player_number = None
     
     async def handle_match_result(self, lobby_manager, match_id, winner_username):
+        SpectatorHub().close_feed(match_id, {"type": "game_over", "winner": winner_username})
         match_data = lobby_manager.active_matches.get(match_id)
         if not match_data:
             return
@@ -138,7 +173,7 @@ class APIMatchConsumer(APIConsumer):
         if not winner:
             return
         loser = next((player for player in players if player != winner), None)
-        if winner and loser and hasattr(winner, 'user') and hasattr(loser, 'user'):
+        if winner and loser and hasattr(winner, 'user') and hasattr(loser, 'user') and not is_bot(winner) and not is_bot(loser):
             await lobby_manager.update_elo_ratings(winner.user, loser.user)
         for player in players:
             try:
@@ -0,0 +1,229 @@
+"""
+╔═══════════════════════════════════════════════════╗
+║                 API Inputs                        ║
+╠═══════════════════════════════════════════════════╣
+║ POST /api/pong/paddle/ answered before Django     ║
+║                                                   ║
+║ • No middleware, no thread hop, no DRF            ║
+║ • Token and user checked, then cached 30s at most ║
+║ • CORS headers as CorsMiddleware, preflight to it ║
+║ • Inputs buffered like the websocket ones         ║
+║ • One input, or a batch with sequence numbers     ║
+║ • Anything else goes to the Django application    ║
+╚═══════════════════════════════════════════════════╝
+"""
+
+import json
+import time
+from channels.db import database_sync_to_async
+from django.conf import settings
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+from ..pongHelper import game_setting
+from ..pongLobby import LobbyManager
+from ..pongState import MAX_PENDING_INPUTS
+
+PADDLE_PATH = "/api/pong/paddle/"
+# Largest request body read
+MAX_BODY = 8192
+# Inputs taken in one request, no more than a player can have buffered
+MAX_BATCH = MAX_PENDING_INPUTS
+# Verified tokens remembered, and seconds before their user is checked again
+TOKEN_CACHE_SIZE = 4096
+TOKEN_RECHECK = 30
+
+PADDLE_VALUES = {-1: -1, 0: 0, 1: 1, "-1": -1, "0": 0, "1": 1}
+
+class InputError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+@database_sync_to_async
+def active_user_exists(user_id):
+    from users.models import customUser
+    return customUser.objects.filter(id=user_id, is_active=True).exists()
+
+class TokenCache:
+    """
+    user id of the access tokens already verified. A token is checked
+    (signature, expiry, user still there and active) the first time it is
+    seen, then trusted until it expires or for TOKEN_RECHECK seconds,
+    whichever comes first.
+    """
+
+    def __init__(self, size=TOKEN_CACHE_SIZE, recheck=TOKEN_RECHECK):
+        self.size = size
+        self.recheck = recheck
+        self.tokens = {}
+
+    async def user_id(self, raw):
+        entry = self.tokens.get(raw)
+        now = time.time()
+        if entry is not None:
+            if entry[1] > now:
+                return entry[0]
+            del self.tokens[raw]
+
+        try:
+            token = AccessToken(raw)
+        except TokenError:
+            return None
+        # Stored as a string by simplejwt, the match index has the primary keys
+        try:
+            user_id = int(token.payload.get('user_id'))
+        except (TypeError, ValueError):
+            return None
+        if not await active_user_exists(user_id):
+            return None
+        if len(self.tokens) >= self.size:
+            # Oldest first, dicts keep insertion order
+            del self.tokens[next(iter(self.tokens))]
+        self.tokens[raw] = (user_id, min(token.payload.get('exp', now), now + self.recheck))
+        return user_id
+
+def paddle_value(value):
+    """
+    -1, 0 or 1, from a number or a string as the serializer accepted.
+    """
+
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        return None
+    return PADDLE_VALUES.get(value.strip() if isinstance(value, str) else value)
+
+def parse_inputs(body):
+    """
+    [(input, seq)] of {"input": 1} or {"inputs": [{"input": 1, "seq": 3}, ...]}.
+    """
+
+    try:
+        data = json.loads(body)
+    except ValueError:
+        raise InputError(400, "JSON invalide")
+    if not isinstance(data, dict):
+        raise InputError(400, "JSON invalide")
+
+    entries = data["inputs"] if "inputs" in data else [data]
+    if not isinstance(entries, list) or not entries:
+        raise InputError(400, "inputs doit être une liste non vide")
+    if len(entries) > MAX_BATCH:
+        raise InputError(400, f"{MAX_BATCH} entrées maximum par requête")
+
+    inputs = []
+    for entry in entries:
+        value = paddle_value(entry.get("input")) if isinstance(entry, dict) else None
+        if value is None:
+            raise InputError(400, "input doit valoir -1, 0 ou 1")
+        seq = entry.get("seq")
+        if seq is not None and type(seq) is not int:
+            raise InputError(400, "seq doit être un entier")
+        inputs.append((value, seq))
+    return inputs
+
+def header(scope, name):
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+def bearer_token(scope):
+    scheme, _, token = (header(scope, b"authorization") or "").partition(" ")
+    return token.strip() if scheme == "Bearer" else None
+
+def cors_headers(scope):
+    """
+    Headers CorsMiddleware would add to the response, for the origins it allows.
+    """
+
+    origin = header(scope, b"origin")
+    if origin is None:
+        return []
+    if not getattr(settings, "CORS_ALLOW_ALL_ORIGINS", False) and origin not in getattr(settings, "CORS_ALLOWED_ORIGINS", ()):
+        return []
+    headers = [(b"access-control-allow-origin", origin.encode("latin-1")), (b"vary", b"origin")]
+    if getattr(settings, "CORS_ALLOW_CREDENTIALS", False):
+        headers.append((b"access-control-allow-credentials", b"true"))
+    return headers
+
+async def read_body(receive):
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        body += message.get("body", b"")
+        if len(body) > MAX_BODY:
+            raise InputError(413, "Requête trop volumineuse")
+        if not message.get("more_body", False):
+            return bytes(body)
+
+async def respond(send, status, data, headers=()):
+    body = json.dumps(data).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            *headers,
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+class PaddleInputApp:
+    """
+    ASGI application in front of Django's: answers the paddle inputs
+    itself and hands every other request over, CORS preflights and other
+    methods included. Same as move_paddle, the token comes from the
+    Authorization header, not the cookie, so there is no CSRF to check.
+    Disabled with PONG_PADDLE_FASTPATH=False.
+    """
+
+    def __init__(self, application):
+        self.application = application
+        self.enabled = game_setting('PONG_PADDLE_FASTPATH', True)
+        self.tokens = TokenCache()
+        self.lobby_manager = LobbyManager()
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http" or scope["path"] != PADDLE_PATH or scope["method"] != "POST":
+            return await self.application(scope, receive, send)
+
+        try:
+            status, data = await self.handle(scope, receive)
+        except InputError as e:
+            status, data = e.status, {"error": str(e)}
+        if status is not None:
+            await respond(send, status, data, cors_headers(scope))
+
+    async def handle(self, scope, receive):
+        """
+        (status, response data), status None when the client went away.
+        """
+
+        token = bearer_token(scope)
+        user_id = await self.tokens.user_id(token) if token else None
+        if user_id is None:
+            return 401, {"error": "Token invalide"}
+
+        body = await read_body(receive)
+        if body is None:
+            return None, None
+        inputs = parse_inputs(body)
+
+        found = self.lobby_manager.active_matches.for_user(user_id)
+        if not found:
+            return 404, {"error": "L'utilisateur n'est pas dans une partie active"}
+        match_id, match_data, player_number = found
+
+        # Applied one per tick, in order, as the websocket inputs
+        game_state = match_data["game_state"]
+        player_key = f"player{player_number}"
+        accepted = sum(game_state.queue_input(player_key, value, seq) is not False for value, seq in inputs)
+
+        data = {"status": "success", "player_number": player_number, "match_id": match_id}
+        if len(inputs) == 1:
+            data["input_processed"] = inputs[0][0]
+        else:
+            data["inputs_processed"] = accepted
+        return 200, data
@@ -0,0 +1,125 @@
+"""
+╔═══════════════════════════════════════════════════╗
+║                 API Messages                      ║
+╠═══════════════════════════════════════════════════╣
+║ Bounded inbox of an APIConsumer                   ║
+║                                                   ║
+║ • Payloads kept as sent, parsed only when read    ║
+║ • Latest game frame only, older ones replaced     ║
+║ • Frames sent whole to API players, never deltas  ║
+║ • Last match_created / game_over always kept      ║
+║ • Other events in a fixed-size ring               ║
+║ • Monotonic cursors, readers ask for what's new   ║
+╚═══════════════════════════════════════════════════╝
+"""
+
+import json
+from collections import deque
+
+# Messages only the latest of which matters
+STATE_TYPES = frozenset(("game_state", "game_update"))
+# Messages kept until the next one of the same type
+PINNED_TYPES = frozenset(("match_created", "game_over"))
+
+# Prefix of every json.dumps({"type": ...}) the server sends
+TYPE_PREFIX = '{"type": "'
+
+def message_type(raw):
+    """
+    Type of a payload, read off its first key without parsing it when it
+    was built by json.dumps({"type": ...}).
+    """
+
+    if isinstance(raw, dict):
+        return raw.get("type")
+    if isinstance(raw, str) and raw.startswith(TYPE_PREFIX):
+        end = raw.find('"', len(TYPE_PREFIX))
+        if end != -1:
+            return raw[len(TYPE_PREFIX):end]
+    try:
+        data = json.loads(raw)
+    except (TypeError, ValueError):
+        return None
+    return data.get("type") if isinstance(data, dict) else None
+
+def parse(raw):
+    return raw if isinstance(raw, dict) else json.loads(raw)
+
+class MessageRing:
+    """
+    Messages sent to an API player, numbered from 1. Memory stays flat
+    however long the match: one frame, one message per pinned type and at
+    most capacity other events. Replacing the frame only holds for whole
+    states, APIConsumer asks the encoders for JSON_FULL frames.
+    """
+
+    __slots__ = ("events", "pinned", "state", "cursor")
+
+    def __init__(self, capacity=64):
+        self.events = deque(maxlen=capacity)
+        self.pinned = {}
+        self.state = None
+        self.cursor = 0
+
+    def __len__(self):
+        return len(self.events) + len(self.pinned) + (self.state is not None)
+
+    def append(self, raw, kind=None):
+        """
+        Store a payload as is and return its cursor.
+        """
+
+        if kind is None:
+            kind = message_type(raw)
+        self.cursor += 1
+        entry = (self.cursor, kind, raw)
+        if kind in STATE_TYPES:
+            self.state = entry
+        elif kind in PINNED_TYPES:
+            self.pinned[kind] = entry
+        else:
+            self.events.append(entry)
+        return self.cursor
+
+    def entries(self):
+        entries = list(self.events)
+        entries.extend(self.pinned.values())
+        if self.state is not None:
+            entries.append(self.state)
+        entries.sort()
+        return entries
+
+    def read(self, after=0):
+        """
+        (cursor, type, payload) of the messages still held past a cursor,
+        oldest first.
+        """
+
+        if after >= self.cursor:
+            return []
+        return [entry for entry in self.entries() if entry[0] > after]
+
+    def last(self, kind=None):
+        """
+        Latest (cursor, type, payload), of one type if given, or None.
+        """
+
+        if kind in PINNED_TYPES:
+            return self.pinned.get(kind)
+        if kind in STATE_TYPES:
+            return self.state if self.state is not None and self.state[1] == kind else None
+        candidates = [entry for entry in self.events if kind is None or entry[1] == kind]
+        if kind is None:
+            candidates.extend(self.pinned.values())
+            if self.state is not None:
+                candidates.append(self.state)
+        return max(candidates) if candidates else None
+
+    def clear(self):
+        """
+        Drop what is held. Cursors keep counting from where they were.
+        """
+
+        self.events.clear()
+        self.pinned.clear()
+        self.state = None
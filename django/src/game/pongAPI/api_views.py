@@ -3,14 +3,17 @@ from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
+import asyncio
 import logging
 import json
 import traceback
 
 from .serializers import GameStateSerializer, PaddleInputSerializer, MatchmakingSerializer
 from ..pongLobby import LobbyManager
+from ..pongHelper import game_setting
 from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
+from asgiref.sync import async_to_sync, sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from users.models import customUser
 from .api_consumer import APIMatchConsumer
@@ -21,6 +24,9 @@ logger = logging.getLogger('pong.api')
 # CREATE LOBBY INSTANCE (ONLY INITIALIZE)
 lobby_manager = LobbyManager()
 
+# SECONDS BETWEEN TWO SSE KEEPALIVE COMMENTS WHILE THE STATE DOESN'T CHANGE
+STREAM_KEEPALIVE = 15
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def game_status(request):
@@ -28,28 +34,18 @@ def game_status(request):
     logger.info(f"Requête status pour l'utilisateur {user.username}")
     
     # CHECK FOR ACTIVE GAME
-    match_data = None
-    player_number = None
-    match_id = None
-    
-    for mid, match in lobby_manager.active_matches.items():
-        for i, player in enumerate(match['players']):
-            if hasattr(player, 'user') and player.user.id == user.id:
-                match_data = match
-                player_number = i + 1
-                match_id = mid
-                logger.info(f"Utilisateur {user.username} trouvé dans la partie {mid} en tant que joueur {player_number}")
-                break
-        if match_data:
-            break
+    found = lobby_manager.active_matches.for_user(user.id)
     
-    if not match_data:
+    if not found:
         logger.info(f"Utilisateur {user.username} n'est pas dans une partie active")
         return Response({
             'in_game': False,
             'message': "L'utilisateur n'est pas dans une partie active"
         })
     
+    match_id, match_data, player_number = found
+    logger.info(f"Utilisateur {user.username} trouvé dans la partie {match_id} en tant que joueur {player_number}")
+    
     # SERIALIZE GAME STATE
     serializer = GameStateSerializer(match_data['game_state'])
     
@@ -67,37 +63,30 @@ def game_score(request):
     logger.info(f"Requête score pour l'utilisateur {user.username}")
 
     # CHECK GAME STATE
-    match_data = None
-    match_id = None
-    
-    for mid, match in lobby_manager.active_matches.items():
-        for player in match['players']:
-            if hasattr(player, 'user') and player.user.id == user.id:
-                match_data = match
-                match_id = mid
-                break
-        if match_data:
-            break
+    found = lobby_manager.active_matches.for_user(user.id)
     
-    if not match_data:
+    if not found:
         logger.info(f"Utilisateur {user.username} n'est pas dans une partie active pour voir le score")
         return Response({
             'error': "L'utilisateur n'est pas dans une partie active"
         }, status=status.HTTP_404_NOT_FOUND)
     
+    match_id, match_data, _ = found
+    
     # GET SCORE
-    player1_username = match_data['game_state']['player_info']['player1']['username']
-    player2_username = match_data['game_state']['player_info']['player2']['username']
+    game_state = match_data['game_state']
+    player1_username = game_state.header.player1.username
+    player2_username = game_state.header.player2.username
     
     return Response({
         'match_id': match_id,
         'player1': {
             'username': player1_username,
-            'score': match_data['game_state']['score']['player1']
+            'score': game_state.score1
         },
         'player2': {
             'username': player2_username,
-            'score': match_data['game_state']['score']['player2']
+            'score': game_state.score2
         }
     })
 
@@ -108,100 +97,42 @@ def start_matchmaking(request):
     logger.info(f"Démarrage du matchmaking pour l'utilisateur {user.username}")
     
     # CHECK GAME STATE
-    for match_id, match in lobby_manager.active_matches.items():
-        for player in match['players']:
-            if hasattr(player, 'user') and player.user.id == user.id:
-                logger.warning(f"Utilisateur {user.username} déjà dans une partie active {match_id}")
-                return Response({
-                    'error': "L'utilisateur est déjà dans une partie active",
-                    'match_id': match_id
-                }, status=status.HTTP_400_BAD_REQUEST)
+    found = lobby_manager.active_matches.for_user(user.id)
+    if found:
+        match_id = found[0]
+        logger.warning(f"Utilisateur {user.username} déjà dans une partie active {match_id}")
+        return Response({
+            'error': "L'utilisateur est déjà dans une partie active",
+            'match_id': match_id
+        }, status=status.HTTP_400_BAD_REQUEST)
     
     # CHECK QUEUE
-    for player, _, _ in lobby_manager.waiting_players:
-        if hasattr(player, 'user') and player.user.id == user.id:
-            queue_position = 0
-            for i, (p, _, _) in enumerate(lobby_manager.waiting_players):
-                if p == player:
-                    queue_position = i + 1
-                    break
-                    
-            logger.info(f"Utilisateur {user.username} déjà en file d'attente (position: {queue_position})")
-            return Response({
-                'status': 'in_queue',
-                'message': "L'utilisateur est déjà en file d'attente",
-                'queue_position': queue_position
-            })
+    queue_position = lobby_manager.waiting_players.position(user.id)
+    if queue_position:
+        logger.info(f"Utilisateur {user.username} déjà en file d'attente (position: {queue_position})")
+        ticket = lobby_manager.matchmaker.tickets_by_user.get(user.id)
+        return Response({
+            'status': 'in_queue',
+            'message': "L'utilisateur est déjà en file d'attente",
+            'queue_position': queue_position,
+            'ticket': ticket.ticket_id if ticket else None
+        })
     
     # API CONSUMMER CLASS
     api_consumer = APIMatchConsumer(user)
     logger.info(f"Création d'un APIMatchConsumer pour l'utilisateur {user.username}")
     
     try:
-        # ADD TO QUEUE
-        async_to_sync(lobby_manager.add_player_to_queue)(api_consumer)
-        
-        # FIND MATCH DIRECTLY
-        match_found = async_to_sync(lobby_manager.find_match_for_player)(api_consumer)
+        # ADD TO QUEUE, THE MATCHMAKER TRIES A MATCH RIGHT AWAY
+        ticket = async_to_sync(lobby_manager.matchmaker.open_ticket)(api_consumer)
+        response = ticket_response(ticket)
         
-        # QUEUE POSITION
-        queue_position = 0
-        for i, (p, _, _) in enumerate(lobby_manager.waiting_players):
-            if hasattr(p, 'user') and p.user.id == user.id:
-                queue_position = i + 1
-                break
-        
-        if match_found:
-            last_message = api_consumer.get_last_message()
-            match_id = api_consumer.match_id or (last_message.get('match_id') if last_message else None)
-            opponent = last_message.get('opponent') if last_message else "adversaire"
-            
-            logger.info(f"Match trouvé pour {user.username}: match_id={match_id}, adversaire={opponent}")
-            
-            return Response({
-                'status': 'match_found',
-                'message': 'Un adversaire a été trouvé!',
-                'match_id': match_id,
-                'player_number': api_consumer.player_number,
-                'opponent': opponent
-            })
+        if response['status'] == 'match_found':
+            logger.info(f"Match trouvé pour {user.username}: match_id={response['match_id']}, adversaire={response['opponent']}")
         else:
-            logger.info(f"Aucun match immédiat trouvé pour {user.username}, position dans la file: {queue_position}")
-            
-            # KEEP SEARCHING
-            try:
-                import threading
-                def background_matchmaking():
-                    try:
-                        logger.info(f"Démarrage de la recherche en arrière-plan pour {user.username}")
-                        for _ in range(15):
-                            logger.debug(f"Tentative de matchmaking pour {user.username}")
-                            try:
-                                if async_to_sync(lobby_manager.find_matches_for_all)() > 0:
-                                    logger.info(f"Match trouvé en arrière-plan pour {user.username}")
-                                    break
-                            except Exception as e:
-                                logger.error(f"Erreur lors de la recherche en arrière-plan: {e}")
-                            import time
-                            time.sleep(2)
-                    except Exception as e:
-                        logger.error(f"Erreur dans le thread de matchmaking: {e}")
-                        traceback.print_exc()
-                
-                # START BACKGROUND SEARCH
-                t = threading.Thread(target=background_matchmaking)
-                t.daemon = True
-                t.start()
-                
-                logger.info(f"Thread de recherche démarré pour {user.username}")
-            except Exception as e:
-                logger.error(f"Erreur lors du démarrage du thread de recherche: {e}")
-            
-            return Response({
-                'status': 'in_queue',
-                'message': 'En attente d\'un adversaire...',
-                'queue_position': queue_position
-            })
+            # KEEP SEARCHING: THE CLIENT WAITS ON /api/pong/matchmaking/<ticket>/
+            logger.info(f"Aucun match immédiat trouvé pour {user.username}, position dans la file: {response['queue_position']}, ticket {ticket.ticket_id}")
+        return Response(response)
     except Exception as e:
         logger.error(f"Erreur lors du matchmaking pour {user.username}: {str(e)}")
         traceback.print_exc()
@@ -209,6 +140,52 @@ def start_matchmaking(request):
             'error': f"Une erreur s'est produite lors du matchmaking: {str(e)}"
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+def ticket_response(ticket):
+    """
+    Body of the matchmaking responses for a ticket.
+    """
+    match = ticket.match()
+    if match:
+        return {
+            'status': 'match_found',
+            'message': 'Un adversaire a été trouvé!',
+            'ticket': ticket.ticket_id,
+            'match_id': match.get('match_id'),
+            'player_number': match.get('player_number'),
+            'opponent': match.get('opponent')
+        }
+    return {
+        'status': 'in_queue',
+        'message': 'En attente d\'un adversaire...',
+        'ticket': ticket.ticket_id,
+        'queue_position': lobby_manager.waiting_players.position(ticket.player.user.id)
+    }
+
+async def wait_matchmaking(request, ticket_id):
+    """
+    Long-poll on a matchmaking ticket: answers as soon as the player is
+    matched, or with their queue position after ?timeout= seconds (at
+    most PONG_MATCHMAKING_WAIT). Runs on the event loop, no thread waits.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Méthode non autorisée'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    # request.user is set by the auth middlewares, read it off the loop
+    user = await sync_to_async(lambda: request.user if request.user.is_authenticated else None)()
+    if user is None:
+        return JsonResponse({'error': 'Authentification requise'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    max_wait = game_setting('PONG_MATCHMAKING_WAIT', 25)
+    try:
+        timeout = min(max(float(request.GET.get('timeout', max_wait)), 0), max_wait)
+    except ValueError:
+        timeout = max_wait
+
+    ticket = await lobby_manager.matchmaker.wait_ticket(ticket_id, user.id, timeout)
+    if ticket is None:
+        return JsonResponse({'error': 'Ticket de matchmaking inconnu'}, status=status.HTTP_404_NOT_FOUND)
+    return JsonResponse(ticket_response(ticket))
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def move_paddle(request):
@@ -222,28 +199,19 @@ def move_paddle(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     input_value = serializer.validated_data['input']
-    match_data = None
-    player_number = None
-    match_id = None
-    
-    for mid, match in lobby_manager.active_matches.items():
-        for i, player in enumerate(match['players']):
-            if hasattr(player, 'user') and player.user.id == user.id:
-                match_data = match
-                player_number = i + 1
-                match_id = mid
-                break
-        if match_data:
-            break
+    found = lobby_manager.active_matches.for_user(user.id)
     
-    if not match_data:
+    if not found:
         logger.warning(f"Utilisateur {user.username} n'est pas dans une partie active pour bouger sa raquette")
         return Response({
             'error': "L'utilisateur n'est pas dans une partie active"
         }, status=status.HTTP_404_NOT_FOUND)
     
+    match_id, match_data, player_number = found
+    
+    # BUFFERED LIKE THE WEBSOCKET AND FAST PATH INPUTS, APPLIED FROM THE NEXT TICK
     player_key = f"player{player_number}"
-    match_data["game_state"]["inputs"][player_key] = input_value
+    match_data["game_state"].queue_input(player_key, input_value)
     logger.debug(f"Mouvement {input_value} appliqué pour {user.username} (joueur {player_number}) dans le match {match_id}")
     
     return Response({
@@ -251,4 +219,89 @@ def move_paddle(request):
         'input_processed': input_value,
         'player_number': player_number,
         'match_id': match_id
-    })
\ No newline at end of file
+    })
+async def stream_game_state(request):
+    """
+    Stream the caller's match as Server-Sent Events, or as NDJSON with
+    ?format=ndjson: a game_state event at most ?rate= times per second
+    (default PONG_STREAM_RATE) when the tick moved, then game_over.
+    Every event carries a "<match_id>/<tick>" cursor, sent back as
+    Last-Event-ID or ?cursor= to resume without repeating a tick.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Méthode non autorisée'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    user = await sync_to_async(lambda: request.user if request.user.is_authenticated else None)()
+    if user is None:
+        return JsonResponse({'error': 'Authentification requise'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    # CHECK GAME STATE
+    found = lobby_manager.active_matches.for_user(user.id)
+    if not found:
+        return JsonResponse({'error': "L'utilisateur n'est pas dans une partie active"}, status=status.HTTP_404_NOT_FOUND)
+    match_id, match_data, player_number = found
+
+    # RATE, CAPPED BY THE SIMULATION
+    tick_rate = lobby_manager.scheduler.tick_rate
+    try:
+        rate = float(request.GET.get('rate', game_setting('PONG_STREAM_RATE', 20)))
+    except ValueError:
+        rate = game_setting('PONG_STREAM_RATE', 20)
+    rate = min(max(rate, 1), tick_rate)
+
+    # RESUME CURSOR, ONLY FOR THE SAME MATCH
+    last_tick = -1
+    cursor = request.headers.get('Last-Event-ID') or request.GET.get('cursor') or ''
+    cursor_match, _, cursor_tick = cursor.rpartition('/')
+    if cursor_match == match_id and cursor_tick.isdigit():
+        last_tick = int(cursor_tick)
+
+    ndjson = request.GET.get('format') == 'ndjson'
+    response = StreamingHttpResponse(
+        game_state_events(match_id, match_data, player_number, rate, last_tick, ndjson),
+        content_type='application/x-ndjson' if ndjson else 'text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # NGINX MUST NOT BUFFER THE STREAM
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+async def game_state_events(match_id, match_data, player_number, rate, last_tick, ndjson):
+    """
+    Events of one match until it leaves active_matches.
+    """
+    game_state = match_data['game_state']
+    player = match_data['players'][player_number - 1]
+    interval = 1 / rate
+    idle = 0.0
+
+    while True:
+        running = lobby_manager.active_matches.get(match_id) is match_data
+        tick = game_state.tick
+        if tick > last_tick:
+            last_tick = tick
+            idle = 0.0
+            yield stream_event('game_state', f"{match_id}/{tick}", {
+                'type': 'game_state',
+                'match_id': match_id,
+                'player_number': player_number,
+                'game_state': game_state.to_dict()
+            }, ndjson)
+        elif not ndjson and idle >= STREAM_KEEPALIVE:
+            idle = 0.0
+            yield ": keepalive\n\n"
+        if not running:
+            break
+        await asyncio.sleep(interval)
+        idle += interval
+
+    # RESULT SENT TO AN API PLAYER, OR THE FINAL SCORE
+    result = player.get_last_message('game_over') if hasattr(player, 'get_last_message') else None
+    if result is None:
+        result = {'type': 'game_over', 'score': {'player1': game_state.score1, 'player2': game_state.score2}}
+    yield stream_event('game_over', f"{match_id}/{last_tick}", dict(result, match_id=match_id), ndjson)
+
+def stream_event(event, cursor, data, ndjson):
+    if ndjson:
+        return json.dumps(dict(data, cursor=cursor)) + "\n"
+    return f"id: {cursor}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
@@ -5,10 +5,10 @@ class GameStateSerializer(serializers.Serializer):
     Game state
     """
     match_id = serializers.CharField(required=False)
-    player1_username = serializers.CharField(source='player_info.player1.username')
-    player2_username = serializers.CharField(source='player_info.player2.username')
-    player1_score = serializers.IntegerField(source='score.player1')
-    player2_score = serializers.IntegerField(source='score.player2')
+    player1_username = serializers.CharField(source='header.player1.username')
+    player2_username = serializers.CharField(source='header.player2.username')
+    player1_score = serializers.IntegerField(source='score1')
+    player2_score = serializers.IntegerField(source='score2')
     
     class Meta:
         fields = ['match_id', 'player1_username', 'player2_username', 
@@ -5,5 +5,7 @@ urlpatterns = [
     path('api/pong/status/', api_views.game_status, name='pong_game_status'),
     path('api/pong/score/', api_views.game_score, name='pong_game_score'),
     path('api/pong/matchmaking/', api_views.start_matchmaking, name='pong_start_matchmaking'),
+    path('api/pong/matchmaking/<str:ticket_id>/', api_views.wait_matchmaking, name='pong_wait_matchmaking'),
     path('api/pong/paddle/', api_views.move_paddle, name='pong_move_paddle'),
+    path('api/pong/stream/', api_views.stream_game_state, name='pong_stream_game_state'),
 ]
\ No newline at end of file
@@ -0,0 +1,170 @@
+"""
+╔═══════════════════════════════════════════════════╗
+║                 PongBots                          ║
+╠═══════════════════════════════════════════════════╣
+║ Server-side bot opponents                         ║
+║                                                   ║
+║ • BotPlayer stands in for a consumer in a match   ║
+║ • BotController drives every bot in one pass      ║
+║ • Difficulty levels: reaction time and aim error  ║
+║ • Bot matches never touch ELO                     ║
+╚═══════════════════════════════════════════════════╝
+"""
+
+import itertools
+from collections import namedtuple
+from random import Random
+from types import SimpleNamespace
+from .pongHelper import CANVAS_WIDTH, CANVAS_HEIGHT, PAD_WIDTH, PAD_HEIGHT, BALL_RADIUS, BASE_TICK_RATE
+
+# reaction_ticks: ticks between two decisions (at BASE_TICK_RATE)
+# aim_error: max px between the aimed and the predicted impact point, drawn
+# once each time the ball comes toward the bot
+# anticipates: follows the predicted impact point instead of the ball
+BotLevel = namedtuple("BotLevel", ["reaction_ticks", "aim_error", "anticipates"])
+
+BOT_LEVELS = {
+    "easy": BotLevel(reaction_ticks=20, aim_error=70, anticipates=False),
+    "medium": BotLevel(reaction_ticks=10, aim_error=57, anticipates=True),
+    "hard": BotLevel(reaction_ticks=4, aim_error=50, anticipates=True),
+}
+
+BOT_NAMES = {"easy": "Bot (facile)", "medium": "Bot (moyen)", "hard": "Bot (difficile)"}
+
+# Paddle center distance to the target under which the bot stops
+DEAD_ZONE = 10
+
+_bot_ids = itertools.count(1)
+
+def bot_level_for_elo(elo):
+    """
+    Difficulty matching a player's ELO.
+    """
+
+    if elo < 900:
+        return "easy"
+    if elo < 1200:
+        return "medium"
+    return "hard"
+
+def is_bot(player):
+    return hasattr(player, '_is_bot')
+
+class BotPlayer:
+    """
+    Consumer-shaped opponent, it only exists in the lobby and the scheduler.
+    Messages sent to it are dropped, its inputs come from the BotController.
+    """
+
+    def __init__(self, level="medium", elo=1000):
+        self.level = level
+        self.user = SimpleNamespace(
+            id=None,
+            username=f"bot_{level}_{next(_bot_ids)}",
+            nickname=BOT_NAMES[level],
+            elo=elo,
+        )
+        self.match_id = None
+        self.player_number = None
+        self._is_bot = True
+
+    async def send(self, text_data=None, bytes_data=None, close=False):
+        pass
+
+    async def send_frame(self, text_data=None, bytes_data=None):
+        pass
+
+class Bot:
+    """
+    Control state of one bot paddle.
+    """
+
+    __slots__ = ("game_state", "player", "level", "reaction", "next_think", "target_y", "incoming", "error")
+
+    def __init__(self, game_state, player, level, reaction):
+        self.game_state = game_state
+        self.player = player
+        self.level = level
+        self.reaction = reaction
+        self.next_think = 0
+        self.target_y = CANVAS_HEIGHT / 2
+        self.incoming = False
+        self.error = 0.0
+
+class BotController:
+    """
+    Computes the inputs of every bot from the live game states, in a single
+    pass per tick run by the scheduler (or the worker pool) before stepping.
+    Bots only think every reaction ticks and steer toward their last target
+    in between, so no bot needs a task of its own.
+    """
+
+    def __init__(self, tick_rate=BASE_TICK_RATE, seed=None):
+        self.tick_rate = tick_rate
+        self.bots = {}
+        self.rng = Random(seed)
+
+    def add(self, match_id, game_state, player_number, level):
+        bot_level = BOT_LEVELS[level]
+        reaction = max(1, round(bot_level.reaction_ticks * self.tick_rate / BASE_TICK_RATE))
+        self.bots.setdefault(match_id, []).append(Bot(game_state, player_number, bot_level, reaction))
+
+    def remove(self, match_id):
+        self.bots.pop(match_id, None)
+
+    def __len__(self):
+        return len(self.bots)
+
+    def update(self, match_ids=None):
+        """
+        Sets the inputs of the bots, only in match_ids when given.
+        """
+
+        for match_id, bots in self.bots.items():
+            if match_ids is not None and match_id not in match_ids:
+                continue
+            for bot in bots:
+                game_state = bot.game_state
+                if game_state.tick >= bot.next_think:
+                    bot.next_think = game_state.tick + bot.reaction
+                    bot.target_y = self.aim(bot, game_state)
+
+                pad_y = game_state.pad1_y if bot.player == 1 else game_state.pad2_y
+                offset = bot.target_y - (pad_y + PAD_HEIGHT / 2)
+                value = 0 if abs(offset) < DEAD_ZONE else (1 if offset > 0 else -1)
+                if bot.player == 1:
+                    game_state.input1 = value
+                else:
+                    game_state.input2 = value
+
+    def aim(self, bot, game_state):
+        """
+        Height the bot's paddle center should reach.
+        """
+
+        incoming = game_state.dir_x < 0 if bot.player == 1 else game_state.dir_x > 0
+        if incoming and not bot.incoming:
+            bot.error = self.rng.uniform(-bot.level.aim_error, bot.level.aim_error)
+        bot.incoming = incoming
+        if not incoming:
+            # Back to the middle while the ball goes away
+            return CANVAS_HEIGHT / 2 if bot.level.anticipates else game_state.ball_y
+        target = predict_impact_y(game_state, bot.player) if bot.level.anticipates else game_state.ball_y
+        return target + bot.error
+
+def predict_impact_y(game_state, player):
+    """
+    Ball height when it reaches the paddle of player 1 or 2, bouncing on walls.
+    """
+
+    pad_x = 10 + PAD_WIDTH if player == 1 else CANVAS_WIDTH - PAD_WIDTH - 10 - BALL_RADIUS
+    if game_state.dir_x == 0:
+        return game_state.ball_y
+    travel = (pad_x - game_state.ball_x) / game_state.dir_x
+    if not game_state.ball_touched or travel <= 0:
+        return game_state.ball_y
+
+    # Unfold the wall bounces
+    height = CANVAS_HEIGHT - BALL_RADIUS
+    y = (game_state.ball_y + game_state.dir_y * travel) % (2 * height)
+    return (2 * height - y if y > height else y) + BALL_RADIUS / 2
@@ -0,0 +1,719 @@
+"""
+╔═══════════════════════════════════════════════════╗
+║                 PongCheckpoint                    ║
+╠═══════════════════════════════════════════════════╣
+║ Running matches survive a restart of the worker   ║
+║                                                   ║
+║ • Compact state of every match and bracket        ║
+║ • Written off the tick, one batch per interval    ║
+║ • Restored paused until the players reconnect     ║
+║ • Absent players forfeit after the grace period   ║
+║ • Dead workers' checkpoints taken over            ║
+╚═══════════════════════════════════════════════════╝
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from channels.db import database_sync_to_async
+from .pongBots import BotPlayer, is_bot
+from .pongFrames import JSON
+from .pongHelper import build_game_state, game_setting
+from .pongState import MatchHeader, MatchRng, PlayerInfo
+
+logger = logging.getLogger('pong.checkpoint')
+
+CHECKPOINT_VERSION = 1
+CHECKPOINT_KEY = "pong:checkpoint:{}"
+OWNER_KEY = "pong:checkpoint_owner:{}"        # worker name, set while it is alive
+
+# Seconds a worker's name stays taken after its last checkpoint loop
+OWNER_TTL = 15
+
+# Checkpoints older than this are dropped, their players have moved on
+MAX_AGE = 600
+
+# Entries encoded per loop iteration, about 1 ms of work
+ENCODE_BATCH = 50
+
+# Hands over the checkpoint of a worker whose name expired, once
+ORPHAN_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    return false
+end
+local data = redis.call('GET', KEYS[1])
+redis.call('DEL', KEYS[1])
+return data
+"""
+
+# Players slots
+PLAYER = "player"
+API = "api"
+BOT = "bot"
+
+#===========================================================#
+#                STORES                                     #
+#===========================================================#
+
+class FileCheckpointStore:
+    """
+    Checkpoint in a local file, replaced atomically.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    async def save(self, data):
+        await asyncio.to_thread(self._write, data)
+
+    async def alive(self):
+        pass
+
+    async def orphans(self):
+        return []
+
+    def _write(self, data):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write(data)
+        os.replace(temporary, self.path)
+
+    async def load(self):
+        return await asyncio.to_thread(self._read)
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+class RedisCheckpointStore:
+    """
+    Checkpoint in the Redis instance of the channel layer, under the
+    worker's name. The name is held by a key refreshed while the worker
+    runs: a container recreated by a deploy comes back under another
+    hostname, and takes over the checkpoints whose name has expired.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.key = CHECKPOINT_KEY.format(name)
+        self.redis = None
+        self.orphan_script = None
+
+    def client(self):
+        if self.redis is None:
+            from .pongCluster import redis_client
+            self.redis = redis_client()
+            self.orphan_script = self.redis.register_script(ORPHAN_SCRIPT)
+        return self.redis
+
+    async def save(self, data):
+        await self.client().set(self.key, data, ex=MAX_AGE)
+
+    async def alive(self):
+        await self.client().set(OWNER_KEY.format(self.name), 1, ex=OWNER_TTL)
+
+    async def load(self):
+        return await self.client().get(self.key)
+
+    async def orphans(self):
+        """
+        Checkpoints of the other workers that stopped refreshing their name,
+        removed from Redis as they are taken.
+        """
+
+        redis = self.client()
+        taken = []
+        async for key in redis.scan_iter(match=CHECKPOINT_KEY.format("*")):
+            name = key[len(CHECKPOINT_KEY.format("")):]
+            if name == self.name:
+                continue
+            data = await self.orphan_script(keys=[key, OWNER_KEY.format(name)])
+            if data:
+                logger.info(f"Checkpoint de {name} repris")
+                taken.append(data)
+        return taken
+
+def checkpoint_store(target):
+    """
+    PONG_CHECKPOINT is 'redis' or a file path. The Redis checkpoint is
+    named after PONG_CHECKPOINT_NAME, or the hostname.
+    """
+
+    if target == "redis":
+        return RedisCheckpointStore(game_setting('PONG_CHECKPOINT_NAME', None) or socket.gethostname())
+    return FileCheckpointStore(target)
+
+#===========================================================#
+#                RESTORED PLAYERS                           #
+#===========================================================#
+
+@database_sync_to_async
+def get_users(user_ids):
+    from users.models import customUser
+    return customUser.objects.in_bulk(user_ids)
+
+class RestoredPlayer:
+    """
+    Player of a match restored from a checkpoint. Stands in for its consumer
+    in the lobby and the tournaments, forwarding to it once it reconnected.
+    """
+
+    def __init__(self, user, kind=PLAYER):
+        self.consumer = None
+        self.kind = kind
+        self._user = user
+        self._match_id = None
+        self._player_number = None
+        self._is_restored = True
+
+    def attach(self, consumer):
+        self.consumer = consumer
+        consumer.match_id = self._match_id
+        consumer.player_number = self._player_number
+        for name in ("tournament_id", "player_position"):
+            if hasattr(self, name):
+                setattr(consumer, name, getattr(self, name))
+
+    @property
+    def user(self):
+        return self.consumer.user if self.consumer is not None else self._user
+
+    @property
+    def frame_format(self):
+        return getattr(self.consumer, 'frame_format', JSON)
+
+    @property
+    def channel_name(self):
+        return getattr(self.consumer, 'channel_name', None)
+
+    # Match fields are mirrored on the consumer, which reads them for its inputs
+    @property
+    def match_id(self):
+        return self._match_id
+
+    @match_id.setter
+    def match_id(self, value):
+        self._match_id = value
+        if self.consumer is not None:
+            self.consumer.match_id = value
+
+    @property
+    def player_number(self):
+        return self._player_number
+
+    @player_number.setter
+    def player_number(self, value):
+        self._player_number = value
+        if self.consumer is not None:
+            self.consumer.player_number = value
+
+    async def send(self, text_data=None, bytes_data=None, close=False):
+        if self.consumer is None:
+            return
+        if bytes_data is None:
+            await self.consumer.send(text_data=text_data)
+        else:
+            await self.consumer.send(bytes_data=bytes_data)
+
+    async def send_frame(self, text_data=None, bytes_data=None):
+        if self.consumer is not None:
+            await self.consumer.send_frame(text_data=text_data, bytes_data=bytes_data)
+
+    # CHECK USER=USER
+    def __eq__(self, other):
+        if not hasattr(other, 'user'):
+            return False
+        return self.user.id == other.user.id
+
+    def __hash__(self):
+        return hash(f"restored_{self.user.id}")
+
+class RestoredGroup:
+    """
+    Players of a restored match or tournament, resumed once all are back.
+    """
+
+    def __init__(self, kind, key, players, resume):
+        self.kind = kind
+        self.key = key
+        self.players = players
+        self.resume = resume
+
+    def missing(self):
+        return [player for player in self.players if player.consumer is None]
+
+#===========================================================#
+#                CHECKPOINTER                               #
+#===========================================================#
+
+class Checkpointer:
+    """
+    ╔═══════════════════════════════════════════════════╗
+    ║                 Checkpointer                      ║
+    ╠═══════════════════════════════════════════════════╣
+    ║ Periodic snapshots of this worker's game state    ║
+    ║                                                   ║
+    ║ • Captures the matches on the loop, between ticks ║
+    ║ • Encodes them in small batches between ticks     ║
+    ║ • Restores the last snapshot on the first connect ║
+    ║ • Reattaches the reconnecting consumers           ║
+    ╚═══════════════════════════════════════════════════╝
+    """
+
+    # One checkpointer per process
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(Checkpointer, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """
+        Disabled when PONG_CHECKPOINT is empty.
+        """
+        if self._initialized:
+            return
+
+        target = game_setting('PONG_CHECKPOINT', None)
+        self.store = checkpoint_store(target) if target else None
+        self.interval = game_setting('PONG_CHECKPOINT_INTERVAL', 1)
+        self.grace = game_setting('PONG_RECONNECT_GRACE', 30)
+        self.lobby = None
+        self.tournaments = None
+        # Restored players waiting for their consumer, by (kind, user id)
+        self.detached = {}
+        self.groups = []
+        self.saved_empty = False
+        self.last_save_ms = 0.0
+        self._starting = None
+        self._tasks = set()
+        self._initialized = True
+
+    async def start(self):
+        """
+        Restore the last checkpoint, then start writing new ones. Runs once,
+        from the first consumer of the process.
+        """
+
+        if self.store is None:
+            return
+        if self._starting is None:
+            self._starting = asyncio.ensure_future(self.begin())
+        await self._starting
+
+    async def begin(self):
+        try:
+            await self.restore()
+        except Exception as e:
+            logger.error(f"Restauration du checkpoint impossible: {e}", exc_info=True)
+        self.spawn(self.run())
+
+    def spawn(self, coro):
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    #===========================================================#
+    #                CAPTURE                                    #
+    #===========================================================#
+
+    async def run(self):
+        adopted_at = time.monotonic()
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.store.alive()
+                await self.save()
+                # A worker stopped just before this one started is only orphaned once its name expires
+                if time.monotonic() - adopted_at >= OWNER_TTL:
+                    adopted_at = time.monotonic()
+                    await self.adopt(await self.store.orphans())
+            except Exception as e:
+                logger.error(f"Checkpoint impossible: {e}")
+
+    async def save(self):
+        """
+        Capture between two ticks, then encode a batch of entries per loop
+        iteration so the scheduler never waits for more than one batch.
+        The file or Redis write itself doesn't hold the loop.
+        """
+
+        snapshot = self.capture()
+        empty = not snapshot["matches"] and not snapshot["tournaments"]
+        if empty and self.saved_empty:
+            return
+        started = time.perf_counter()
+        encoded = {}
+        for name in ("matches", "tournaments"):
+            entries, encoded[name] = snapshot[name], []
+            for start in range(0, len(entries), ENCODE_BATCH):
+                encoded[name].extend(map(json.dumps, entries[start:start + ENCODE_BATCH]))
+                await asyncio.sleep(0)
+        await self.store.save(
+            f'{{"version": {snapshot["version"]}, "saved_at": {snapshot["saved_at"]!r}, '
+            f'"matches": [{",".join(encoded["matches"])}], "tournaments": [{",".join(encoded["tournaments"])}]}}'
+        )
+        self.last_save_ms = (time.perf_counter() - started) * 1000
+        self.saved_empty = empty
+
+    def capture(self):
+        """
+        Snapshot of the running matches and started tournaments, copied out
+        of the live objects so the ticks running during the encoding can't
+        change it.
+        """
+
+        matches = []
+        if self.lobby is not None:
+            for match_id, match_data in self.lobby.active_matches.items():
+                matches.append({
+                    "match_id": match_id,
+                    "game": capture_game(match_data["game_state"]),
+                    "slots": [capture_slot(player) for player in match_data["players"]],
+                    "created_at": match_data.get("created_at"),
+                    "invitation_based": match_data.get("invitation_based", False),
+                })
+
+        tournaments = []
+        if self.tournaments is not None:
+            for tournament_id, tournament in self.tournaments.tournaments.items():
+                if not tournament.get("started") or tournament.get("complete") or tournament.get("cancelled"):
+                    continue
+                players = tournament["players"]
+                running = {}
+                for match_id, game_state in tournament["match_states"].items():
+                    in_match = sorted((p for p in players if getattr(p, 'match_id', None) == match_id), key=lambda p: p.player_number)
+                    if len(in_match) == 2:
+                        running[match_id] = {
+                            "game": capture_game(game_state),
+                            "players": [p.user.id for p in in_match],
+                        }
+                tournaments.append({
+                    "tournament_id": tournament_id,
+                    "slots": [capture_slot(player) for player in players],
+                    "semifinal_winners": {match_id: p.user.id for match_id, p in tournament["semifinal_winners"].items()},
+                    "semifinal_losers": {match_id: p.user.id for match_id, p in tournament["semifinal_losers"].items()},
+                    "rankings": dict(tournament["rankings"]),
+                    "finals_created": tournament.get("finals_created", False),
+                    "matches": running,
+                    "created_at": tournament.get("created_at"),
+                })
+
+        return {"version": CHECKPOINT_VERSION, "saved_at": time.time(), "matches": matches, "tournaments": tournaments}
+
+    #===========================================================#
+    #                RESTORE                                    #
+    #===========================================================#
+
+    async def restore(self):
+        """
+        Rebuild the matches and tournaments of the last checkpoint, and of
+        the dead workers', paused until their players reconnect. The name is
+        held first, so no other worker takes this one's checkpoint meanwhile.
+        """
+
+        await self.store.alive()
+        await self.adopt([await self.store.load(), *await self.store.orphans()])
+
+    async def adopt(self, raws):
+        """
+        Restore checkpoints next to the matches already running, their
+        players get the grace period from now.
+        """
+
+        groups = []
+        for raw in raws:
+            if raw:
+                groups.extend(await self.restore_snapshot(json.loads(raw)))
+        groups = [group for group in groups if group is not None]
+        if not groups:
+            return
+
+        self.groups.extend(groups)
+        logger.info(f"{len(groups)} matchs et tournois restaurés, {len(self.detached)} joueurs attendus pendant {self.grace}s")
+        for group in groups:
+            if not group.missing():
+                await group.resume()
+        self.spawn(self.expire(groups))
+
+    async def restore_snapshot(self, snapshot):
+        """
+        Groups of the matches and tournaments of one checkpoint, None for
+        those whose players are gone.
+        """
+
+        if snapshot.get("version") != CHECKPOINT_VERSION or time.time() - snapshot["saved_at"] > MAX_AGE:
+            logger.info("Checkpoint trop ancien, ignoré")
+            return []
+
+        user_ids = {slot["user_id"] for entry in snapshot["matches"] + snapshot["tournaments"]
+                    for slot in entry["slots"] if slot["kind"] != BOT}
+        users = await get_users(list(user_ids))
+
+        groups = []
+        if self.lobby is not None:
+            for entry in snapshot["matches"]:
+                if entry["match_id"] not in self.lobby.active_matches:
+                    groups.append(self.restore_match(entry, users))
+        if self.tournaments is not None:
+            for entry in snapshot["tournaments"]:
+                if entry["tournament_id"] not in self.tournaments.tournaments:
+                    groups.append(self.restore_tournament(entry, users))
+        return groups
+
+    def restore_players(self, kind, slots, users):
+        """
+        One stand-in per slot. API players have no connection to wait for,
+        a new APIMatchConsumer takes their place right away.
+        """
+
+        from .pongAPI.api_consumer import APIMatchConsumer
+
+        players = []
+        for slot in slots:
+            if slot["kind"] == BOT:
+                bot = BotPlayer(slot["level"], slot["elo"])
+                bot.user.username = slot["username"]
+                players.append(bot)
+                continue
+            user = users.get(slot["user_id"])
+            if user is None:
+                return None
+            player = RestoredPlayer(user, slot["kind"])
+            if slot["kind"] == API:
+                player.attach(APIMatchConsumer(user))
+            else:
+                self.detached[(kind, user.id)] = player
+            players.append(player)
+        return players
+
+    def restore_match(self, entry, users):
+        match_id = entry["match_id"]
+        players = self.restore_players("match", entry["slots"], users)
+        if players is None:
+            return None
+        game_state = restore_game(entry["game"])
+        for number, player in enumerate(players, 1):
+            player.match_id = match_id
+            player.player_number = number
+
+        self.lobby.active_matches[match_id] = {
+            "players": players,
+            "game_state": game_state,
+            "created_at": entry["created_at"],
+            "invitation_based": entry["invitation_based"],
+        }
+
+        async def resume():
+            if self.lobby.active_matches.get(match_id, {}).get("players") is not players:
+                return
+            host = next((p.consumer for p in players if hasattr(p.consumer, 'run_game_loop')), None)
+            if host is None:
+                return
+            logger.info(f"Reprise du match {match_id} au tick {game_state.tick}")
+            await host.run_game_loop(match_id)
+            for player in players:
+                if is_bot(player):
+                    self.lobby.scheduler.add_bot(match_id, game_state, player.player_number, player.level)
+
+        return RestoredGroup("match", match_id, [p for p in players if not is_bot(p)], resume)
+
+    def restore_tournament(self, entry, users):
+        tournament_id = entry["tournament_id"]
+        players = self.restore_players("tournament", entry["slots"], users)
+        if players is None:
+            return None
+        by_id = {player.user.id: player for player in players}
+        for position, player in enumerate(players, 1):
+            player.tournament_id = tournament_id
+            player.player_position = position
+
+        match_states, running = {}, []
+        for match_id, match in entry["matches"].items():
+            match_states[match_id] = restore_game(match["game"])
+            match_players = [by_id[user_id] for user_id in match["players"]]
+            for number, player in enumerate(match_players, 1):
+                player.match_id = match_id
+                player.player_number = number
+            running.append((match_id, match_players))
+
+        rankings = {int(position): username for position, username in entry["rankings"].items()}
+        self.tournaments.tournaments[tournament_id] = {
+            "players": players,
+            "semifinal_winners": {match_id: by_id[user_id] for match_id, user_id in entry["semifinal_winners"].items()},
+            "semifinal_losers": {match_id: by_id[user_id] for match_id, user_id in entry["semifinal_losers"].items()},
+            "rankings": rankings,
+            "match_states": match_states,
+            "finals_created": entry["finals_created"],
+            "complete": False,
+            "started": True,
+            "ready_to_start": True,
+            "created_at": entry["created_at"],
+        }
+        for player in players:
+            self.tournaments.players_by_user[player.user.id] = player
+        if isinstance(tournament_id, int):
+            self.tournaments.next_tournament_id = max(self.tournaments.next_tournament_id, tournament_id + 1)
+
+        async def resume():
+            tournament = self.tournaments.tournaments.get(tournament_id)
+            if tournament is None or tournament.get("cancelled"):
+                return
+            logger.info(f"Reprise du tournoi {tournament_id}")
+            for match_id, match_players in running:
+                await self.tournaments.run_match(match_id, tournament_id, match_players)
+            self.spawn(self.resume_stages(tournament_id, running))
+
+        return RestoredGroup("tournament", tournament_id, players, resume)
+
+    async def resume_stages(self, tournament_id, running):
+        """
+        Set up the rounds the checkpoint caught between two matches.
+        """
+
+        tournament = self.tournaments.tournaments[tournament_id]
+        running = {match_id for match_id, _ in running}
+        if not tournament["finals_created"]:
+            await self.tournaments.check_tournament_progress(tournament_id)
+            return
+        if 3 not in tournament["rankings"] and "third_place" not in running:
+            await self.tournaments.setup_third_place_match(tournament_id)
+        if 1 not in tournament["rankings"] and "final" not in running:
+            await self.tournaments.setup_finals(tournament_id)
+
+    #===========================================================#
+    #                RECONNECTION                               #
+    #===========================================================#
+
+    async def reattach(self, consumer, kind):
+        """
+        Give a reconnecting consumer its restored match or tournament back.
+        kind is "match" or "tournament", the socket it connected to.
+        """
+
+        await self.start()
+        player = self.detached.pop((kind, consumer.user.id), None)
+        if player is None:
+            return False
+        player.attach(consumer)
+        group = next(group for group in self.groups if group.kind == kind and any(p is player for p in group.players))
+        logger.info(f"{consumer.user.username} a rejoint {kind} {group.key}")
+
+        if kind == "tournament":
+            state = await self.tournaments.get_tournament_state(group.key)
+            state["your_position"] = player.player_position
+            await consumer.send(text_data=json.dumps(state))
+        if player.match_id:
+            await self.send_resumed(player, group)
+        if not group.missing():
+            await group.resume()
+        return True
+
+    async def send_resumed(self, player, group):
+        """
+        Resumed matches open like new ones on the client. A reloaded client
+        numbers its inputs from 0 again, so the player's sequence is reset,
+        or queue_input() would drop them as already seen.
+        """
+
+        if group.kind == "match":
+            manager = self.lobby
+            match_data = self.lobby.active_matches[group.key]
+            game_state, players = match_data["game_state"], match_data["players"]
+        else:
+            manager = self.tournaments
+            game_state = self.tournaments.tournaments[group.key]["match_states"][player.match_id]
+            players = [p for p in group.players if p.match_id == player.match_id]
+        opponent = next((p for p in players if p != player), None)
+        game_state.reset_sequence(f"player{player.player_number}")
+        await player.send(text_data=json.dumps({
+            "type": "match_created",
+            "match_id": player.match_id,
+            "player_number": player.player_number,
+            "opponent": opponent.user.username if opponent else None,
+            "game_state": game_state.to_dict(),
+            "tick_rate": manager.scheduler.tick_rate,
+            "snapshot_rate": manager.scheduler.snapshot_rate,
+            "resumed": True,
+            "waiting_for": [p.user.username for p in group.missing()],
+        }))
+
+    async def expire(self, groups):
+        """
+        After the grace period, the players still away forfeit.
+        """
+
+        await asyncio.sleep(self.grace)
+        for group in groups:
+            missing = group.missing()
+            for player in missing:
+                self.detached.pop((group.kind, player.user.id), None)
+            if not missing:
+                continue
+            logger.info(f"{[p.user.username for p in missing]} pas revenus, forfait pour {group.kind} {group.key}")
+            if group.kind == "tournament":
+                for player in missing:
+                    await self.tournaments.handle_player_disconnect(player)
+                continue
+
+            match_data = self.lobby.active_matches.get(group.key)
+            if match_data is None:
+                continue
+            if len(missing) == len(group.players):
+                del self.lobby.active_matches[group.key]
+            else:
+                await self.lobby.remove_player(missing[0])
+            for player in match_data["players"]:
+                player.match_id = None
+                player.player_number = None
+        self.groups = [group for group in self.groups if group not in groups]
+
+def capture_slot(player):
+    if is_bot(player):
+        return {"kind": BOT, "level": player.level, "username": player.user.username, "elo": player.user.elo}
+    if hasattr(player, '_is_restored'):
+        kind = player.kind
+    else:
+        kind = API if hasattr(player, '_is_api') else PLAYER
+    return {"kind": kind, "user_id": player.user.id}
+
+def capture_game(game_state):
+    header = game_state.header
+    return {
+        "players": [list(header.player1), list(header.player2)],
+        "match_id": header.match_id,
+        "tournament_id": header.tournament_id,
+        "seed": header.seed,
+        "rng": game_state.rng.state,
+        "state": game_state.to_compact(),
+    }
+
+def restore_game(game):
+    """
+    Rebuild a game state at its checkpointed tick, with the inputs released.
+    The RNG resumes from its checkpointed state, so the next serves are the
+    ones the match would have had. Older checkpoints without it reseed from
+    the seed and tick.
+    """
+
+    header = MatchHeader(PlayerInfo(*game["players"][0]), PlayerInfo(*game["players"][1]),
+                         game["match_id"], game["tournament_id"], game["seed"])
+    game_state = build_game_state(header)
+    game_state.load_compact(game["state"], inputs=False)
+    if game.get("rng") is not None:
+        game_state.rng = MatchRng(game["rng"])
+    else:
+        game_state.rng = MatchRng((header.seed or 0) << 32 | game_state.tick)
+    return game_state
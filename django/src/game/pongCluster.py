@@ -0,0 +1,540 @@
+"""
+╔═══════════════════════════════════════════════════╗
+║                 PongCluster                       ║
+╠═══════════════════════════════════════════════════╣
+║ Game state shared by several Daphne workers       ║
+║                                                   ║
+║ • Queue, match owners and invitations in Redis    ║
+║ • A match is ticked by the worker that created it ║
+║ • Players of other workers are relaying proxies   ║
+║ • Relays queued off the tick, newest frame only   ║
+║ • Inputs and forfeits travel on the channel layer ║
+╚═══════════════════════════════════════════════════╝
+"""
+
+import asyncio
+import json
+import logging
+import time
+from types import SimpleNamespace
+from channels.db import database_sync_to_async
+from channels.exceptions import ChannelFull
+from channels.layers import get_channel_layer
+from .pongBots import is_bot
+from .pongFrames import JSON
+from .pongHelper import game_setting
+from .pongOutbound import OutboundQueue
+
+logger = logging.getLogger('pong.cluster')
+
+# Redis keys
+QUEUE_KEY = "pong:queue"                        # username -> queue entry
+WORKER_KEY = "pong:worker:{}"                   # worker channel, set while it is alive
+PLAYER_KEY = "pong:player:{}"                   # user id -> worker owning their match or tournament
+INVITE_KEY = "pong:invite:{}:{}"                # game id, role -> entry of the player waiting
+TOURNAMENT_HOST_KEY = "pong:tournament:host"    # worker holding the tournament being filled
+TOURNAMENT_ID_KEY = "pong:tournament:next_id"
+
+# Seconds between two refreshes of the worker's keys, which expire after KEY_TTL
+HEARTBEAT = 5
+KEY_TTL = 3 * HEARTBEAT
+INVITE_TTL = 300
+
+# Removes every given queue entry, or none if one of them is already gone
+CLAIM_SCRIPT = """
+for _, username in ipairs(ARGV) do
+    if redis.call('HEXISTS', KEYS[1], username) == 0 then
+        return 0
+    end
+end
+for _, username in ipairs(ARGV) do
+    redis.call('HDEL', KEYS[1], username)
+end
+return 1
+"""
+
+# Takes the entry of the other side of an invitation, or waits for it
+RENDEZVOUS_SCRIPT = """
+local other = redis.call('GET', KEYS[2])
+if other then
+    redis.call('DEL', KEYS[2])
+    return other
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return false
+"""
+
+# Returns the current host, the caller becomes it when there is none
+HOST_SCRIPT = """
+local host = redis.call('GET', KEYS[1])
+if host then
+    return host
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return ARGV[1]
+"""
+
+# Refreshes (ARGV[2] set) or deletes a key, only if the caller still holds it
+HOLDER_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+if ARGV[2] then
+    return redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return redis.call('DEL', KEYS[1])
+"""
+
+def is_remote(player):
+    return hasattr(player, '_is_remote')
+
+def redis_client():
+    """
+    Client for the Redis instance of the channel layer.
+    """
+
+    from django.conf import settings
+    from redis.asyncio import Redis
+
+    host = settings.CHANNEL_LAYERS["default"]["CONFIG"]["hosts"][0]
+    if isinstance(host, str):
+        return Redis.from_url(host, decode_responses=True)
+    if isinstance(host, dict):
+        return Redis.from_url(host["address"], decode_responses=True)
+    return Redis(host=host[0], port=host[1], decode_responses=True)
+
+@database_sync_to_async
+def get_user(user_id):
+    from users.models import customUser
+    return customUser.objects.filter(id=user_id).first()
+
+class RemotePlayer:
+    """
+    Consumer connected to another worker, as seen by the worker owning its
+    match or tournament. Everything sent to it is relayed to its channel
+    from an outbound queue, like a local consumer's socket writes, so the
+    tick never waits on Redis.
+    """
+
+    def __init__(self, cluster, entry):
+        self.cluster = cluster
+        self.channel_name = entry["channel"]
+        self.worker = entry["worker"]
+        self.frame_format = entry.get("frame_format", JSON)
+        self.user = SimpleNamespace(
+            id=entry["user_id"],
+            username=entry["username"],
+            nickname=entry.get("nickname"),
+            elo=entry.get("elo", 1000),
+        )
+        self.outbound = OutboundQueue(
+            self.relay,
+            game_setting('PONG_OUTBOUND_QUEUE_SIZE', 64),
+            self.relay_overflow,
+            transient=True,
+        )
+        self._is_remote = True
+
+    async def load_user(self):
+        """
+        Swap the queue snapshot for the user model, the ELO updates save it.
+        """
+
+        user = await get_user(self.user.id)
+        if user is not None:
+            self.user = user
+
+    async def send(self, text_data=None, bytes_data=None, close=False):
+        self.outbound.put_control({"text_data": text_data, "bytes_data": bytes_data, "frame": False})
+
+    async def send_frame(self, text_data=None, bytes_data=None):
+        # No frame key, merge_frames() would drop it: relay() defaults to frame=True
+        self.outbound.put_frame({"text_data": text_data} if text_data is not None else {"bytes_data": bytes_data})
+
+    async def relay(self, text_data=None, bytes_data=None, frame=True):
+        await self.cluster.relay(self.channel_name, text_data, bytes_data, frame)
+
+    async def relay_overflow(self):
+        logger.warning(f"Relais vers {self.user.username} bloqué, messages suivants perdus")
+
+    # CHECK USER=USER
+    def __eq__(self, other):
+        if not hasattr(other, 'user'):
+            return False
+        return self.user.id == other.user.id
+
+    def __hash__(self):
+        return hash(f"remote_{self.user.id}")
+
+class PongCluster:
+    """
+    ╔═══════════════════════════════════════════════════╗
+    ║                 PongCluster                       ║
+    ╠═══════════════════════════════════════════════════╣
+    ║ This worker's side of the shared game state       ║
+    ║                                                   ║
+    ║ • Listens on a channel of its own for commands    ║
+    ║ • Publishes and claims the queued players         ║
+    ║ • Routes inputs and forfeits to the match owner   ║
+    ║ • Elects the worker filling the next tournament   ║
+    ╚═══════════════════════════════════════════════════╝
+    """
+
+    # One cluster member per process
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(PongCluster, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """
+        Disabled unless PONG_CLUSTER is set, the managers then stay local.
+        """
+        if self._initialized:
+            return
+
+        self.enabled = game_setting('PONG_CLUSTER', False)
+        self.lobby = None
+        self.tournaments = None
+        self.channel = None
+        self.layer = None
+        self.redis = None
+        # Consumers of this worker waiting on an invitation, by channel name
+        self.local_players = {}
+        # Proxies of the players in the tournaments of this worker, by channel name
+        self.remote_players = {}
+        self._starting = None
+        self._tasks = []
+        self._initialized = True
+
+    async def start(self):
+        """
+        Join the cluster, on the first call from the running loop.
+        """
+
+        if self._starting is None:
+            self._starting = asyncio.ensure_future(self.join())
+        await self._starting
+
+    async def join(self):
+        self.layer = get_channel_layer()
+        self.redis = redis_client()
+        self.claim_script = self.redis.register_script(CLAIM_SCRIPT)
+        self.rendezvous_script = self.redis.register_script(RENDEZVOUS_SCRIPT)
+        self.host_script = self.redis.register_script(HOST_SCRIPT)
+        self.holder_script = self.redis.register_script(HOLDER_SCRIPT)
+        self.channel = await self.layer.new_channel("pong.worker")
+        await self.heartbeat()
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self.listen()), loop.create_task(self.beat())]
+        logger.info(f"Worker {self.channel} dans le cluster")
+
+    #===========================================================#
+    #                MESSAGES                                   #
+    #===========================================================#
+
+    async def relay(self, channel, text_data, bytes_data, frame):
+        """
+        Send a message to the consumer behind a RemotePlayer. A full channel
+        drops game frames, the next one carries the newer state.
+        """
+
+        try:
+            await self.layer.send(channel, {
+                "type": "pong.relay",
+                "text": text_data,
+                "bytes": bytes_data,
+                "frame": frame,
+                "owner": self.channel,
+            })
+        except ChannelFull:
+            if not frame:
+                logger.warning(f"Canal {channel} plein, message perdu")
+
+    async def forward(self, worker, message):
+        await self.start()
+        await self.layer.send(worker, message)
+
+    async def listen(self):
+        while True:
+            message = await self.layer.receive(self.channel)
+            try:
+                await self.dispatch(message)
+            except Exception as e:
+                logger.error(f"Erreur sur le message {message.get('type')}: {e}", exc_info=True)
+
+    async def dispatch(self, message):
+        kind = message["type"]
+        if kind == "pong.input":
+            match_data = self.lobby.active_matches.get(message["match_id"])
+            if match_data:
+                match_data["game_state"].queue_input(f"player{message['player_number']}", message["input"], message["seq"])
+        elif kind == "pong.leave":
+            await self.handle_leave(message["match_id"], message["user_id"])
+        elif kind == "pong.forfeit":
+            await self.handle_forfeit(message["user_id"])
+        elif kind == "pong.tournament":
+            await self.handle_tournament(message)
+
+    async def beat(self):
+        while True:
+            await asyncio.sleep(HEARTBEAT)
+            try:
+                await self.heartbeat()
+            except Exception as e:
+                logger.error(f"Heartbeat du cluster impossible: {e}")
+
+    async def heartbeat(self):
+        """
+        Keep this worker, the players it hosts and its open tournament alive.
+        """
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.set(WORKER_KEY.format(self.channel), 1, ex=KEY_TTL)
+            for user_id in self.hosted_users():
+                pipe.set(PLAYER_KEY.format(user_id), self.channel, ex=KEY_TTL)
+            await pipe.execute()
+        await self.holder_script(keys=[TOURNAMENT_HOST_KEY], args=[self.channel, KEY_TTL * 4])
+
+    def hosted_users(self):
+        users = set()
+        if self.lobby is not None:
+            users.update(self.lobby.active_matches.by_user)
+        if self.tournaments is not None:
+            users.update(self.tournaments.players_by_user)
+        return users
+
+    #===========================================================#
+    #                MATCHMAKING QUEUE                          #
+    #===========================================================#
+
+    def player_entry(self, player):
+        """
+        What other workers need to know about a local consumer.
+        """
+
+        user = player.user
+        return {
+            "channel": player.channel_name,
+            "worker": self.channel,
+            "user_id": user.id,
+            "username": user.username,
+            "nickname": getattr(user, 'nickname', None) or None,
+            "elo": getattr(user, 'elo', 1000),
+            "frame_format": getattr(player, 'frame_format', JSON),
+            "joined_at": time.time(),
+        }
+
+    async def enqueue(self, player):
+        """
+        Publish a queued consumer. API players have no channel to relay to,
+        they only meet other players on their own worker.
+        """
+
+        if not self.enabled or hasattr(player, '_is_api'):
+            return
+        await self.start()
+        await self.redis.hset(QUEUE_KEY, player.user.username, json.dumps(self.player_entry(player)))
+
+    async def sync_queue(self, lobby):
+        """
+        Mirror the players queued on the other workers into waiting_players.
+        """
+
+        if not self.enabled:
+            return
+        await self.start()
+        remote = {}
+        for raw in (await self.redis.hgetall(QUEUE_KEY)).values():
+            entry = json.loads(raw)
+            if entry["worker"] != self.channel:
+                remote[entry["username"]] = entry
+
+        # Entries left behind by a worker that died
+        workers = sorted({entry["worker"] for entry in remote.values()})
+        if workers:
+            alive = await self.redis.mget([WORKER_KEY.format(worker) for worker in workers])
+            dead = {worker for worker, flag in zip(workers, alive) if flag is None}
+            if dead:
+                stale = [username for username, entry in remote.items() if entry["worker"] in dead]
+                await self.redis.hdel(QUEUE_KEY, *stale)
+                for username in stale:
+                    del remote[username]
+
+        loop_now, now = asyncio.get_event_loop().time(), time.time()
+        for player, _, _ in lobby.waiting_players:
+            if is_remote(player):
+                current = remote.pop(player.user.username, None)
+                if current is None or current["channel"] != player.channel_name:
+                    lobby.waiting_players.remove(player)
+                    if current is not None:
+                        remote[player.user.username] = current
+        for entry in sorted(remote.values(), key=lambda entry: entry["joined_at"]):
+            lobby.waiting_players.add(RemotePlayer(self, entry), loop_now - (now - entry["joined_at"]), entry["elo"])
+
+    async def claim(self, players):
+        """
+        Take the players of a new match out of the shared queue. False when
+        another worker matched one of them first.
+        """
+
+        if not self.enabled:
+            return True
+        await self.start()
+        usernames = [player.user.username for player in players if not is_bot(player) and not hasattr(player, '_is_api')]
+        if usernames and not await self.claim_script(keys=[QUEUE_KEY], args=usernames):
+            return False
+        for player in players:
+            if is_remote(player):
+                await player.load_user()
+        return True
+
+    async def track(self, players):
+        """
+        Route the REST forfeits of these players to this worker.
+        """
+
+        if not self.enabled:
+            return
+        await self.start()
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for player in players:
+                if not is_bot(player):
+                    pipe.set(PLAYER_KEY.format(player.user.id), self.channel, ex=KEY_TTL)
+            await pipe.execute()
+
+    async def leave(self, player):
+        """
+        A local player left the queue or its match: drop its queue entry and
+        forward the forfeit to the worker owning the match.
+        """
+
+        if not self.enabled or is_remote(player):
+            return
+        await self.start()
+        self.local_players.pop(getattr(player, 'channel_name', None), None)
+        await self.redis.hdel(QUEUE_KEY, player.user.username)
+        owner = getattr(player, 'match_owner', None)
+        match_id = getattr(player, 'match_id', None)
+        if owner and owner != self.channel and match_id and match_id not in self.lobby.active_matches:
+            await self.forward(owner, {"type": "pong.leave", "match_id": match_id, "user_id": player.user.id})
+
+    async def handle_leave(self, match_id, user_id):
+        match_data = self.lobby.active_matches.get(match_id)
+        if not match_data:
+            return
+        player = next((p for p in match_data["players"] if is_remote(p) and p.user.id == user_id), None)
+        if player is not None:
+            # Inactive for the scheduler, the opponent wins by forfeit
+            player.match_id = None
+            await self.lobby.remove_player(player)
+
+    async def forfeit(self, user_id):
+        """
+        REST forfeit of a player whose match or tournament is on another
+        worker. Returns True when it was forwarded.
+        """
+
+        await self.start()
+        owner = await self.redis.get(PLAYER_KEY.format(user_id))
+        if not owner or owner == self.channel:
+            return False
+        await self.forward(owner, {"type": "pong.forfeit", "user_id": user_id})
+        return True
+
+    async def handle_forfeit(self, user_id):
+        found = self.lobby.active_matches.for_user(user_id)
+        if found:
+            _, match_data, number = found
+            player = match_data["players"][number - 1]
+            if is_remote(player):
+                player.match_id = None
+            await self.lobby.remove_player(player)
+            return
+        player = self.tournaments.find_player(user_id) if self.tournaments is not None else None
+        if player is not None:
+            await self.tournaments.handle_player_disconnect(player)
+
+    #===========================================================#
+    #                INVITATIONS                                #
+    #===========================================================#
+
+    async def rendezvous(self, game_id, role, player):
+        """
+        Meet the other side of an invitation, whatever its worker.
+        Returns the other player once both joined, None while waiting.
+        """
+
+        await self.start()
+        other_role = "recipient" if role == "creator" else "creator"
+        raw = await self.rendezvous_script(
+            keys=[INVITE_KEY.format(game_id, role), INVITE_KEY.format(game_id, other_role)],
+            args=[json.dumps(self.player_entry(player)), INVITE_TTL],
+        )
+        if raw is None:
+            self.local_players[player.channel_name] = player
+            return None
+
+        entry = json.loads(raw)
+        if entry["worker"] == self.channel:
+            local = self.local_players.pop(entry["channel"], None)
+            if local is not None:
+                return local
+        other = RemotePlayer(self, entry)
+        await other.load_user()
+        return other
+
+    #===========================================================#
+    #                TOURNAMENTS                                #
+    #===========================================================#
+
+    async def tournament_host(self):
+        """
+        Worker filling the next tournament, this one if there is none.
+        """
+
+        await self.start()
+        return await self.host_script(keys=[TOURNAMENT_HOST_KEY], args=[self.channel, KEY_TTL * 4])
+
+    async def release_tournament_host(self):
+        if self.enabled:
+            await self.holder_script(keys=[TOURNAMENT_HOST_KEY], args=[self.channel])
+
+    async def next_tournament_id(self):
+        await self.start()
+        return await self.redis.incr(TOURNAMENT_ID_KEY)
+
+    async def handle_tournament(self, message):
+        """
+        Tournament commands of the consumers of other workers.
+        """
+
+        action = message["action"]
+        if action == "join":
+            player = RemotePlayer(self, message["entry"])
+            await player.load_user()
+            self.remote_players[player.channel_name] = player
+            await self.tournaments.join_player(player)
+            return
+
+        player = self.remote_players.get(message["channel"])
+        if player is None:
+            return
+        if action == "input":
+            await self.tournaments.handle_player_input(player, message["input"], message["seq"])
+        elif action == "leave":
+            if hasattr(player, 'tournament_id') and not hasattr(player, 'match_id'):
+                await self.tournaments.handle_player_disconnect(player)
+                del self.remote_players[player.channel_name]
+                await player.send(text_data=json.dumps({
+                    "type": "tournament_left",
+                    "message": "Vous avez quitté le tournoi"
+                }))
+        elif action == "disconnect":
+            del self.remote_players[player.channel_name]
+            tournament = self.tournaments.tournaments.get(getattr(player, 'tournament_id', None))
+            if tournament and not tournament.get("complete", False):
+                await self.tournaments.handle_player_disconnect(player)
@@ -1,6 +1,17 @@
 import math
 import asyncio
-from .pongHelper import CANVAS_WIDTH, CANVAS_HEIGHT, PAD_WIDTH, PAD_HEIGHT, PAD_SPEED, BALL_RADIUS, BALL_SPEED, reset_ball
+from .pongHelper import CANVAS_WIDTH, CANVAS_HEIGHT, PAD_WIDTH, PAD_HEIGHT, PAD_SPEED, BALL_RADIUS, BALL_SPEED, BASE_TICK_RATE, reset_ball
+
+# Collision modes
+DISCRETE = "discrete"
+SWEPT = "swept"
+
+# Bounces resolved within a single swept step
+MAX_SWEPT_BOUNCES = 8
+
+# Deterministic mode snaps positions and directions to multiples of 1/QUANTUM.
+# A power of two keeps every snapped value exact in a float.
+QUANTUM = 1 << 16
 
 class GameEngine:
     """
@@ -16,6 +27,22 @@ class GameEngine:
     ╚═══════════════════════════════════════════════════╝
     """
 
+    def __init__(self, tick_rate=BASE_TICK_RATE, collision_mode=DISCRETE, deterministic=False):
+        """
+        Speeds are tuned for BASE_TICK_RATE and scaled to the given rate.
+        The swept mode moves the ball along its segment and resolves every
+        wall or paddle crossing, so it cannot tunnel at any step size.
+        The deterministic mode quantizes the state after every frame, so the
+        last-bit differences of math.cos/sin between platforms never build up.
+        """
+
+        if collision_mode not in (DISCRETE, SWEPT):
+            raise ValueError(f"Unknown collision mode: {collision_mode}")
+        self.tick_rate = tick_rate
+        self.step_scale = BASE_TICK_RATE / tick_rate
+        self.collision_mode = collision_mode
+        self.deterministic = deterministic
+
     #===========================================================#
     #                GAME STATE                                 #
     #===========================================================#
@@ -26,32 +53,67 @@ class GameEngine:
         """
 
         self.update_pads(game_state)
-        self.update_ball(game_state)
-        self.collision_wall(game_state)
+        if self.collision_mode == SWEPT:
+            self.sweep_ball(game_state)
+        else:
+            self.update_ball(game_state)
+            self.collision_wall(game_state)
         self.collision_pad(game_state)
+        if self.deterministic:
+            self.quantize(game_state)
+        game_state.tick += 1
         return game_state
 
+    def step(self, game_state):
+        """
+        Advances a match by one frame and scores goals.
+        Returns (game_over, winner_username).
+        """
+
+        self.update_game_state(game_state)
+        return self.score_goals(game_state)
+
     async def check_goals(self, game_state):
         """
         Checks if a goal was scored and updates the score.
         """
 
+        return self.score_goals(game_state)
+
+    def score_goals(self, game_state):
+        """
+        Scores a goal if the ball left the field and resets it.
+        Returns (game_over, winner_username).
+        """
+
         # Player 2 scores
-        if game_state["ball"]["x"] <= 0:
+        if game_state.ball_x <= 0:
             reset_ball(game_state, "player2")
-            game_state["score"]["player2"] += 1
-            if game_state["score"]["player2"] >= 3:
-                return True, game_state["player_info"]["player2"]["username"]
+            game_state.score2 += 1
+            if game_state.score2 >= 3:
+                return True, game_state.header.player2.username
         
         # Player 1 scores
-        elif game_state["ball"]["x"] >= CANVAS_WIDTH:
+        elif game_state.ball_x >= CANVAS_WIDTH:
             reset_ball(game_state, "player1")
-            game_state["score"]["player1"] += 1
-            if game_state["score"]["player1"] >= 3:
-                return True, game_state["player_info"]["player1"]["username"]
+            game_state.score1 += 1
+            if game_state.score1 >= 3:
+                return True, game_state.header.player1.username
                 
         return False, None
 
+    def quantize(self, game_state):
+        """
+        Snaps the ball, paddles and direction to the 1/QUANTUM grid.
+        """
+
+        game_state.ball_x = round(game_state.ball_x * QUANTUM) / QUANTUM
+        game_state.ball_y = round(game_state.ball_y * QUANTUM) / QUANTUM
+        game_state.dir_x = round(game_state.dir_x * QUANTUM) / QUANTUM
+        game_state.dir_y = round(game_state.dir_y * QUANTUM) / QUANTUM
+        game_state.pad1_y = round(game_state.pad1_y * QUANTUM) / QUANTUM
+        game_state.pad2_y = round(game_state.pad2_y * QUANTUM) / QUANTUM
+
     #===========================================================#
     #                GAME PHYSICS                               #
     #===========================================================#
@@ -61,30 +123,89 @@ class GameEngine:
         Updates paddle positions based on player inputs.
         """
 
-        game_state["pads"]["player1"]["y"] += game_state["inputs"]["player1"] * PAD_SPEED
-        game_state["pads"]["player2"]["y"] += game_state["inputs"]["player2"] * PAD_SPEED
+        game_state.pad1_y += game_state.input1 * PAD_SPEED * self.step_scale
+        game_state.pad2_y += game_state.input2 * PAD_SPEED * self.step_scale
 
         # Keep paddles within canvas boundaries
-        game_state["pads"]["player1"]["y"] = max(0, min(game_state["pads"]["player1"]["y"], CANVAS_HEIGHT - PAD_HEIGHT))
-        game_state["pads"]["player2"]["y"] = max(0, min(game_state["pads"]["player2"]["y"], CANVAS_HEIGHT - PAD_HEIGHT))
+        game_state.pad1_y = max(0, min(game_state.pad1_y, CANVAS_HEIGHT - PAD_HEIGHT))
+        game_state.pad2_y = max(0, min(game_state.pad2_y, CANVAS_HEIGHT - PAD_HEIGHT))
 
     def update_ball(self, game_state):
         """
         Updates ball position based on its current direction and speed.
         """
 
-        ball_speed = game_state.get("ballSpeed", BALL_SPEED)
-        game_state["ball"]["x"] += game_state["directionBall"]["x"] * ball_speed
-        if game_state["ballTouched"]:
-            game_state["ball"]["y"] += game_state["directionBall"]["y"] * ball_speed
+        ball_speed = game_state.ball_speed * self.step_scale
+        game_state.ball_x += game_state.dir_x * ball_speed
+        if game_state.ball_touched:
+            game_state.ball_y += game_state.dir_y * ball_speed
 
     def collision_wall(self, game_state):
         """
         Handles ball collision with top and bottom walls.
         """
 
-        if game_state["ball"]["y"] <= 0 or game_state["ball"]["y"] >= CANVAS_HEIGHT - BALL_RADIUS:
-            game_state["directionBall"]["y"] *= -1
+        if game_state.ball_y <= 0 or game_state.ball_y >= CANVAS_HEIGHT - BALL_RADIUS:
+            game_state.dir_y *= -1
+
+    def sweep_ball(self, game_state):
+        """
+        Moves the ball along its path for one frame, bouncing on walls and
+        paddles at the exact point where the path crosses them.
+        """
+
+        remaining = 1.0
+        for _ in range(MAX_SWEPT_BOUNCES):
+            step = game_state.ball_speed * self.step_scale
+            vx = game_state.dir_x * step
+            vy = game_state.dir_y * step if game_state.ball_touched else 0
+            hit, t = self.first_crossing(game_state, vx, vy, remaining)
+            if hit is None:
+                break
+
+            # Move to the contact point and bounce
+            game_state.ball_x += vx * t
+            game_state.ball_y += vy * t
+            remaining -= t
+            if hit == "wall":
+                game_state.dir_y *= -1
+            else:
+                self.handle_collision(game_state, hit)
+        else:
+            return
+
+        game_state.ball_x += vx * remaining
+        game_state.ball_y += vy * remaining
+
+    def first_crossing(self, game_state, vx, vy, remaining):
+        """
+        Returns the first obstacle crossed within the remaining fraction of
+        the frame, with the fraction at which it is reached.
+        """
+
+        x, y = game_state.ball_x, game_state.ball_y
+        hit, first = None, remaining
+
+        # Top and bottom walls
+        if vy < 0 and y + vy * remaining <= 0:
+            hit, first = "wall", max(0.0, -y / vy)
+        elif vy > 0 and y + vy * remaining >= CANVAS_HEIGHT - BALL_RADIUS:
+            hit, first = "wall", max(0.0, (CANVAS_HEIGHT - BALL_RADIUS - y) / vy)
+
+        # Front faces of the paddles, same vertical overlap as collision_pad
+        if vx < 0:
+            player, face, pad_y = "player1", game_state.pad1_x + PAD_WIDTH, game_state.pad1_y
+        elif vx > 0:
+            player, face, pad_y = "player2", game_state.pad2_x - BALL_RADIUS, game_state.pad2_y
+        else:
+            return hit, first
+        if (x - face) * vx <= 0:
+            t = (face - x) / vx
+            if t <= first:
+                y_at = y + vy * t
+                if y_at + BALL_RADIUS >= pad_y and y_at <= pad_y + PAD_HEIGHT:
+                    hit, first = player, t
+        return hit, first
 
     def collision_pad(self, game_state):
         """
@@ -92,47 +213,50 @@ class GameEngine:
         """
 
         # Left paddle (player1) collision
-        if (game_state["ball"]["x"] <= game_state["pads"]["player1"]["x"] + PAD_WIDTH and
-            game_state["ball"]["x"] >= game_state["pads"]["player1"]["x"] and
-            game_state["ball"]["y"] + BALL_RADIUS >= game_state["pads"]["player1"]["y"] and
-            game_state["ball"]["y"] <= game_state["pads"]["player1"]["y"] + PAD_HEIGHT):
+        if (game_state.ball_x <= game_state.pad1_x + PAD_WIDTH and
+            game_state.ball_x >= game_state.pad1_x and
+            game_state.ball_y + BALL_RADIUS >= game_state.pad1_y and
+            game_state.ball_y <= game_state.pad1_y + PAD_HEIGHT):
             self.handle_collision(game_state, "player1")
 
         # Right paddle (player2) collision
-        if (game_state["ball"]["x"] + BALL_RADIUS >= game_state["pads"]["player2"]["x"] and
-            game_state["ball"]["x"] <= game_state["pads"]["player2"]["x"] + PAD_WIDTH and
-            game_state["ball"]["y"] + BALL_RADIUS >= game_state["pads"]["player2"]["y"] and
-            game_state["ball"]["y"] <= game_state["pads"]["player2"]["y"] + PAD_HEIGHT):
+        if (game_state.ball_x + BALL_RADIUS >= game_state.pad2_x and
+            game_state.ball_x <= game_state.pad2_x + PAD_WIDTH and
+            game_state.ball_y + BALL_RADIUS >= game_state.pad2_y and
+            game_state.ball_y <= game_state.pad2_y + PAD_HEIGHT):
             self.handle_collision(game_state, "player2")
 
     def handle_collision(self, game_state, player):
         """
         Calculates ball bounce physics when hitting a paddle.
         """
-        pad = game_state["pads"][player]
+        if player == "player1":
+            pad_x, pad_y = game_state.pad1_x, game_state.pad1_y
+        else:
+            pad_x, pad_y = game_state.pad2_x, game_state.pad2_y
         
         # Calculate impact point relative to paddle center
-        impact = (game_state["ball"]["y"] + BALL_RADIUS / 2) - (pad["y"] + PAD_HEIGHT / 2)
+        impact = (game_state.ball_y + BALL_RADIUS / 2) - (pad_y + PAD_HEIGHT / 2)
         normalize_impact = impact / (PAD_HEIGHT / 2)
         bounce_angle = normalize_impact * (3.14159 / 3)
 
         # Set new direction based on which paddle was hit
-        game_state["directionBall"]["x"] = math.cos(bounce_angle) if player == "player1" else -math.cos(bounce_angle)
-        game_state["directionBall"]["y"] = math.sin(bounce_angle)
+        dir_x = math.cos(bounce_angle) if player == "player1" else -math.cos(bounce_angle)
+        dir_y = math.sin(bounce_angle)
 
         # Normalize vector to maintain consistent speed
-        magnitude = math.sqrt(game_state["directionBall"]["x"] ** 2 + game_state["directionBall"]["y"] ** 2)
-        game_state["directionBall"]["x"] /= magnitude
-        game_state["directionBall"]["y"] /= magnitude
+        magnitude = math.sqrt(dir_x ** 2 + dir_y ** 2)
+        game_state.dir_x = dir_x / magnitude
+        game_state.dir_y = dir_y / magnitude
 
         # Increase ball speed with each hit
-        game_state["count"] += 1
-        game_state["ballSpeed"] = 4 + (game_state["count"] * 0.3)
+        game_state.count += 1
+        game_state.ball_speed = 4 + (game_state.count * 0.3)
 
         # Adjust ball position to prevent sticking to paddle
         if player == "player1":
-            game_state["ball"]["x"] = pad["x"] + PAD_WIDTH + 1
+            game_state.ball_x = pad_x + PAD_WIDTH + 1
         else:
-            game_state["ball"]["x"] = pad["x"] - BALL_RADIUS - 1
+            game_state.ball_x = pad_x - BALL_RADIUS - 1
 
-        game_state["ballTouched"] = True
\ No newline at end of file
+        game_state.ball_touched = True
\ No newline at end of file
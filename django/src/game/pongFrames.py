@@ -0,0 +1,240 @@
+"""
+╔═══════════════════════════════════════════════════╗
+║                 PongFrames                        ║
+╠═══════════════════════════════════════════════════╣
+║ Encodes the per-tick game state frames            ║
+║                                                   ║
+║ • Full mode: the whole state every tick           ║
+║ • Delta mode: only the fields that changed        ║
+║ • Periodic keyframes to resync the clients        ║
+║ • Player info only sent with match_created        ║
+║ • Packed binary frames for negotiated clients     ║
+║ • Server time and ball velocity for interpolation ║
+║ • Last applied input sequence of each player      ║
+╚═══════════════════════════════════════════════════╝
+"""
+
+import json
+import struct
+import time
+from .pongHelper import BASE_TICK_RATE, game_setting
+
+# Frame modes
+FULL = "full"
+DELTA = "delta"
+
+# Frame formats, negotiated per connection. JSON_FULL carries the whole
+# state whatever the mode, for recipients that only keep the latest frame
+JSON = "json"
+BINARY = "binary"
+JSON_FULL = "json_full"
+
+# WebSocket subprotocol selecting the binary format
+BINARY_SUBPROTOCOL = "pong.binary.v2"
+
+# Binary frame, little-endian, 24 bytes:
+# type, tick, ball x/y, direction x/y, pad1 y, pad2 y, score1, score2, flags,
+# input acks of player1/player2 (sequence numbers modulo 2**16)
+BINARY_FRAME = struct.Struct("<BIhhhhhhBBBHH")
+BINARY_TYPES = {"game_state": 1, "game_update": 2}
+
+# Positions are sent in 1/POSITION_SCALE px, directions in 1/DIRECTION_SCALE
+POSITION_SCALE = 16
+DIRECTION_SCALE = 32767
+
+# flags bits
+FLAG_BALL_TOUCHED = 1
+
+# Snapshot frames set this bit of the type and append the server time
+# (ms since epoch) and the ball velocity (px/s)
+SNAPSHOT_TYPE_FLAG = 0x80
+BINARY_SNAPSHOT = struct.Struct("<dhh")
+
+# Keyframe period in frames, in delta mode
+KEYFRAME_INTERVAL = 50
+
+# Decimals kept for floats in delta mode, clients only draw them
+FRAME_PRECISION = 2
+
+# Wire fields: (outer key, inner key or None, GameState attribute)
+WIRE_FIELDS = (
+    ("ball", "x", "ball_x"),
+    ("ball", "y", "ball_y"),
+    ("pads", "player1", "pad1_y"),
+    ("pads", "player2", "pad2_y"),
+    ("score", "player1", "score1"),
+    ("score", "player2", "score2"),
+    ("directionBall", "x", "dir_x"),
+    ("directionBall", "y", "dir_y"),
+    ("ballSpeed", None, "ball_speed"),
+    ("ballTouched", None, "ball_touched"),
+    ("count", None, "count"),
+    ("inputs", "player1", "input1"),
+    ("inputs", "player2", "input2"),
+    ("acks", "player1", "ack1"),
+    ("acks", "player2", "ack2"),
+)
+
+class FrameEncoder:
+    """
+    Encodes the frames of one match, shared by every recipient.
+
+    Frames travel over ordered websockets, so each delta is relative to the
+    previous frame of the encoder. Keyframes let a client that missed a frame
+    (or joined late) catch up, clients deep-merge deltas into their state.
+
+    With snapshots=True (frames sent below the tick rate) every frame also
+    carries server_time and the ball velocity, for the clients to
+    interpolate and extrapolate between frames.
+    """
+
+    __slots__ = ("mode", "keyframe_interval", "snapshots", "last", "since_keyframe", "cached_tick", "cache")
+
+    def __init__(self, mode=None, keyframe_interval=None, snapshots=False):
+        self.mode = mode or game_setting('PONG_FRAME_MODE', DELTA)
+        self.snapshots = snapshots
+        self.keyframe_interval = keyframe_interval or game_setting('PONG_KEYFRAME_INTERVAL', KEYFRAME_INTERVAL)
+        self.last = None
+        self.since_keyframe = 0
+        self.cached_tick = None
+        self.cache = {}
+
+    def payload(self, consumer, message_type, game_state):
+        """
+        Keyword arguments of consumer.send() for the current frame, in the
+        format negotiated by that consumer. Each format is encoded once per tick.
+        """
+
+        if self.cached_tick != game_state.tick:
+            self.cached_tick = game_state.tick
+            self.cache.clear()
+        frame_format = getattr(consumer, "frame_format", JSON)
+        payload = self.cache.get(frame_format)
+        if payload is None:
+            if frame_format == BINARY:
+                payload = {"bytes_data": self.binary(message_type, game_state)}
+            else:
+                payload = {"text_data": self.message(message_type, game_state, full=frame_format == JSON_FULL)}
+            self.cache[frame_format] = payload
+        return payload
+
+    def encode(self, game_state, full=False):
+        """
+        Returns the game_state payload of the next frame, the whole state
+        with full=True. Full frames leave the delta baseline alone.
+        """
+
+        if full or self.mode == FULL:
+            payload = game_state.to_dict()
+        else:
+            payload = self.encode_delta(game_state)
+
+        if self.snapshots:
+            velocity_x, velocity_y = ball_velocity(game_state)
+            payload["server_time"] = round(time.time() * 1000, 1)
+            payload["velocity"] = {"x": round(velocity_x, FRAME_PRECISION), "y": round(velocity_y, FRAME_PRECISION)}
+        return payload
+
+    def encode_delta(self, game_state):
+        """
+        Fields changed since the previous frame, or all of them on keyframes.
+        """
+
+        values = tuple(
+            round(value, FRAME_PRECISION) if isinstance(value, float) else value
+            for value in (getattr(game_state, attribute) for _, _, attribute in WIRE_FIELDS)
+        )
+        keyframe = self.last is None or self.since_keyframe >= self.keyframe_interval
+        payload = {"tick": game_state.tick}
+        if keyframe:
+            payload["keyframe"] = True
+            self.since_keyframe = 0
+        else:
+            self.since_keyframe += 1
+
+        for (outer, inner, attribute), value, old in zip(WIRE_FIELDS, values, self.last or values):
+            if not keyframe and value == old:
+                continue
+            if attribute == "pad1_y" or attribute == "pad2_y":
+                # Paddles keep the {"x", "y"} shape, x never changes after match_created
+                payload.setdefault(outer, {})[inner] = {"y": value}
+            elif inner is None:
+                payload[outer] = value
+            else:
+                payload.setdefault(outer, {})[inner] = value
+        self.last = values
+
+        # Tournament clients route frames by match_id
+        if game_state.header.match_id:
+            payload["match_id"] = game_state.header.match_id
+        return payload
+
+    def message(self, message_type, game_state, full=False):
+        """
+        Serialized websocket message carrying the next frame.
+        """
+
+        return json.dumps({"type": message_type, "game_state": self.encode(game_state, full)})
+
+    def binary(self, message_type, game_state):
+        """
+        Packed frame with the fields the clients draw, see BINARY_FRAME,
+        followed by BINARY_SNAPSHOT in snapshot mode.
+        """
+
+        frame_type = BINARY_TYPES[message_type]
+        if self.snapshots:
+            frame_type |= SNAPSHOT_TYPE_FLAG
+        frame = BINARY_FRAME.pack(
+            frame_type,
+            game_state.tick,
+            quantize(game_state.ball_x, POSITION_SCALE),
+            quantize(game_state.ball_y, POSITION_SCALE),
+            quantize(game_state.dir_x, DIRECTION_SCALE),
+            quantize(game_state.dir_y, DIRECTION_SCALE),
+            quantize(game_state.pad1_y, POSITION_SCALE),
+            quantize(game_state.pad2_y, POSITION_SCALE),
+            min(game_state.score1, 255),
+            min(game_state.score2, 255),
+            FLAG_BALL_TOUCHED if game_state.ball_touched else 0,
+            game_state.ack1 & 0xFFFF,
+            game_state.ack2 & 0xFFFF,
+        )
+        if not self.snapshots:
+            return frame
+        velocity_x, velocity_y = ball_velocity(game_state)
+        return frame + BINARY_SNAPSHOT.pack(time.time() * 1000, quantize(velocity_x, 1), quantize(velocity_y, 1))
+
+def ball_velocity(game_state):
+    """
+    Ball velocity in px per second, the same at every tick rate.
+    """
+
+    speed = game_state.ball_speed * BASE_TICK_RATE
+    return game_state.dir_x * speed, (game_state.dir_y * speed if game_state.ball_touched else 0.0)
+
+def quantize(value, scale):
+    """
+    Fixed point value clamped to a signed 16-bit integer.
+    """
+
+    return max(-32768, min(32767, round(value * scale)))
+
+def merge_frames(old, new):
+    """
+    send() arguments of one frame standing for two consecutive ones.
+    Binary frames hold the whole state, JSON deltas are merged field by field.
+    """
+
+    if "text_data" not in new or "text_data" not in old:
+        return new
+    merged, frame = json.loads(old["text_data"]), json.loads(new["text_data"])
+    merge_into(merged, frame)
+    return {"text_data": json.dumps(merged)}
+
+def merge_into(target, source):
+    for key, value in source.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            merge_into(target[key], value)
+        else:
+            target[key] = value
@@ -13,7 +13,8 @@
 
 from datetime import datetime
 import math
-from random import random
+from random import SystemRandom
+from .pongState import GameState, MatchHeader, MatchRng, PlayerInfo
 
 # Game constants
 CANVAS_WIDTH = 800
@@ -24,6 +25,20 @@ PAD_SPEED = 8
 BALL_RADIUS = 7
 BALL_SPEED = 5
 
+# Speeds above are expressed per tick at this rate
+BASE_TICK_RATE = 50
+
+def game_setting(name, default):
+    """
+    Returns a Django setting, or the default outside of a configured project.
+    """
+
+    try:
+        from django.conf import settings
+        return getattr(settings, name, default)
+    except Exception:
+        return default
+
 def get_display_name(user):
     """
     Returns the display name for a user, using nickname if available.e
@@ -31,61 +46,68 @@ def get_display_name(user):
 
     return user.nickname if hasattr(user, 'nickname') and user.nickname else user.username
 
-def create_initial_game_state(player1, player2, match_id=None, tournament_id=None):
+def get_player_info(player):
+    """
+    Builds the static player info of a consumer for the match header.
+    """
+
+    return PlayerInfo(
+        username=player.user.username,
+        nickname=player.user.nickname if hasattr(player.user, 'nickname') and player.user.nickname else None,
+        elo=player.user.elo
+    )
+
+def new_match_seed():
+    """
+    Returns a fresh 32-bit seed for a match RNG.
+    """
+
+    return SystemRandom().getrandbits(32)
+
+def create_initial_game_state(player1, player2, match_id=None, tournament_id=None, seed=None):
     """
     Creates the initial game state for a Pong match.
     """
 
-    game_state = {
-        "ball": {"x": CANVAS_WIDTH / 2 - BALL_RADIUS / 2, "y": CANVAS_HEIGHT / 2 - BALL_RADIUS / 2},
-        "pads": {
-            "player1": {"x": 10, "y": (CANVAS_HEIGHT - PAD_HEIGHT) / 2},
-            "player2": {"x": CANVAS_WIDTH - PAD_WIDTH - 10, "y": (CANVAS_HEIGHT - PAD_HEIGHT) / 2},
-        },
-        "score": {"player1": 0, "player2": 0},
-        "directionBall": {"x": 1 if random() < 0.5 else -1, "y": 1 if random() < 0.5 else -1},
-        "ballTouched": False,
-        "count": 0,
-        "inputs": {"player1": 0, "player2": 0},
-        "player_info": {
-            "player1": {
-                "username": player1.user.username,
-                "nickname": player1.user.nickname if hasattr(player1.user, 'nickname') and player1.user.nickname else None,
-                "elo": player1.user.elo
-            },
-            "player2": {
-                "username": player2.user.username,
-                "nickname": player2.user.nickname if hasattr(player2.user, 'nickname') and player2.user.nickname else None,
-                "elo": player2.user.elo
-            }
-        }
-    }
-
-    if match_id:
-        game_state["match_id"] = match_id
-
-    if tournament_id:
-        game_state["tournament_id"] = tournament_id
+    if seed is None:
+        seed = new_match_seed()
+    header = MatchHeader(get_player_info(player1), get_player_info(player2), match_id, tournament_id, seed)
+    return build_game_state(header)
 
-    return game_state
+def build_game_state(header):
+    """
+    Builds the opening state of a match from its header.
+    Every match draws from its own RNG seeded with header.seed, so the
+    header and the inputs are enough to replay it.
+    """
+
+    rng = MatchRng(header.seed if header.seed is not None else new_match_seed())
+    return GameState(
+        header,
+        ball=(CANVAS_WIDTH / 2 - BALL_RADIUS / 2, CANVAS_HEIGHT / 2 - BALL_RADIUS / 2),
+        direction=(1 if rng.random() < 0.5 else -1, 1 if rng.random() < 0.5 else -1),
+        pads=((10, (CANVAS_HEIGHT - PAD_HEIGHT) / 2), (CANVAS_WIDTH - PAD_WIDTH - 10, (CANVAS_HEIGHT - PAD_HEIGHT) / 2)),
+        ball_speed=BALL_SPEED,
+        rng=rng
+    )
 
 def reset_ball(game_state, scorer=None):
     """
     Resets the ball to the center of the game after a score.
     """
 
-    game_state["ball"]["x"] = CANVAS_WIDTH / 2 - BALL_RADIUS / 2
-    game_state["ball"]["y"] = CANVAS_HEIGHT / 2 - BALL_RADIUS / 2
+    game_state.ball_x = CANVAS_WIDTH / 2 - BALL_RADIUS / 2
+    game_state.ball_y = CANVAS_HEIGHT / 2 - BALL_RADIUS / 2
 
     if scorer:
-        game_state["directionBall"]["x"] = 1 if scorer == "player1" else -1
+        game_state.dir_x = 1 if scorer == "player1" else -1
     else:
-        game_state["directionBall"]["x"] = 1 if random() < 0.5 else -1
+        game_state.dir_x = 1 if game_state.rng.random() < 0.5 else -1
 
-    game_state["directionBall"]["y"] = 1 if random() < 0.5 else -1
-    game_state["ballSpeed"] = BALL_SPEED
-    game_state["count"] = 0
-    game_state["ballTouched"] = False
+    game_state.dir_y = 1 if game_state.rng.random() < 0.5 else -1
+    game_state.ball_speed = BALL_SPEED
+    game_state.count = 0
+    game_state.ball_touched = False
 
     return game_state
 
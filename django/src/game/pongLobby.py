@@ -2,7 +2,14 @@ import asyncio
 import json
 import logging
 from datetime import datetime
-from game.pongHelper import calculate_elo_change, now_str, create_initial_game_state
+from game.pongHelper import calculate_elo_change, now_str, create_initial_game_state, game_setting
+from game.pongScheduler import TickScheduler
+from game.pongBots import BotPlayer, BOT_LEVELS, bot_level_for_elo, is_bot
+from game.pongCluster import PongCluster, is_remote
+from game.pongCheckpoint import Checkpointer
+from game.pongQueue import MatchmakingQueue, MAX_ELO_GAP, MAX_WAIT
+from game.pongMatchmaker import Matchmaker
+from game.pongMatchIndex import ActiveMatches
 from random import random
 from channels.db import database_sync_to_async
 
@@ -17,9 +24,14 @@ class LobbyManager:
     ║ Matchmaking system for Pong games                 ║
     ║                                                   ║
     ║ • Manages player queue and ELO-based matching     ║
+    ║ • Pairs players from a single matchmaking loop    ║
     ║ • Creates and tracks active game sessions         ║
+    ║ • Finds a player's match by user id in O(1)       ║
     ║ • Handles invitations and direct challenges       ║
     ║ • Processes disconnections and game forfeitures   ║
+    ║ • Fills long waits with server-side bots          ║
+    ║ • Shares its queue with the other workers         ║
+    ║ • Checkpoints its matches for a restarted worker  ║
     ╚═══════════════════════════════════════════════════╝
     """
 
@@ -39,10 +51,25 @@ class LobbyManager:
         if self._initialized:
             return
             
-        self.waiting_players = []
-        self.active_matches = {}
+        # File d'attente indexée par ELO, itérable comme (joueur, timestamp, elo)
+        self.waiting_players = MatchmakingQueue()
+        # Matchs en cours, indexés aussi par user id des joueurs
+        self.active_matches = ActiveMatches()
         self.invited_games = {}
         self.matchmaking_lock = asyncio.Lock()
+        # Joins, leaves and pairing passes, one at a time (PONG_MATCHMAKING_INTERVAL)
+        self.matchmaker = Matchmaker()
+        self.matchmaker.lobby = self
+        self.scheduler = TickScheduler()
+        # Seconds in queue before a bot is offered, 0 (default) disables bots
+        self.bot_fill_timeout = game_setting('PONG_BOT_FILL_TIMEOUT', 0)
+        self.bot_level = game_setting('PONG_BOT_LEVEL', None)
+        # Queue and match owners shared with the other workers (PONG_CLUSTER)
+        self.cluster = PongCluster()
+        self.cluster.lobby = self
+        # Running matches, restored after a restart (PONG_CHECKPOINT)
+        self.checkpoints = Checkpointer()
+        self.checkpoints.lobby = self
         self._initialized = True
         logger.info("LobbyManager initialisé")
 
@@ -66,7 +93,7 @@ class LobbyManager:
             match_id = f"invite_{player1.user.username}_vs_{player2.user.username}_{now_str()}"
 
         # Initial game state
-        game_state = create_initial_game_state(player1, player2)
+        game_state = create_initial_game_state(player1, player2, match_id)
 
         # Assign match ID
         player1.match_id = match_id
@@ -83,19 +110,15 @@ class LobbyManager:
         logger.info(f"Match {match_id} créé et stocké dans active_matches")
         print(f"Match {match_id} created and stored in active_matches")
 
-        # Stop matchmaking
-        if hasattr(player1, 'match_task') and player1.match_task:
-            player1.match_task.cancel()
-        if hasattr(player2, 'match_task') and player2.match_task:
-            player2.match_task.cancel()
-
         # Notify players
         await player1.send(text_data=json.dumps({
             "type": "match_created",
             "match_id": match_id,
             "player_number": 1,
             "opponent": player2.user.username,
-            "game_state": game_state
+            "game_state": game_state.to_dict(),
+            "tick_rate": self.scheduler.tick_rate,
+            "snapshot_rate": self.scheduler.snapshot_rate
         }))
 
         await player2.send(text_data=json.dumps({
@@ -103,7 +126,9 @@ class LobbyManager:
             "match_id": match_id,
             "player_number": 2,
             "opponent": player1.user.username,
-            "game_state": game_state
+            "game_state": game_state.to_dict(),
+            "tick_rate": self.scheduler.tick_rate,
+            "snapshot_rate": self.scheduler.snapshot_rate
         }))
 
         # Cleanup invited game
@@ -116,7 +141,8 @@ class LobbyManager:
         try:
             logger.info(f"Démarrage de la boucle de jeu pour le match {match_id}")
             print(f"Starting game loop for match {match_id}")
-            asyncio.create_task(player1.run_game_loop(match_id))
+            await self.game_loop_host(player1, player2).run_game_loop(match_id)
+            await self.cluster.track((player1, player2))
         except Exception as e:
             logger.error(f"Erreur lors du démarrage de la boucle de jeu: {e}")
             print(f"Error starting game loop: {e}")
@@ -129,8 +155,11 @@ class LobbyManager:
 
     async def add_player_to_queue(self, player):
         """
-        Add a player to the matchmaking queue.
+        Add a player to the matchmaking queue, True when a match was found
+        right away. Called by the Matchmaker, under matchmaking_lock.
         """
+        await self.checkpoints.start()
+
         # Vérifier si joueur est déjà dans un match
         if hasattr(player, 'match_id') and player.match_id:
             logger.warning(f"Joueur {player.user.username} déjà dans un match actif {player.match_id}, ne peut pas rejoindre la file d'attente")
@@ -140,32 +169,21 @@ class LobbyManager:
             }))
             return
 
-        # Vérifier si joueur est déjà dans la file d'attente
-        for existing_player, _, _ in self.waiting_players:
-            if existing_player == player:
-                logger.info(f"Joueur {player.user.username} déjà dans la file d'attente")
-                print(f"Player {player.user.username} is already in queue")
-                return
-        
-        logger.info(f"Ajout de {player.user.username} à la file d'attente de matchmaking")
-        print(f"Adding {player.user.username} to matchmaking queue")
-        
         # Timestamp pour le temps d'attente
         current_time = asyncio.get_event_loop().time()
         
         # ELO du joueur pour matchmaking basé sur niveau
         player_elo = player.user.elo if hasattr(player.user, 'elo') else 1000
         
-        # Ajouter à la file d'attente
-        self.waiting_players.append((
-            player, 
-            current_time,
-            player_elo
-        ))
-        
-        # Afficher tous les joueurs en attente pour debug
-        wait_players_info = [(p.user.username, ts, elo) for p, ts, elo in self.waiting_players if hasattr(p, 'user')]
-        logger.info(f"Joueurs en attente: {wait_players_info}")
+        # Ajouter à la file d'attente, sauf si le joueur y est déjà
+        if not self.waiting_players.add(player, current_time, player_elo):
+            logger.info(f"Joueur {player.user.username} déjà dans la file d'attente")
+            print(f"Player {player.user.username} is already in queue")
+            return
+
+        logger.info(f"Ajout de {player.user.username} à la file d'attente de matchmaking ({len(self.waiting_players)} joueurs en attente)")
+        print(f"Adding {player.user.username} to matchmaking queue")
+        await self.cluster.enqueue(player)
         
         # Notifier le joueur qu'il est en attente
         await player.send(text_data=json.dumps({
@@ -175,7 +193,7 @@ class LobbyManager:
         }))
         
         # Essayer de trouver un match immédiatement
-        await self.find_match_for_player(player)
+        return await self.find_match_for_player(player)
 
     async def find_match_for_player(self, player):
         """
@@ -187,61 +205,31 @@ class LobbyManager:
         
         # Récupérer l'ELO du joueur
         my_elo = player.user.elo if hasattr(player.user, 'elo') else 1000
-        best_match = None
-        min_elo_diff = float('inf')
+        now = asyncio.get_event_loop().time()
         
         logger.info(f"Recherche d'un match pour {player.user.username} (ELO: {my_elo})")
         
-        # Parcourir tous les joueurs en attente
-        for i, (waiting_player, timestamp, elo) in enumerate(self.waiting_players):
-            # Ne pas matcher avec soi-même
-            if waiting_player == player:
-                continue
-            
-            # Vérifier si le joueur est déjà dans un match
-            if hasattr(waiting_player, 'match_id') and waiting_player.match_id:
-                logger.warning(f"Joueur {waiting_player.user.username} déjà dans un match, ignoré")
-                continue
-                
-            # Calculer la différence d'ELO avec ajustement temporel
-            elo_diff = abs(my_elo - elo)
-            wait_time = asyncio.get_event_loop().time() - timestamp
-            adjusted_diff = elo_diff / (1 + 0.1 * wait_time)
-            
-            # Vérifier le type de client (API vs WebSocket)
-            is_api_mix = (hasattr(player, '_is_api') != hasattr(waiting_player, '_is_api'))
-            
-            logger.debug(f"Candidat: {waiting_player.user.username}, ELO: {elo}, diff: {elo_diff}, wait: {wait_time:.1f}s, adjusted: {adjusted_diff:.1f}, API mix: {is_api_mix}")
-            
-            # Favoriser légèrement les matchs entre clients API et web pour le test
-            if is_api_mix:
-                adjusted_diff *= 0.8  # 20% de bonus pour faciliter le match API-Web
-            
-            # Gardons le meilleur match
-            if adjusted_diff < min_elo_diff:
-                min_elo_diff = adjusted_diff
-                best_match = (i, waiting_player)
+        # Meilleur adversaire parmi les ELO voisins
+        best_match = self.waiting_players.best_opponent(player, my_elo, now)
         
         # Faire le match si on en trouve un bon ou si l'attente est longue
-        if best_match and (min_elo_diff < 200 or 
-                          asyncio.get_event_loop().time() - self.waiting_players[best_match[0]][1] > 10):
-            matched_idx, matched_player = best_match
+        if best_match and (best_match[0] < MAX_ELO_GAP or now - best_match[1][1] > MAX_WAIT):
+            min_elo_diff, (matched_player, _, matched_elo) = best_match
             
             # Log détaillé du match
             is_api_p1 = hasattr(player, '_is_api')
             is_api_p2 = hasattr(matched_player, '_is_api')
             logger.info(f"Match trouvé: {player.user.username} (ELO {my_elo}, {'API' if is_api_p1 else 'WEB'}) vs "
-                        f"{matched_player.user.username} (ELO {self.waiting_players[matched_idx][2]}, {'API' if is_api_p2 else 'WEB'}), "
+                        f"{matched_player.user.username} (ELO {matched_elo}, {'API' if is_api_p2 else 'WEB'}), "
                         f"diff: {min_elo_diff:.2f}")
             
-            # Supprimer le joueur de la file d'attente
-            try:
-                del self.waiting_players[matched_idx]
-            except Exception as e:
-                logger.error(f"Erreur lors de la suppression du joueur {matched_player.user.username} de la file d'attente: {e}")
-            
-            # Créer la partie
-            await self.create_match(player, matched_player)
+            # Créer la partie, un autre worker a pu prendre l'adversaire
+            if not await self.create_match(player, matched_player):
+                return False
+
+            # Supprimer les deux joueurs de la file d'attente
+            self.waiting_players.remove(player)
+            self.waiting_players.remove(matched_player)
             return True
         
         logger.debug(f"Aucun match trouvé pour {player.user.username}")
@@ -251,96 +239,97 @@ class LobbyManager:
         """
         Try to find matches for all players in the waiting queue.
         """
-        if len(self.waiting_players) < 2:
+        if not self.waiting_players:
             return 0
-            
+
+        # Joueurs en attente sur les autres workers
+        await self.cluster.sync_queue(self)
+
         matches_created = 0
-        players_to_remove = []
-        
-        # Log des joueurs en attente
-        wait_players_info = [(p.user.username, ts, elo) for p, ts, elo in self.waiting_players if hasattr(p, 'user')]
-        logger.info(f"Recherche de matchs pour {len(self.waiting_players)} joueurs en attente: {wait_players_info}")
+        logger.info(f"Recherche de matchs pour {len(self.waiting_players)} joueurs en attente")
         
         # Parcourir tous les joueurs en attente (du plus ancien au plus récent)
-        for i, (player, timestamp, player_elo) in enumerate(self.waiting_players):
-            if i in players_to_remove:
+        for player, timestamp, player_elo in self.waiting_players:
+            # Déjà retiré pendant ce passage
+            if player not in self.waiting_players:
                 continue
                 
             # Vérifier si le joueur est déjà dans un match
             if hasattr(player, 'match_id') and player.match_id:
                 logger.warning(f"Joueur {player.user.username} déjà dans un match {player.match_id}, retiré de la file d'attente")
-                players_to_remove.append(i)
+                self.waiting_players.remove(player)
                 continue
                 
-            # Chercher le meilleur adversaire
-            best_match = None
-            min_elo_diff = float('inf')
-            
-            # Parcourir tous les autres joueurs en attente
-            for j, (other_player, other_timestamp, other_elo) in enumerate(self.waiting_players):
-                if i == j or j in players_to_remove:
-                    continue
-                    
-                # Vérifier si l'autre joueur est déjà dans un match
-                if hasattr(other_player, 'match_id') and other_player.match_id:
-                    logger.warning(f"Joueur {other_player.user.username} déjà dans un match, ignoré")
-                    if j not in players_to_remove:
-                        players_to_remove.append(j)
-                    continue
-                
-                # Calculer la différence d'ELO avec ajustement temporel
-                elo_diff = abs(player_elo - other_elo)
-                wait_time = asyncio.get_event_loop().time() - other_timestamp
-                adjusted_diff = elo_diff / (1 + 0.1 * wait_time)
-                
-                # Vérifier le type de client (API vs WebSocket)
-                is_api_p1 = hasattr(player, '_is_api')
-                is_api_p2 = hasattr(other_player, '_is_api')
-                is_api_mix = (is_api_p1 != is_api_p2)
-                
-                # Favoriser légèrement les matchs entre clients API et web pour le test
-                if is_api_mix:
-                    adjusted_diff *= 0.8  # 20% de bonus pour faciliter le match API-Web
-                
-                # Log détaillé du match potentiel
-                logger.debug(f"Match potentiel: {player.user.username} (ELO {player_elo}, {'API' if is_api_p1 else 'WEB'}) vs "
-                            f"{other_player.user.username} (ELO {other_elo}, {'API' if is_api_p2 else 'WEB'}), "
-                            f"diff: {elo_diff}, adjusted: {adjusted_diff:.2f}, wait: {wait_time:.1f}s")
-                
-                # Garder le meilleur match
-                if adjusted_diff < min_elo_diff:
-                    min_elo_diff = adjusted_diff
-                    best_match = (j, other_player)
+            # Chercher le meilleur adversaire parmi les ELO voisins, le worker
+            # d'un des deux joueurs crée le match
+            now = asyncio.get_event_loop().time()
+            waited_long = now - timestamp > MAX_WAIT
+            best_match = self.waiting_players.best_opponent(
+                player, player_elo, now,
+                limit=float("inf") if waited_long else MAX_ELO_GAP,
+                skip=is_remote if is_remote(player) else None,
+            )
             
             # Faire le match si on trouve un bon adversaire ou si l'attente est longue
-            if best_match and (min_elo_diff < 200 or asyncio.get_event_loop().time() - timestamp > 10):
-                matched_idx, matched_player = best_match
+            if best_match and (best_match[0] < MAX_ELO_GAP or waited_long):
+                min_elo_diff, (matched_player, _, other_elo) = best_match
                 
                 # Log du match
                 is_api_p1 = hasattr(player, '_is_api')
                 is_api_p2 = hasattr(matched_player, '_is_api')
                 logger.info(f"Match créé: {player.user.username} (ELO {player_elo}, {'API' if is_api_p1 else 'WEB'}) vs "
-                            f"{matched_player.user.username} (ELO {other_elo}, {'API' if is_api_p2 else 'WEB'})")
+                            f"{matched_player.user.username} (ELO {other_elo}, {'API' if is_api_p2 else 'WEB'}), diff: {min_elo_diff:.2f}")
                 
-                # Créer le match
-                await self.create_match(player, matched_player)
-                
-                # Marquer les joueurs pour suppression de la file d'attente
-                players_to_remove.extend([i, matched_idx])
+                # Créer le match, sinon un autre worker a pris un des joueurs
+                if not await self.create_match(player, matched_player):
+                    for taken in (player, matched_player):
+                        if is_remote(taken):
+                            self.waiting_players.remove(taken)
+                    continue
+
+                # Retirer les joueurs de la file d'attente
+                self.waiting_players.remove(player)
+                self.waiting_players.remove(matched_player)
                 matches_created += 1
-        
-        # Supprimer les joueurs matchés de la file d'attente (en ordre décroissant pour éviter les problèmes d'indices)
-        for idx in sorted(players_to_remove, reverse=True):
-            if idx < len(self.waiting_players):
-                del self.waiting_players[idx]
+
+        # Ceux qui attendent encore trop longtemps jouent contre un bot
+        matches_created += await self.fill_with_bots()
         
         logger.info(f"{matches_created} matches créés, {len(self.waiting_players)} joueurs toujours en attente")
         return matches_created
     
+    async def fill_with_bots(self):
+        """
+        Match the players waiting for more than bot_fill_timeout seconds
+        with a bot of their level. Returns the number of matches created.
+        """
+        if not self.bot_fill_timeout:
+            return 0
+
+        now = asyncio.get_event_loop().time()
+        waited = [(player, elo) for player, timestamp, elo in self.waiting_players
+                  if now - timestamp > self.bot_fill_timeout and not getattr(player, 'match_id', None)]
+        created = 0
+        for player, elo in waited:
+            if is_remote(player):
+                continue
+            self.waiting_players.remove(player)
+            level = self.bot_level if self.bot_level in BOT_LEVELS else bot_level_for_elo(elo)
+            logger.info(f"Pas d'adversaire pour {player.user.username} après {self.bot_fill_timeout}s, match contre un bot {level}")
+            if await self.create_match(player, BotPlayer(level, elo)):
+                created += 1
+        return created
+
     async def create_match(self, player1, player2):
         """
-        Create a match between two players.
+        Create a match between two players, player2 can be a BotPlayer.
+        Returns None when another worker already matched one of them.
         """
+        # Retirer les joueurs de la file partagée
+        if not await self.cluster.claim((player1, player2)):
+            logger.info(f"{player1.user.username} ou {player2.user.username} déjà pris par un autre worker")
+            return None
+
         # Définir les numéros de joueur
         player1.player_number = 1
         player2.player_number = 2
@@ -350,7 +339,7 @@ class LobbyManager:
         logger.info(f"Création du match {match_id}")
         
         # Créer l'état initial du jeu
-        game_state = create_initial_game_state(player1, player2)
+        game_state = create_initial_game_state(player1, player2, match_id)
         
         # Stocker le match
         self.active_matches[match_id] = {
@@ -359,12 +348,6 @@ class LobbyManager:
             "created_at": now_str()
         }
         
-        # Annuler les tâches de matchmaking si existantes
-        if hasattr(player1, 'match_task') and player1.match_task:
-            player1.match_task.cancel()
-        if hasattr(player2, 'match_task') and player2.match_task:
-            player2.match_task.cancel()
-        
         # Notifier les joueurs
         for player in [player1, player2]:
             player.match_id = match_id
@@ -373,15 +356,30 @@ class LobbyManager:
                 "match_id": match_id,
                 "player_number": player.player_number,
                 "opponent": player2.user.username if player == player1 else player1.user.username,
-                "game_state": game_state
+                "game_state": game_state.to_dict(),
+                "tick_rate": self.scheduler.tick_rate,
+                "snapshot_rate": self.scheduler.snapshot_rate
             }))
         
         # Démarrer la boucle de jeu
         is_api_player1 = hasattr(player1, '_is_api')
         is_api_player2 = hasattr(player2, '_is_api')
         logger.info(f"Démarrage de la boucle de jeu pour le match {match_id} entre {player1.user.username} ({'API' if is_api_player1 else 'WEB'}) et {player2.user.username} ({'API' if is_api_player2 else 'WEB'})")
-        asyncio.create_task(player1.run_game_loop(match_id))
+        await self.game_loop_host(player1, player2).run_game_loop(match_id)
+        await self.cluster.track((player1, player2))
+
+        # Bots play from the scheduler's tick
+        for player in (player1, player2):
+            if is_bot(player):
+                self.scheduler.add_bot(match_id, game_state, player.player_number, player.level)
         return match_id
+
+    @staticmethod
+    def game_loop_host(player1, player2):
+        """
+        The local consumer that registers the match, player1 can live on another worker.
+        """
+        return player1 if hasattr(player1, 'run_game_loop') else player2
     
     async def remove_player(self, player):
         """
@@ -389,27 +387,32 @@ class LobbyManager:
         """
         async with self.matchmaking_lock:
             # Supprimer de la file d'attente
-            original_length = len(self.waiting_players)
-            self.waiting_players = [(p, ts, elo) for p, ts, elo in self.waiting_players if p != player]
+            was_waiting = self.waiting_players.remove(player)
             
             # Gérer le forfait si le joueur est dans un match
-            for match_id, match_data in list(self.active_matches.items()):
-                if player in match_data["players"]:
-                    # Notifier l'adversaire de la victoire par forfait
-                    opponent = next((p for p in match_data["players"] if p != player), None)
-                    if opponent:
-                        logger.info(f"Joueur {player.user.username} a quitté le match {match_id}, {opponent.user.username} gagne par forfait")
-                        await opponent.send(text_data=json.dumps({
-                            "type": "game_over",
-                            "winner": opponent.user.username,
-                            "message": f"Victoire par abandon ! {player.user.username} a quitté la partie."
-                        }))
+            found = self.active_matches.for_user(player.user.id)
+            if found and player in found[1]["players"]:
+                match_id, match_data, _ = found
+                # Supprimer le match, avant de notifier l'adversaire
+                del self.active_matches[match_id]
+
+                # Notifier l'adversaire de la victoire par forfait
+                opponent = next((p for p in match_data["players"] if p != player), None)
+                if opponent:
+                    logger.info(f"Joueur {player.user.username} a quitté le match {match_id}, {opponent.user.username} gagne par forfait")
+                    await opponent.send(text_data=json.dumps({
+                        "type": "game_over",
+                        "winner": opponent.user.username,
+                        "message": f"Victoire par abandon ! {player.user.username} a quitté la partie."
+                    }))
+                    # Les matchs contre un bot ne comptent pas pour l'ELO
+                    if not is_bot(opponent):
                         await self.update_elo_for_forfeit(opponent.user, player.user)
-                    
-                    # Supprimer le match
-                    del self.active_matches[match_id]
+
+            # File partagée, et forfait d'un match tenu par un autre worker
+            await self.cluster.leave(player)
             
-            return original_length > len(self.waiting_players)
+            return was_waiting
     
     @database_sync_to_async
     def update_elo_for_forfeit(self, winner, loser, forfeit_penalty=5):
@@ -0,0 +1,73 @@
+"""
+╔═══════════════════════════════════════════════════╗
+║                 PongLockstep                      ║
+╠═══════════════════════════════════════════════════╣
+║ Input-only description of a Pong match            ║
+║                                                   ║
+║ • Records paddle input changes with their tick    ║
+║ • Replays a match from its header and inputs      ║
+║ • Digests a state to compare runs bit for bit     ║
+╚═══════════════════════════════════════════════════╝
+"""
+
+import hashlib
+from .pongHelper import build_game_state
+
+class InputLog:
+    """
+    Paddle input changes of a match, as (tick, player, value) in order.
+    player is 1 or 2, the change applies from that tick on.
+    """
+
+    __slots__ = ("changes", "_last1", "_last2")
+
+    def __init__(self, changes=None):
+        self.changes = list(changes or ())
+        self._last1 = self._last2 = 0
+        for _, player, value in self.changes:
+            if player == 1:
+                self._last1 = value
+            else:
+                self._last2 = value
+
+    def record(self, game_state):
+        """
+        Records the inputs about to be used for the next frame.
+        """
+
+        if game_state.input1 != self._last1:
+            self._last1 = game_state.input1
+            self.changes.append((game_state.tick, 1, game_state.input1))
+        if game_state.input2 != self._last2:
+            self._last2 = game_state.input2
+            self.changes.append((game_state.tick, 2, game_state.input2))
+
+    def __len__(self):
+        return len(self.changes)
+
+def replay(header, changes, engine, until_tick=None):
+    """
+    Rebuilds a match from its header (seed included) and its input changes.
+    Stops at until_tick or when the match is over, returns the GameState.
+    """
+
+    game_state = build_game_state(header)
+    changes = sorted(changes, key=lambda change: change[0])
+    index = 0
+    while until_tick is None or game_state.tick < until_tick:
+        while index < len(changes) and changes[index][0] <= game_state.tick:
+            _, player, value = changes[index]
+            game_state.set_input("player1" if player == 1 else "player2", value)
+            index += 1
+        game_over, _ = engine.step(game_state)
+        if game_over:
+            break
+    return game_state
+
+def state_digest(game_state):
+    """
+    Hash of the exact bits of the hot fields of a state.
+    """
+
+    fields = (value.hex() if isinstance(value, float) else repr(value) for value in game_state.to_compact())
+    return hashlib.sha256(",".join(fields).encode()).hexdigest()
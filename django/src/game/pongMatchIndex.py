@@ -0,0 +1,66 @@
+"""
+╔═══════════════════════════════════════════════════╗
+║                 PongMatchIndex                    ║
+╠═══════════════════════════════════════════════════╣
+║ Running matches, findable by the id of a player   ║
+║                                                   ║
+║ • Same dict of match_id -> match data as before   ║
+║ • user id -> (match_id, player number) alongside  ║
+║ • Index follows every insertion and deletion      ║
+╚═══════════════════════════════════════════════════╝
+"""
+
+class ActiveMatches(dict):
+    """
+    LobbyManager.active_matches: match data by match_id, plus the match of
+    each player by user id. The index changes in the same call as the
+    dict, so it can't be out of step with it between two awaits.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.by_user = {}
+
+    def __setitem__(self, match_id, match_data):
+        if match_id in self:
+            self._unindex(match_id, dict.__getitem__(self, match_id))
+        dict.__setitem__(self, match_id, match_data)
+        for number, player in enumerate(match_data["players"], 1):
+            user_id = getattr(player.user, 'id', None)
+            # Bots have no user id
+            if user_id is not None:
+                self.by_user[user_id] = (match_id, number)
+
+    def __delitem__(self, match_id):
+        match_data = dict.__getitem__(self, match_id)
+        dict.__delitem__(self, match_id)
+        self._unindex(match_id, match_data)
+
+    def pop(self, match_id, *default):
+        if match_id not in self:
+            return dict.pop(self, match_id, *default)
+        match_data = dict.__getitem__(self, match_id)
+        del self[match_id]
+        return match_data
+
+    def clear(self):
+        dict.clear(self)
+        self.by_user.clear()
+
+    def _unindex(self, match_id, match_data):
+        for player in match_data["players"]:
+            user_id = getattr(player.user, 'id', None)
+            entry = self.by_user.get(user_id)
+            if entry is not None and entry[0] == match_id:
+                del self.by_user[user_id]
+
+    def for_user(self, user_id):
+        """
+        (match_id, match data, player number) of a user's match, or None.
+        """
+
+        entry = self.by_user.get(user_id)
+        if entry is None:
+            return None
+        match_id, number = entry
+        return match_id, dict.__getitem__(self, match_id), number
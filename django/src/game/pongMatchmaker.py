@@ -0,0 +1,251 @@
+"""
+╔═══════════════════════════════════════════════════╗
+║                 PongMatchmaker                    ║
+╠═══════════════════════════════════════════════════╣
+║ Single matchmaking loop for the whole process     ║
+║                                                   ║
+║ • Joins and leaves go through one command queue   ║
+║ • One pairing pass per interval, under the lock   ║
+║ • Queue positions pushed only when they change    ║
+║ • Tickets for REST players to wait on their match ║
+║ • Sleeps while nobody is waiting                  ║
+╚═══════════════════════════════════════════════════╝
+"""
+
+import asyncio
+import json
+import logging
+import secrets
+from collections import deque
+from .pongCluster import is_remote
+from .pongHelper import game_setting
+
+logger = logging.getLogger('pong.matchmaker')
+
+# Commands
+JOIN = "join"
+LEAVE = "leave"
+
+# Seconds a REST matchmaking ticket can be waited on
+TICKET_TTL = 600
+
+class MatchTicket:
+    """
+    REST matchmaking job: an API player in the queue, and the future
+    their match_created message resolves.
+    """
+
+    __slots__ = ("ticket_id", "player", "matched", "created_at")
+
+    def __init__(self, player):
+        loop = asyncio.get_running_loop()
+        self.ticket_id = secrets.token_urlsafe(16)
+        self.player = player
+        self.matched = loop.create_future()
+        self.created_at = loop.time()
+
+    def resolve(self, message):
+        if not self.matched.done():
+            self.matched.set_result(message)
+
+    def match(self):
+        """
+        The match_created message, None while queued.
+        """
+
+        return self.matched.result() if self.matched.done() else None
+
+class Matchmaker:
+    """
+    Owns LobbyManager.waiting_players: consumers and REST views send it
+    join and leave commands, it runs them one at a time between the
+    pairing passes.
+    """
+
+    # One matchmaker per process
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(Matchmaker, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """
+        The loop starts with the first command.
+        """
+        if self._initialized:
+            return
+
+        self.lobby = None
+        self.interval = game_setting('PONG_MATCHMAKING_INTERVAL', 2)
+        self.commands = deque()
+        self.wakeup = asyncio.Event()
+        # REST matchmaking tickets, by ticket id and by user id
+        self.tickets = {}
+        self.tickets_by_user = {}
+        self.passes = 0
+        self._task = None
+        self._initialized = True
+
+    #===========================================================#
+    #                COMMANDS                                   #
+    #===========================================================#
+
+    async def join(self, player):
+        """
+        Queue a player and try to match them right away. True when they
+        got a match.
+        """
+
+        return await self.submit(JOIN, player)
+
+    async def leave(self, player):
+        """
+        Take a player out of the queue, or forfeit their match. True when
+        they were waiting.
+        """
+
+        return await self.submit(LEAVE, player)
+
+    async def open_ticket(self, player):
+        """
+        Queue an API player and return their MatchTicket. A player still
+        waiting on a ticket gets the same one back.
+        """
+
+        self.expire_tickets()
+        ticket = self.tickets_by_user.get(player.user.id)
+        if ticket is not None and ticket.match() is None and self.lobby.waiting_players.position(player.user.id):
+            return ticket
+
+        ticket = MatchTicket(player)
+        player.ticket = ticket
+        self.tickets[ticket.ticket_id] = ticket
+        self.tickets_by_user[player.user.id] = ticket
+        await self.join(player)
+        return ticket
+
+    async def wait_ticket(self, ticket_id, user_id, timeout):
+        """
+        Wait up to timeout seconds for the match of a ticket. Returns the
+        ticket, or None when it is unknown or belongs to another user.
+        """
+
+        ticket = self.tickets.get(ticket_id)
+        if ticket is None or ticket.player.user.id != user_id:
+            return None
+        try:
+            # Shielded, a client giving up doesn't cancel the ticket
+            await asyncio.wait_for(asyncio.shield(ticket.matched), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return ticket
+
+    def expire_tickets(self):
+        """
+        Drop the tickets older than TICKET_TTL, oldest first.
+        """
+
+        now = asyncio.get_running_loop().time()
+        expired = []
+        for ticket in self.tickets.values():
+            if now - ticket.created_at <= TICKET_TTL:
+                break
+            expired.append(ticket)
+        for ticket in expired:
+            del self.tickets[ticket.ticket_id]
+            if self.tickets_by_user.get(ticket.player.user.id) is ticket:
+                del self.tickets_by_user[ticket.player.user.id]
+
+    async def submit(self, action, player):
+        """
+        Hand a command to the matchmaking loop and wait for its result.
+        """
+
+        future = asyncio.get_running_loop().create_future()
+        self.commands.append((action, player, future))
+        self.wakeup.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+        return await future
+
+    async def execute(self, action, player):
+        if action == JOIN:
+            async with self.lobby.matchmaking_lock:
+                return bool(await self.lobby.add_player_to_queue(player))
+        return await self.lobby.remove_player(player)
+
+    #===========================================================#
+    #                MATCHMAKING LOOP                           #
+    #===========================================================#
+
+    async def run(self):
+        """
+        Run the commands as they come, and a pairing pass every interval
+        while players are waiting.
+        """
+
+        loop = asyncio.get_running_loop()
+        next_pass = loop.time() + self.interval
+        while True:
+            while self.commands:
+                action, player, future = self.commands.popleft()
+                try:
+                    result = await self.execute(action, player)
+                except Exception as e:
+                    logger.error(f"Erreur de matchmaking ({action}) pour {player.user.username}: {e}", exc_info=True)
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+
+            waiting = bool(self.lobby.waiting_players)
+            if waiting and loop.time() >= next_pass:
+                try:
+                    await self.run_pass()
+                except Exception as e:
+                    logger.error(f"Erreur dans la boucle de matchmaking: {e}", exc_info=True)
+                next_pass = loop.time() + self.interval
+                continue
+
+            # Nothing to pair before the next pass, or nobody waiting at all
+            if not waiting:
+                next_pass = loop.time() + self.interval
+            self.wakeup.clear()
+            if self.commands:
+                continue
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), next_pass - loop.time() if waiting else None)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run_pass(self):
+        """
+        One find_matches_for_all() pass, then the position updates.
+        """
+
+        async with self.lobby.matchmaking_lock:
+            await self.lobby.find_matches_for_all()
+        self.passes += 1
+        await self.push_positions()
+
+    async def push_positions(self):
+        """
+        Send their new position to the local players whose place in the
+        queue changed since the last update, once.
+        """
+
+        updates = []
+        for player, position in self.lobby.waiting_players.moved():
+            if is_remote(player):
+                continue
+            updates.append(player.send(text_data=json.dumps({
+                "type": "matchmaking_update",
+                "queue_position": position,
+                "message": f"Position dans la file: {position}"
+            })))
+        if updates:
+            await asyncio.gather(*updates, return_exceptions=True)
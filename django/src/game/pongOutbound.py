@@ -0,0 +1,180 @@
+"""
+╔═══════════════════════════════════════════════════╗
+║                 PongOutbound                      ║
+╠═══════════════════════════════════════════════════╣
+║ Per-connection outbound queue for game sockets    ║
+║                                                   ║
+║ • One writer task per connection                  ║
+║ • Stale game frames are replaced by newer ones    ║
+║ • Control messages are never dropped              ║
+║ • Queue depth and drops exported to Prometheus    ║
+╚═══════════════════════════════════════════════════╝
+"""
+
+import asyncio
+import logging
+from collections import deque
+from prometheus_client import Counter, Gauge
+from .pongFrames import merge_frames
+
+logger = logging.getLogger('pong.outbound')
+
+QUEUE_DEPTH = Gauge(
+    'pong_outbound_queue_depth',
+    'Messages waiting in the outbound queues of game connections',
+)
+FRAMES_DROPPED = Counter(
+    'pong_outbound_frames_dropped_total',
+    'Stale game frames dropped or merged into a newer one before being sent',
+)
+MESSAGES_SENT = Counter(
+    'pong_outbound_messages_sent_total',
+    'Messages written to game connections',
+    ['kind'],
+)
+OVERFLOWS = Counter(
+    'pong_outbound_overflows_total',
+    'Game connections closed because their control messages piled up',
+)
+
+# Queue item kinds
+CONTROL = "control"
+FRAME = "frame"
+
+SENT_BY_KIND = {kind: MESSAGES_SENT.labels(kind) for kind in (CONTROL, FRAME)}
+
+class OutboundQueue:
+    """
+    Bounded queue drained by its own writer task.
+
+    put_frame() merges a frame into a frame still waiting at the tail, so a
+    slow socket only ever gets the newest state. put_control() keeps every
+    message in order, when max_size is reached on_overflow() is called
+    instead of dropping one. A transient queue starts its writer with the
+    first message and stops it once empty, for senders with no close to
+    hook into.
+    """
+
+    __slots__ = ("send", "max_size", "on_overflow", "transient", "items", "wakeup", "idle", "task", "closed", "dropped")
+
+    def __init__(self, send, max_size, on_overflow, transient=False):
+        self.send = send
+        self.max_size = max_size
+        self.on_overflow = on_overflow
+        self.transient = transient
+        self.items = deque()
+        self.wakeup = asyncio.Event()
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.task = None
+        self.closed = False
+        self.dropped = 0
+
+    def start(self):
+        self.task = asyncio.get_running_loop().create_task(self.run())
+
+    def put_control(self, payload):
+        """
+        Queue a message that must be delivered.
+        """
+
+        if self.closed:
+            return
+        if len(self.items) >= self.max_size:
+            self.overflow()
+            return
+        self.push(CONTROL, payload)
+
+    def put_frame(self, payload):
+        """
+        Queue a game frame, replacing the frame waiting at the tail if any.
+        """
+
+        if self.closed:
+            return
+        if self.items and self.items[-1][0] == FRAME:
+            self.items[-1] = (FRAME, merge_shared(self.items[-1][1], payload))
+            self.drop()
+        elif len(self.items) >= self.max_size:
+            # Only control messages are waiting, keyframes resync the client
+            self.drop()
+        else:
+            self.push(FRAME, payload)
+
+    def push(self, kind, payload):
+        self.items.append((kind, payload))
+        QUEUE_DEPTH.inc()
+        self.idle.clear()
+        self.wakeup.set()
+        if self.transient and self.task is None:
+            self.start()
+
+    def drop(self):
+        self.dropped += 1
+        FRAMES_DROPPED.inc()
+
+    def overflow(self):
+        logger.warning(f"File d'envoi pleine ({self.max_size} messages), connexion fermée")
+        OVERFLOWS.inc()
+        self.close()
+        asyncio.get_running_loop().create_task(self.on_overflow())
+
+    async def run(self):
+        """
+        Writer task, sends the queued messages one by one.
+        """
+
+        while True:
+            if not self.items:
+                self.idle.set()
+                if self.transient:
+                    self.task = None
+                    return
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+            kind, payload = self.items.popleft()
+            QUEUE_DEPTH.dec()
+            try:
+                await self.send(**payload)
+                SENT_BY_KIND[kind].inc()
+            except Exception as e:
+                logger.error(f"Erreur lors de l'envoi d'un message: {e}")
+
+    async def flush(self, timeout=1.0):
+        """
+        Wait until everything queued so far has been sent.
+        """
+
+        try:
+            await asyncio.wait_for(self.idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def close(self):
+        """
+        Stop the writer, pending messages are discarded.
+        """
+
+        self.closed = True
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        QUEUE_DEPTH.dec(len(self.items))
+        self.items.clear()
+        self.idle.set()
+
+    def __len__(self):
+        return len(self.items)
+
+# Last merge, reused while the same frames are merged for every lagging
+# recipient of a fan-out
+_last_merge = (None, None, None)
+
+def merge_shared(old, new):
+    global _last_merge
+    last_old, last_new, merged = _last_merge
+    if old is not last_old or new is not last_new:
+        merged = merge_frames(old, new)
+        _last_merge = (old, new, merged)
+    return merged
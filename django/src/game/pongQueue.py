@@ -0,0 +1,280 @@
+"""
+╔═══════════════════════════════════════════════════╗
+║                 PongQueue                         ║
+╠═══════════════════════════════════════════════════╣
+║ Matchmaking queue indexed by ELO                  ║
+║                                                   ║
+║ • O(1) membership by user id                      ║
+║ • Players kept sorted by ELO and by waiting time  ║
+║ • Best opponent found among the nearest ratings   ║
+║ • Arrival ranks in a Fenwick tree, O(log n) each  ║
+║ • Iterates like the old (player, time, elo) list  ║
+╚═══════════════════════════════════════════════════╝
+"""
+
+from bisect import bisect_left, insort
+
+# ELO gap accepted right away, and seconds after which any opponent will do
+MAX_ELO_GAP = 200
+MAX_WAIT = 10
+
+# Each second in queue divides the ELO gap by another (1 + WAIT_RELAXATION)
+WAIT_RELAXATION = 0.1
+
+# Slight preference for API vs web matches, for testing
+API_MIX_BONUS = 0.8
+
+# Arrival numbers tracked before the rank tree first grows
+RANKS_CAPACITY = 1024
+
+def match_score(elo_gap, waited, api_mix):
+    """
+    ELO gap adjusted by the candidate's waiting time, lower is better.
+    """
+
+    score = elo_gap / (1 + WAIT_RELAXATION * waited)
+    if api_mix:
+        score *= API_MIX_BONUS
+    return score
+
+class ArrivalRanks:
+    """
+    Fenwick tree over arrival numbers, counting those still queued: the
+    rank of an arrival and the arrival at a rank both take O(log n).
+    """
+
+    def __init__(self, capacity=RANKS_CAPACITY, present=()):
+        # 1-based tree, arrival number n is stored at index n + 1
+        tree = [0] * (capacity + 1)
+        for seq in present:
+            tree[seq + 1] = 1
+        for index in range(1, capacity + 1):
+            parent = index + (index & -index)
+            if parent <= capacity:
+                tree[parent] += tree[index]
+        self.tree = tree
+        self.capacity = capacity
+
+    def add(self, seq, delta):
+        tree = self.tree
+        index = seq + 1
+        while index <= self.capacity:
+            tree[index] += delta
+            index += index & -index
+
+    def rank(self, seq):
+        """
+        Number of queued arrivals up to and including seq.
+        """
+
+        tree = self.tree
+        index, total = seq + 1, 0
+        while index:
+            total += tree[index]
+            index &= index - 1
+        return total
+
+    def find(self, rank):
+        """
+        Arrival number of the queued player at a 1-based rank.
+        """
+
+        tree = self.tree
+        index = 0
+        step = 1 << (self.capacity.bit_length() - 1)
+        while step:
+            if index + step <= self.capacity and tree[index + step] < rank:
+                index += step
+                rank -= tree[index]
+            step >>= 1
+        return index
+
+class MatchmakingQueue:
+    """
+    Waiting players, in arrival order for iteration, sorted by ELO for the
+    opponent search. Iterating yields (player, timestamp, elo) tuples, the
+    shape waiting_players always had.
+
+    Each player gets an arrival number (seq), their queue position is the
+    count of players still queued up to it. A departure only moves the
+    players behind it, moved() lists those whose position changed since
+    it was last reported.
+    """
+
+    def __init__(self):
+        # user id -> (player, timestamp, elo, seq), in arrival order
+        self._entries = {}
+        # (elo, seq, user id) and (timestamp, seq), kept sorted
+        self._by_elo = []
+        self._by_time = []
+        # seq -> user id, and the queued seqs counted in a Fenwick tree
+        self._keys = {}
+        self._ranks = ArrivalRanks()
+        self._next_seq = 0
+        # Position last reported to each player, and the first one moved since
+        self._reported = {}
+        self._moved_from = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __bool__(self):
+        return bool(self._entries)
+
+    def __iter__(self):
+        for player, timestamp, elo, _ in list(self._entries.values()):
+            yield player, timestamp, elo
+
+    def __contains__(self, player):
+        return self.get(player) is not None
+
+    def get(self, player):
+        """
+        Returns the (player, timestamp, elo) entry of a player, or None.
+        """
+
+        entry = self._entries.get(player.user.id)
+        if entry is None or not entry[0] == player:
+            return None
+        return entry[:3]
+
+    def add(self, player, timestamp, elo):
+        """
+        Queue a player, returns False if their user is already queued.
+        """
+
+        key = player.user.id
+        if key in self._entries:
+            return False
+        if self._next_seq >= self._ranks.capacity:
+            self._renumber()
+        seq = self._next_seq
+        self._next_seq += 1
+        self._entries[key] = (player, timestamp, elo, seq)
+        self._keys[seq] = key
+        self._ranks.add(seq, 1)
+        insort(self._by_elo, (elo, seq, key))
+        insort(self._by_time, (timestamp, seq))
+        # Last in line, the position the player is told when queued
+        self._reported[key] = len(self._entries)
+        return True
+
+    def remove(self, player):
+        """
+        Dequeue a player, returns False if they were not queued.
+        """
+
+        key = player.user.id
+        entry = self._entries.get(key)
+        if entry is None or not entry[0] == player:
+            return False
+        del self._entries[key]
+        _, timestamp, elo, seq = entry
+        del self._by_elo[bisect_left(self._by_elo, (elo, seq, key))]
+        del self._by_time[bisect_left(self._by_time, (timestamp, seq))]
+        del self._keys[seq]
+        del self._reported[key]
+
+        # Everyone from this rank on moved up
+        rank = self._ranks.rank(seq)
+        if self._moved_from is None or rank < self._moved_from:
+            self._moved_from = rank
+        self._ranks.add(seq, -1)
+        return True
+
+    def position(self, user_id):
+        """
+        1-based arrival rank of a user, 0 if not queued.
+        """
+
+        entry = self._entries.get(user_id)
+        return self._ranks.rank(entry[3]) if entry is not None else 0
+
+    def moved(self):
+        """
+        (player, position) of every player whose position changed since it
+        was last reported, which it now is. Only the players behind the
+        first departure are looked at.
+        """
+
+        start, self._moved_from = self._moved_from, None
+        if start is None:
+            return []
+        moved = []
+        for rank in range(start, len(self._entries) + 1):
+            key = self._keys[self._ranks.find(rank)]
+            if self._reported[key] != rank:
+                self._reported[key] = rank
+                moved.append((self._entries[key][0], rank))
+        return moved
+
+    def _renumber(self):
+        """
+        Out of arrival numbers: number the queue again from 0 when at most
+        half of them are still in use, else double the tree.
+        """
+
+        capacity = self._ranks.capacity
+        if len(self._entries) > capacity // 2:
+            self._ranks = ArrivalRanks(capacity * 2, self._keys)
+            return
+        entries = {}
+        for seq, (key, (player, timestamp, elo, _)) in enumerate(self._entries.items()):
+            entries[key] = (player, timestamp, elo, seq)
+        self._entries = entries
+        self._keys = {seq: key for key, (_, _, _, seq) in entries.items()}
+        self._by_elo = sorted((elo, seq, key) for key, (_, _, elo, seq) in entries.items())
+        self._by_time = sorted((timestamp, seq) for _, timestamp, _, seq in entries.values())
+        self._ranks = ArrivalRanks(capacity, range(len(entries)))
+        self._next_seq = len(entries)
+
+    def oldest(self):
+        """
+        Timestamp of the player waiting the longest.
+        """
+
+        return self._by_time[0][0] if self._by_time else None
+
+    def best_opponent(self, player, elo, now, limit=float("inf"), skip=None):
+        """
+        Queued player with the lowest match_score() against player, as
+        (score, (player, timestamp, elo)), or None.
+
+        Walks outward from elo on both sides. Nobody waited longer than the
+        oldest entry, so a candidate ELO_gap away scores at least
+        gap * API_MIX_BONUS / (1 + WAIT_RELAXATION * longest wait): the walk
+        stops once that bound reaches the best score so far, or limit when
+        the caller only accepts scores below it. Ties go to the earliest
+        arrival, as in a scan of the queue in arrival order.
+        skip(candidate) leaves candidates out.
+        """
+
+        if not self._entries:
+            return None
+        is_api = hasattr(player, '_is_api')
+        widening = API_MIX_BONUS / (1 + WAIT_RELAXATION * max(now - self.oldest(), 0))
+        best, best_key = None, (limit, float("inf"))
+
+        by_elo, entries = self._by_elo, self._entries
+        above = bisect_left(by_elo, (elo,))
+        below = above - 1
+        while below >= 0 or above < len(by_elo):
+            # Next nearest rating, on either side
+            if above >= len(by_elo) or (below >= 0 and elo - by_elo[below][0] <= by_elo[above][0] - elo):
+                candidate_elo, seq, key = by_elo[below]
+                below -= 1
+            else:
+                candidate_elo, seq, key = by_elo[above]
+                above += 1
+
+            gap = abs(elo - candidate_elo)
+            if gap * widening > best_key[0]:
+                break
+
+            candidate, timestamp, _, _ = entries[key]
+            if candidate == player or getattr(candidate, 'match_id', None) or (skip is not None and skip(candidate)):
+                continue
+            score = match_score(gap, now - timestamp, is_api != hasattr(candidate, '_is_api'))
+            if (score, seq) < best_key:
+                best, best_key = (score, (candidate, timestamp, candidate_elo)), (score, seq)
+        return best
@@ -0,0 +1,327 @@
+"""
+╔═══════════════════════════════════════════════════╗
+║                 PongRecorder                      ║
+╠═══════════════════════════════════════════════════╣
+║ Compact append-only recordings of Pong matches    ║
+║                                                   ║
+║ • JSON header line: players, seed, engine config  ║
+║ • Binary records: input changes, keyframes, end   ║
+║ • Files are written by a thread, off the tick     ║
+║ • Replays re-simulate the inputs or read keyframes║
+╚═══════════════════════════════════════════════════╝
+"""
+
+import json
+import logging
+import os
+import queue
+import re
+import struct
+import threading
+import time
+from bisect import bisect_left
+from collections import namedtuple
+from .pongEngine import GameEngine
+from .pongHelper import build_game_state
+from .pongLockstep import replay
+from .pongState import MatchHeader, PlayerInfo
+
+logger = logging.getLogger('pong.recorder')
+
+RECORDING_VERSION = 1
+RECORDING_SUFFIX = ".pongrec"
+
+# Record kinds, first byte of every record after the header line
+INPUT = 1
+KEYFRAME = 2
+END = 3
+
+# kind, tick, player (1 or 2), value (-1, 0 or 1)
+INPUT_RECORD = struct.Struct("<BIBb")
+# kind, then the GameState.to_compact() fields, floats kept exact
+KEYFRAME_RECORD = struct.Struct("<BI5d?I2dHH2b")
+# kind, tick, score1, score2, winner (1 or 2, 0 when aborted)
+END_RECORD = struct.Struct("<BIHHB")
+
+RECORD_SIZES = {INPUT: INPUT_RECORD.size, KEYFRAME: KEYFRAME_RECORD.size, END: END_RECORD.size}
+
+# Buffered bytes of a match written before its next keyframe
+FLUSH_SIZE = 4096
+
+Recording = namedtuple("Recording", ["header", "inputs", "keyframes", "end"])
+
+def recording_name(match_id):
+    """
+    File name of a match, match ids carry usernames and dates.
+    """
+
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", str(match_id)) + RECORDING_SUFFIX
+
+#===========================================================#
+#                WRITING                                    #
+#===========================================================#
+
+class RecordingWriter:
+    """
+    Appends the recordings to disk from a daemon thread, one per process.
+    The game loop only hands it (path, bytes, first) chunks, all the file
+    system calls happen here. Chunks come every keyframe interval, each one
+    opens and closes its file: a match that never finishes (worker crash)
+    holds no descriptor.
+    """
+
+    def __init__(self):
+        self.queue = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self.run, name="pong-recorder", daemon=True)
+        self.thread.start()
+
+    def write(self, path, data, first=False):
+        self.queue.put((path, data, first))
+
+    def run(self):
+        while True:
+            path, data, first = self.queue.get()
+            try:
+                if first:
+                    self.create(path)
+                with open(path, "ab") as file:
+                    file.write(data)
+            except OSError as e:
+                logger.error(f"Erreur d'écriture de l'enregistrement {path}: {e}")
+
+    def create(self, path):
+        """
+        First chunk of a recording. A match id recorded twice starts a new
+        file, the older one is moved aside.
+        """
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if os.path.exists(path):
+            os.replace(path, f"{path}.{int(time.time())}")
+
+class MatchRecording:
+    """
+    Recording of one running match, buffered in memory between keyframes.
+    record() is called once per tick with the inputs of that tick applied,
+    before the engine steps.
+    """
+
+    __slots__ = ("path", "writer", "buffer", "keyframe_interval", "next_keyframe", "last1", "last2", "started", "finished")
+
+    def __init__(self, path, writer, keyframe_interval, header):
+        self.path = path
+        self.writer = writer
+        self.buffer = bytearray(json.dumps(header).encode() + b"\n")
+        self.keyframe_interval = keyframe_interval
+        self.next_keyframe = 0
+        self.last1 = self.last2 = 0
+        self.started = False
+        self.finished = False
+
+    def record(self, game_state):
+        tick = game_state.tick
+        if game_state.input1 != self.last1:
+            self.last1 = game_state.input1
+            self.buffer += INPUT_RECORD.pack(INPUT, tick, 1, self.last1)
+        if game_state.input2 != self.last2:
+            self.last2 = game_state.input2
+            self.buffer += INPUT_RECORD.pack(INPUT, tick, 2, self.last2)
+        if tick >= self.next_keyframe:
+            self.next_keyframe = tick + self.keyframe_interval
+            self.buffer += KEYFRAME_RECORD.pack(KEYFRAME, *game_state.to_compact())
+            self.flush()
+        elif len(self.buffer) >= FLUSH_SIZE:
+            self.flush()
+
+    def finish(self, game_state, winner_username=None):
+        """
+        Close the recording, winner_username is None for an aborted match.
+        Only the first call counts.
+        """
+
+        if self.finished:
+            return
+        self.finished = True
+        header = game_state.header
+        winner = 1 if winner_username == header.player1.username else 2 if winner_username == header.player2.username else 0
+        self.buffer += END_RECORD.pack(END, game_state.tick, game_state.score1, game_state.score2, winner)
+        self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.writer.write(self.path, bytes(self.buffer), first=not self.started)
+            self.started = True
+            self.buffer.clear()
+
+class Recorder:
+    """
+    ╔═══════════════════════════════════════════════════╗
+    ║                 Recorder                          ║
+    ╠═══════════════════════════════════════════════════╣
+    ║ Starts the recordings of one game loop            ║
+    ║                                                   ║
+    ║ • One file per match in the recordings directory  ║
+    ║ • Header holds what a replay needs besides inputs ║
+    ║ • Picklable, worker processes get their own thread║
+    ╚═══════════════════════════════════════════════════╝
+    """
+
+    def __init__(self, directory, keyframe_interval, tick_rate, collision_mode, deterministic):
+        self.directory = directory
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.tick_rate = tick_rate
+        self.collision_mode = collision_mode
+        self.deterministic = deterministic
+        self._writer = None
+
+    # Sent to the worker processes by configuration, the writer thread stays here
+    def __reduce__(self):
+        return (Recorder, (self.directory, self.keyframe_interval, self.tick_rate, self.collision_mode, self.deterministic))
+
+    def start(self, game_state, match_id=None):
+        """
+        Returns the MatchRecording of a match about to be stepped, None for
+        a match resumed from a checkpoint, which can't be replayed from its seed.
+        match_id is the scheduler's id of the match, unique where the header's
+        can repeat ("final" in every tournament), and names the file.
+        """
+
+        if game_state.tick > 0:
+            return None
+        if self._writer is None:
+            self._writer = RecordingWriter()
+        header = game_state.header
+        match_id = match_id if match_id is not None else header.match_id
+        # Created, or moved aside if it exists, by the writer thread
+        path = os.path.join(self.directory, recording_name(match_id))
+        return MatchRecording(path, self._writer, self.keyframe_interval, {
+            "version": RECORDING_VERSION,
+            "match_id": match_id,
+            "tournament_id": header.tournament_id,
+            "seed": header.seed,
+            "players": [header.player1._asdict(), header.player2._asdict()],
+            "tick_rate": self.tick_rate,
+            "collision_mode": self.collision_mode,
+            "deterministic": self.deterministic,
+            "keyframe_interval": self.keyframe_interval,
+            "started_at": time.time(),
+        })
+
+#===========================================================#
+#                READING                                    #
+#===========================================================#
+
+def load_recording(path):
+    """
+    Reads a recording file. Files cut short (worker crash) load up to their
+    last complete record, with end set to None.
+    """
+
+    with open(path, "rb") as file:
+        header = json.loads(file.readline())
+        data = file.read()
+
+    inputs, keyframes, end = [], [], None
+    offset = 0
+    while offset < len(data):
+        kind = data[offset]
+        size = RECORD_SIZES.get(kind)
+        if size is None or offset + size > len(data):
+            break
+        if kind == INPUT:
+            inputs.append(INPUT_RECORD.unpack_from(data, offset)[1:])
+        elif kind == KEYFRAME:
+            keyframes.append(KEYFRAME_RECORD.unpack_from(data, offset)[1:])
+        else:
+            end = END_RECORD.unpack_from(data, offset)[1:]
+        offset += size
+    return Recording(header, inputs, keyframes, end)
+
+def list_recordings(directory, limit=50):
+    """
+    Headers of the latest recordings, newest first.
+    """
+
+    try:
+        entries = [entry for entry in os.scandir(directory) if entry.name.endswith(RECORDING_SUFFIX)]
+    except FileNotFoundError:
+        return []
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    headers = []
+    for entry in entries[:limit]:
+        try:
+            with open(entry.path, "rb") as file:
+                headers.append(json.loads(file.readline()))
+        except (OSError, ValueError):
+            continue
+    return headers
+
+def recording_header(recording):
+    """
+    MatchHeader the recorded match was played with.
+    """
+
+    header = recording.header
+    player1, player2 = (PlayerInfo(**player) for player in header["players"])
+    return MatchHeader(player1, player2, header["match_id"], header["tournament_id"], header["seed"])
+
+def recording_engine(recording):
+    header = recording.header
+    return GameEngine(header["tick_rate"], header["collision_mode"], header["deterministic"])
+
+def replay_recording(recording, until_tick=None, engine=None):
+    """
+    Re-simulates a recording through the GameEngine, up to until_tick or
+    the end of the match. Returns the GameState.
+    """
+
+    return replay(recording_header(recording), recording.inputs, engine or recording_engine(recording), until_tick)
+
+def keyframe_state(recording, keyframe):
+    """
+    GameState of a keyframe, without re-simulating anything.
+    """
+
+    game_state = build_game_state(recording_header(recording))
+    game_state.load_compact(keyframe)
+    return game_state
+
+class ReplayCursor:
+    """
+    Walks a recording tick by tick through the GameEngine.
+    Seeking re-simulates from the seed, so it lands on the exact state.
+    """
+
+    def __init__(self, recording):
+        self.recording = recording
+        self.engine = recording_engine(recording)
+        self.input_ticks = [change[0] for change in recording.inputs]
+        if recording.end is not None:
+            self.end_tick = recording.end[0]
+        else:
+            self.end_tick = max(self.input_ticks[-1:] + [keyframe[0] for keyframe in recording.keyframes[-1:]], default=0)
+        self.seek(0)
+
+    def seek(self, tick):
+        tick = max(0, min(tick, self.end_tick))
+        self.game_state = replay_recording(self.recording, tick, self.engine)
+        self.index = bisect_left(self.input_ticks, self.game_state.tick)
+
+    def advance(self, ticks):
+        """
+        Steps up to ticks ticks, returns False once the recording is over.
+        """
+
+        game_state = self.game_state
+        inputs = self.recording.inputs
+        for _ in range(ticks):
+            if game_state.tick >= self.end_tick:
+                return False
+            while self.index < len(inputs) and inputs[self.index][0] <= game_state.tick:
+                _, player, value = inputs[self.index]
+                game_state.set_input("player1" if player == 1 else "player2", value)
+                self.index += 1
+            game_over, _ = self.engine.step(game_state)
+            if game_over:
+                return False
+        return game_state.tick < self.end_tick
@@ -0,0 +1,337 @@
+import asyncio
+import logging
+import time
+from .pongEngine import GameEngine, DISCRETE
+from .pongHelper import BASE_TICK_RATE, game_setting
+from .pongBots import BotController
+from .pongRecorder import Recorder
+from .pongWorkers import WorkerPool
+
+logger = logging.getLogger('pong.scheduler')
+
+# Ticks replayed at once when the loop falls behind, beyond that they are dropped
+MAX_CATCH_UP = 5
+
+# Stats are logged every STATS_PERIOD seconds
+STATS_PERIOD = 60
+
+class ScheduledMatch:
+    """
+    A match driven by the TickScheduler.
+
+    is_active() is checked before every step, on_frame() is awaited after
+    the steps that end on a snapshot tick, on_game_over(winner_username) and
+    on_abort() are spawned once when the match leaves the scheduler.
+    on_abort() handles a player leaving, on_crash() the server losing the
+    match (worker died, step raised), which must not hand anyone a result.
+    recording streams the input changes, with keyframes, to the match's
+    file on disk, so it can be replayed from its header and inputs.
+    """
+
+    __slots__ = (
+        "match_id", "game_state", "is_active", "on_frame", "on_game_over", "on_abort", "on_crash",
+        "recording", "next_frame_tick",
+    )
+
+    def __init__(self, match_id, game_state, is_active, on_frame, on_game_over, on_abort, on_crash=None):
+        self.match_id = match_id
+        self.game_state = game_state
+        self.is_active = is_active
+        self.on_frame = on_frame
+        self.on_game_over = on_game_over
+        self.on_abort = on_abort
+        self.on_crash = on_crash
+        self.recording = None
+        self.next_frame_tick = 0
+
+    def crashed(self):
+        """
+        Coroutine ending a match the server lost, on_abort() when the owner
+        has no on_crash().
+        """
+
+        return self.on_crash() if self.on_crash is not None else self.on_abort()
+
+    def frame_due(self, snapshot_every):
+        """
+        True when the state reached the next snapshot tick, which is then moved on.
+        """
+
+        tick = self.game_state.tick
+        if tick < self.next_frame_tick:
+            return False
+        self.next_frame_tick = tick - tick % snapshot_every + snapshot_every
+        return True
+
+class TickScheduler:
+    """
+    ╔═══════════════════════════════════════════════════╗
+    ║                 TickScheduler                     ║
+    ╠═══════════════════════════════════════════════════╣
+    ║ Single game loop shared by every running match    ║
+    ║                                                   ║
+    ║ • Steps all matches on a fixed monotonic timestep ║
+    ║ • Hands frames off to the owners after each step  ║
+    ║ • Catches up late ticks, drops hopeless backlogs  ║
+    ║ • Tracks tick duration and missed ticks           ║
+    ║ • Can shard matches over worker processes         ║
+    ║ • Drives the server-side bots before each step    ║
+    ║ • Records every match to disk for replays         ║
+    ╚═══════════════════════════════════════════════════╝
+    """
+
+    # One scheduler per process
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(TickScheduler, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """
+        Initialize the scheduler, the loop starts with the first match.
+        """
+        if self._initialized:
+            return
+
+        self.matches = {}
+        self.tick_rate = game_setting('PONG_TICK_RATE', BASE_TICK_RATE)
+        self.game_engine = GameEngine(
+            self.tick_rate,
+            game_setting('PONG_COLLISION_MODE', DISCRETE),
+            game_setting('PONG_DETERMINISTIC', False),
+        )
+        self.interval = 1 / self.tick_rate
+
+        # Frames are sent every snapshot_every ticks, the simulation still runs every tick
+        snapshot_rate = min(game_setting('PONG_SNAPSHOT_RATE', self.tick_rate), self.tick_rate)
+        self.snapshot_every = max(1, round(self.tick_rate / snapshot_rate))
+        self.snapshot_rate = self.tick_rate / self.snapshot_every
+        self.sends_snapshots = self.snapshot_every > 1
+
+        # Server-side bots, all updated in one pass per tick
+        self.bots = BotController(self.tick_rate)
+
+        # Match recordings, disabled when PONG_RECORDINGS_DIR is empty
+        recordings_dir = game_setting('PONG_RECORDINGS_DIR', None)
+        self.recorder = None
+        if recordings_dir:
+            self.recorder = Recorder(
+                recordings_dir,
+                game_setting('PONG_RECORDING_KEYFRAME_INTERVAL', 250),
+                self.tick_rate,
+                self.game_engine.collision_mode,
+                self.game_engine.deterministic,
+            )
+
+        # With PONG_WORKER_PROCESSES > 0 matches are stepped in worker processes
+        processes = game_setting('PONG_WORKER_PROCESSES', 0)
+        self.pool = None
+        if processes > 0:
+            self.pool = WorkerPool(
+                processes,
+                self.tick_rate,
+                self.game_engine.collision_mode,
+                self.game_engine.deterministic,
+                self.snapshot_every,
+                self.spawn,
+                self.bots,
+                self.recorder,
+            )
+        self._task = None
+        self._background = set()
+        self.reset_stats()
+        self._initialized = True
+
+    #===========================================================#
+    #                MATCH MANAGEMENT                           #
+    #===========================================================#
+
+    def add_match(self, match):
+        """
+        Register a match, starting the loop if it is idle.
+        """
+
+        if self.pool is not None:
+            self.pool.add_match(match)
+            return
+        if self.recorder is not None and match.recording is None:
+            match.recording = self.recorder.start(match.game_state, match.match_id)
+        self.matches[match.match_id] = match
+        logger.info(f"Match {match.match_id} ajouté au scheduler ({len(self.matches)} matchs actifs)")
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    def add_bot(self, match_id, game_state, player_number, level):
+        """
+        Let a bot play the paddle of player_number in a registered match.
+        """
+
+        self.bots.add(match_id, game_state, player_number, level)
+
+    def remove_match(self, match_id):
+        """
+        Stop stepping a match without calling its callbacks.
+        """
+
+        self.bots.remove(match_id)
+        if self.pool is not None:
+            return self.pool.remove_match(match_id)
+        match = self.matches.pop(match_id, None)
+        if match is not None and match.recording is not None:
+            match.recording.finish(match.game_state)
+        return match
+
+    def spawn(self, coro):
+        """
+        Run a callback outside of the tick, keeping a reference to it.
+        """
+
+        task = asyncio.get_running_loop().create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    #===========================================================#
+    #                GAME LOOP                                  #
+    #===========================================================#
+
+    async def run(self):
+        """
+        Fixed timestep loop, runs while at least one match is registered.
+        """
+
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time() + self.interval
+        while self.matches:
+            delay = next_tick - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            # Count the ticks that are due since the last step
+            now = loop.time()
+            due = int((now - next_tick) // self.interval) + 1
+            if due > MAX_CATCH_UP:
+                self.missed_ticks += due - MAX_CATCH_UP
+                due = MAX_CATCH_UP
+                next_tick = now + self.interval
+            else:
+                self.catch_up_ticks += due - 1
+                next_tick += due * self.interval
+
+            started = time.perf_counter()
+            try:
+                await self.tick(due)
+            except Exception as e:
+                # Errors of a match are handled in tick(), the other matches keep running
+                logger.error(f"Erreur dans la boucle du scheduler: {e}", exc_info=True)
+            self.record_tick(time.perf_counter() - started)
+
+    async def tick(self, steps=1):
+        """
+        Step every match, then hand the resulting frames off together.
+        """
+
+        if self.bots:
+            self.bots.update()
+
+        frames = []
+        for match in list(self.matches.values()):
+            try:
+                if not match.is_active():
+                    self.remove_match(match.match_id)
+                    self.spawn(match.on_abort())
+                    continue
+                if await self.step_match(match, steps) and match.frame_due(self.snapshot_every):
+                    frames.append(match)
+            except Exception as e:
+                self.fail_match(match, e)
+
+        if frames:
+            results = await asyncio.gather(*(match.on_frame() for match in frames), return_exceptions=True)
+            for match, result in zip(frames, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Erreur lors de l'envoi du match {match.match_id}: {result}")
+        self.ticks += steps
+
+    async def step_match(self, match, steps):
+        """
+        Advance one match, returns False once it is over.
+        """
+
+        game_state = match.game_state
+        for _ in range(steps):
+            game_state.apply_inputs()
+            if match.recording is not None:
+                match.recording.record(game_state)
+            game_over, winner_username = self.game_engine.step(game_state)
+            if game_over:
+                if match.recording is not None:
+                    match.recording.finish(game_state, winner_username)
+                logger.info(f"Match {match.match_id} terminé: {winner_username} a gagné")
+                self.remove_match(match.match_id)
+                self.spawn(match.on_game_over(winner_username))
+                return False
+        return True
+
+    def fail_match(self, match, error):
+        """
+        Take out a match whose step raised, so the loop goes on with the others.
+        """
+
+        logger.error(f"Erreur dans le match {match.match_id}, match arrêté: {error}", exc_info=True)
+        try:
+            self.remove_match(match.match_id)
+        except Exception as e:
+            self.matches.pop(match.match_id, None)
+            logger.error(f"Erreur au retrait du match {match.match_id}: {e}")
+        self.spawn(match.crashed())
+
+    #===========================================================#
+    #                STATS                                      #
+    #===========================================================#
+
+    def reset_stats(self):
+        self.ticks = 0
+        self.missed_ticks = 0
+        self.catch_up_ticks = 0
+        self.last_tick_duration = 0.0
+        self.max_tick_duration = 0.0
+        self.total_tick_duration = 0.0
+        self.loop_iterations = 0
+
+    def record_tick(self, duration):
+        """
+        Record the duration of one loop iteration.
+        """
+
+        self.loop_iterations += 1
+        self.last_tick_duration = duration
+        self.total_tick_duration += duration
+        self.max_tick_duration = max(self.max_tick_duration, duration)
+        if duration > self.interval:
+            logger.warning(f"Tick de {duration * 1000:.1f}ms pour {len(self.matches)} matchs (budget {self.interval * 1000:.0f}ms)")
+        if self.loop_iterations % (STATS_PERIOD * self.tick_rate) == 0:
+            logger.info(f"Scheduler: {self.get_stats()}")
+
+    def get_stats(self):
+        """
+        Returns the tick counters and durations in milliseconds.
+        """
+
+        if self.pool is not None:
+            return {"tick_rate": self.tick_rate, "workers": self.pool.get_stats()}
+        iterations = max(self.loop_iterations, 1)
+        return {
+            "matches": len(self.matches),
+            "tick_rate": self.tick_rate,
+            "snapshot_rate": self.snapshot_rate,
+            "ticks": self.ticks,
+            "missed_ticks": self.missed_ticks,
+            "catch_up_ticks": self.catch_up_ticks,
+            "last_tick_ms": round(self.last_tick_duration * 1000, 3),
+            "avg_tick_ms": round(self.total_tick_duration / iterations * 1000, 3),
+            "max_tick_ms": round(self.max_tick_duration * 1000, 3),
+        }
@@ -0,0 +1,185 @@
+"""
+╔═══════════════════════════════════════════════════╗
+║                 PongSpectators                    ║
+╠═══════════════════════════════════════════════════╣
+║ Fan-out of running matches to spectators          ║
+║                                                   ║
+║ • Viewers watch a match or a tournament bracket   ║
+║ • Each frame is encoded once for every viewer     ║
+║ • Viewers get their own lower frame rate          ║
+║ • Per-viewer outbound queues absorb slow sockets  ║
+╚═══════════════════════════════════════════════════╝
+"""
+
+import json
+import logging
+from prometheus_client import Gauge
+from .pongFrames import FrameEncoder
+from .pongHelper import BASE_TICK_RATE, game_setting
+
+logger = logging.getLogger('pong.spectators')
+
+SPECTATORS = Gauge(
+    'pong_spectators',
+    'Websocket connections watching a match or a tournament',
+)
+
+# Default spectator frame rate (Hz)
+SPECTATOR_RATE = 20
+
+def match_channel(feed_id):
+    return f"match:{feed_id}"
+
+def tournament_channel(tournament_id):
+    return f"tournament:{tournament_id}"
+
+class SpectatorFeed:
+    """
+    Spectator side of one running match.
+    """
+
+    __slots__ = ("feed_id", "channels", "game_state", "encoder", "next_tick")
+
+    def __init__(self, feed_id, channels, game_state, snapshots):
+        self.feed_id = feed_id
+        self.channels = channels
+        self.game_state = game_state
+        self.encoder = FrameEncoder(snapshots=snapshots)
+        self.next_tick = 0
+
+    def describe(self):
+        return {
+            "match_id": self.feed_id,
+            "tournament_id": self.game_state.header.tournament_id,
+            "players": [self.game_state.header.player1.username, self.game_state.header.player2.username],
+            "score": [self.game_state.score1, self.game_state.score2],
+        }
+
+class SpectatorHub:
+    """
+    Keeps the viewers of every channel ("match:<id>", "tournament:<id>")
+    and the feed of every match that can be watched.
+
+    The match loops call publish() after sending their frame to the
+    players. A frame is only encoded when somebody watches and at most
+    every `every` ticks, then the same message is put in the outbound
+    queue of each viewer: the players' tick never waits for a viewer.
+    """
+
+    # Singleton, shared by the lobby and the tournaments
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(SpectatorHub, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        self.viewers = {}
+        self.feeds = {}
+        tick_rate = game_setting('PONG_TICK_RATE', BASE_TICK_RATE)
+        self.every = max(1, round(tick_rate / game_setting('PONG_SPECTATOR_RATE', SPECTATOR_RATE)))
+        self.frame_rate = tick_rate / self.every
+        self._initialized = True
+        logger.info(f"SpectatorHub initialisé, {self.frame_rate:g} images/s")
+
+    #===========================================================#
+    #                VIEWERS                                    #
+    #===========================================================#
+
+    def watch(self, viewer, channel):
+        """
+        Subscribe a viewer to a channel, leaving the previous one.
+        Returns the feeds currently running on that channel.
+        """
+
+        self.unwatch(viewer)
+        self.viewers.setdefault(channel, set()).add(viewer)
+        viewer.spectating = channel
+        SPECTATORS.inc()
+
+        feeds = [feed for feed in self.feeds.values() if channel in feed.channels]
+        for feed in feeds:
+            # The viewer starts from the current state, resync the deltas on it
+            feed.encoder.last = None
+            feed.next_tick = 0
+        return feeds
+
+    def unwatch(self, viewer):
+        channel = getattr(viewer, "spectating", None)
+        if channel is None:
+            return
+        viewers = self.viewers.get(channel)
+        if viewers is not None:
+            viewers.discard(viewer)
+            if not viewers:
+                del self.viewers[channel]
+        viewer.spectating = None
+        SPECTATORS.dec()
+
+    def list_feeds(self):
+        return [feed.describe() for feed in self.feeds.values()]
+
+    #===========================================================#
+    #                FEEDS                                      #
+    #===========================================================#
+
+    def open_feed(self, feed_id, game_state, tournament_id=None):
+        """
+        Make a starting match watchable, on its own channel and on its
+        tournament's one.
+        """
+
+        channels = (match_channel(feed_id),)
+        if tournament_id is not None:
+            channels += (tournament_channel(tournament_id),)
+        feed = SpectatorFeed(feed_id, channels, game_state, snapshots=self.every > 1)
+        self.feeds[feed_id] = feed
+        self.announce(channels, {"type": "match_started", **feed.describe(), "game_state": game_state.to_dict()})
+
+    def close_feed(self, feed_id, message=None):
+        """
+        Stop a match's feed, forwarding its final message to the viewers.
+        """
+
+        feed = self.feeds.pop(feed_id, None)
+        if feed is not None and message is not None:
+            self.announce(feed.channels, {**message, "match_id": feed_id})
+
+    def publish(self, feed_id):
+        """
+        Queue the current frame of a match for its viewers.
+        """
+
+        feed = self.feeds.get(feed_id)
+        if feed is None or feed.game_state.tick < feed.next_tick:
+            return
+        recipients = [self.viewers[channel] for channel in feed.channels if channel in self.viewers]
+        if not recipients:
+            return
+
+        feed.next_tick = feed.game_state.tick + self.every
+        payload = {"text_data": json.dumps({
+            "type": "spectator_frame",
+            "match_id": feed_id,
+            "game_state": feed.encoder.encode(feed.game_state),
+        })}
+        for viewers in recipients:
+            for viewer in viewers:
+                viewer.outbound.put_frame(payload)
+
+    def announce(self, channels, message):
+        """
+        Send a control message (match start, result, rankings) to the
+        viewers of the given channels, serialized once.
+        """
+
+        payload = None
+        for channel in channels:
+            for viewer in self.viewers.get(channel, ()):
+                payload = payload or {"text_data": json.dumps(message)}
+                viewer.outbound.put_control(payload)
@@ -0,0 +1,282 @@
+"""
+╔═══════════════════════════════════════════════════╗
+║                 PongState                         ║
+╠═══════════════════════════════════════════════════╣
+║ Compact per-match state for Pong games            ║
+║                                                   ║
+║ • Slotted GameState holding the per-tick fields   ║
+║ • Immutable MatchHeader holding player info       ║
+║ • Converts to the JSON wire shape used by clients ║
+║ • Buffers sequenced inputs until the next tick    ║
+║ • Small seeded RNG per match, one int of state    ║
+╚═══════════════════════════════════════════════════╝
+"""
+
+from collections import namedtuple, deque
+
+PlayerInfo = namedtuple("PlayerInfo", ["username", "nickname", "elo"])
+
+# Inputs buffered per player, older ones are dropped past this
+MAX_PENDING_INPUTS = 8
+
+MASK64 = (1 << 64) - 1
+
+class MatchRng:
+    """
+    SplitMix64 generator for the serves of a match. Its whole state is one
+    integer, where random.Random carries about 2.5 KB of Mersenne Twister
+    state, and it can be checkpointed and restored exactly.
+    """
+
+    __slots__ = ("state",)
+
+    def __init__(self, state):
+        self.state = state & MASK64
+
+    def random(self):
+        """
+        Next float in [0, 1).
+        """
+
+        self.state = (self.state + 0x9E3779B97F4A7C15) & MASK64
+        z = self.state
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+        return ((z ^ (z >> 31)) >> 11) * (1.0 / (1 << 53))
+
+class MatchHeader:
+    """
+    Static information about a match, built once at creation.
+    """
+
+    __slots__ = ("player1", "player2", "match_id", "tournament_id", "seed", "_player_info")
+
+    def __init__(self, player1, player2, match_id=None, tournament_id=None, seed=None):
+        set_field = super().__setattr__
+        set_field("player1", player1)
+        set_field("player2", player2)
+        set_field("match_id", match_id)
+        set_field("tournament_id", tournament_id)
+        set_field("seed", seed)
+        set_field("_player_info", {
+            "player1": player1._asdict(),
+            "player2": player2._asdict(),
+        })
+
+    def __setattr__(self, name, value):
+        raise AttributeError("MatchHeader is immutable")
+
+    # Immutable, copies can share the same header
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    # Pickled by constructor arguments, __setattr__ would refuse the slots
+    def __reduce__(self):
+        return (MatchHeader, (self.player1, self.player2, self.match_id, self.tournament_id, self.seed))
+
+    def player(self, player):
+        """
+        Returns the PlayerInfo of "player1" or "player2".
+        """
+
+        return self.player1 if player == "player1" else self.player2
+
+    @property
+    def player_info(self):
+        """
+        Wire representation of both players, shared by every frame.
+        """
+
+        return self._player_info
+
+class GameState:
+    """
+    Mutable per-tick state of a match.
+    """
+
+    __slots__ = (
+        "header",
+        "ball_x", "ball_y",
+        "dir_x", "dir_y",
+        "ball_speed", "ball_touched", "count",
+        "pad1_x", "pad1_y", "pad2_x", "pad2_y",
+        "score1", "score2",
+        "input1", "input2",
+        "tick", "rng",
+        "pending1", "pending2", "ack1", "ack2",
+    )
+
+    def __init__(self, header, ball, direction, pads, ball_speed, rng):
+        self.header = header
+        self.rng = rng
+        self.ball_x, self.ball_y = ball
+        self.dir_x, self.dir_y = direction
+        (self.pad1_x, self.pad1_y), (self.pad2_x, self.pad2_y) = pads
+        self.ball_speed = ball_speed
+        self.ball_touched = False
+        self.count = 0
+        self.score1 = self.score2 = 0
+        self.input1 = self.input2 = 0
+        self.tick = 0
+        # Buffered (seq, value) inputs, allocated with the first one, and last applied sequence number
+        self.pending1 = self.pending2 = None
+        self.ack1 = self.ack2 = 0
+
+    #===========================================================#
+    #                PLAYER ACCESS                              #
+    #===========================================================#
+
+    @property
+    def match_id(self):
+        return self.header.match_id
+
+    @property
+    def tournament_id(self):
+        return self.header.tournament_id
+
+    def set_input(self, player, value):
+        """
+        Set the paddle input of "player1" or "player2".
+        """
+
+        if player == "player1":
+            self.input1 = value
+        else:
+            self.input2 = value
+
+    def get_input(self, player):
+        return self.input1 if player == "player1" else self.input2
+
+    def get_ack(self, player):
+        return self.ack1 if player == "player1" else self.ack2
+
+    def queue_input(self, player, value, seq=None):
+        """
+        Buffer an input of "player1" or "player2" until the next tick.
+        Inputs are applied in order, one change per tick, so a press and a
+        release landing between two ticks both move the paddle. seq is the
+        client sequence number, sent back in the frames once applied.
+        Returns False for a sequence number already seen.
+        """
+
+        pending = self.pending1 if player == "player1" else self.pending2
+        if seq is not None:
+            latest = next((queued for queued, _ in reversed(pending or ()) if queued is not None), self.get_ack(player))
+            if seq <= latest:
+                return False
+
+        # Same value as the input it follows, only the sequence number moves
+        if value == (pending[-1][1] if pending else self.get_input(player)):
+            if pending:
+                pending[-1] = (seq if seq is not None else pending[-1][0], value)
+            elif seq is not None:
+                self.set_ack(player, seq)
+            return True
+
+        if pending is None:
+            pending = deque(maxlen=MAX_PENDING_INPUTS)
+            if player == "player1":
+                self.pending1 = pending
+            else:
+                self.pending2 = pending
+        # Full buffer, the oldest input is dropped
+        pending.append((seq, value))
+        return True
+
+    def reset_sequence(self, player):
+        """
+        Forget the buffered inputs and sequence number of "player1" or
+        "player2", for a client that starts counting again.
+        """
+
+        if player == "player1":
+            self.pending1, self.ack1 = None, 0
+        else:
+            self.pending2, self.ack2 = None, 0
+
+    def set_ack(self, player, seq):
+        if player == "player1":
+            self.ack1 = seq
+        else:
+            self.ack2 = seq
+
+    def apply_inputs(self):
+        """
+        Applies the oldest buffered input of each player, once per tick
+        before stepping.
+        """
+
+        if self.pending1:
+            seq, self.input1 = self.pending1.popleft()
+            if seq is not None:
+                self.ack1 = seq
+        if self.pending2:
+            seq, self.input2 = self.pending2.popleft()
+            if seq is not None:
+                self.ack2 = seq
+
+    def get_score(self, player):
+        return self.score1 if player == "player1" else self.score2
+
+    #===========================================================#
+    #                SERIALIZATION                              #
+    #===========================================================#
+
+    # Order of the fields in to_compact()
+    COMPACT_FIELDS = (
+        "tick", "ball_x", "ball_y", "dir_x", "dir_y", "ball_speed", "ball_touched", "count",
+        "pad1_y", "pad2_y", "score1", "score2", "input1", "input2",
+    )
+
+    def to_compact(self):
+        """
+        Returns the hot fields as a flat tuple, in COMPACT_FIELDS order.
+        """
+
+        return (
+            self.tick, self.ball_x, self.ball_y, self.dir_x, self.dir_y, self.ball_speed,
+            self.ball_touched, self.count, self.pad1_y, self.pad2_y,
+            self.score1, self.score2, self.input1, self.input2,
+        )
+
+    def load_compact(self, values, inputs=True):
+        """
+        Sets the hot fields from a to_compact() tuple.
+        With inputs=False the local paddle inputs are kept.
+        """
+
+        (self.tick, self.ball_x, self.ball_y, self.dir_x, self.dir_y, self.ball_speed,
+         self.ball_touched, self.count, self.pad1_y, self.pad2_y,
+         self.score1, self.score2, input1, input2) = values
+        if inputs:
+            self.input1, self.input2 = input1, input2
+
+    def to_dict(self):
+        """
+        Returns the nested dict shape the JS clients expect.
+        """
+
+        data = {
+            "ball": {"x": self.ball_x, "y": self.ball_y},
+            "pads": {
+                "player1": {"x": self.pad1_x, "y": self.pad1_y},
+                "player2": {"x": self.pad2_x, "y": self.pad2_y},
+            },
+            "score": {"player1": self.score1, "player2": self.score2},
+            "directionBall": {"x": self.dir_x, "y": self.dir_y},
+            "ballSpeed": self.ball_speed,
+            "ballTouched": self.ball_touched,
+            "count": self.count,
+            "inputs": {"player1": self.input1, "player2": self.input2},
+            "acks": {"player1": self.ack1, "player2": self.ack2},
+            "player_info": self.header.player_info,
+            "tick": self.tick,
+        }
+        if self.header.match_id:
+            data["match_id"] = self.header.match_id
+        if self.header.tournament_id:
+            data["tournament_id"] = self.header.tournament_id
+        return data
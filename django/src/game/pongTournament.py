@@ -5,7 +5,11 @@ import random
 from datetime import datetime
 from channels.db import database_sync_to_async
 from .pongHelper import get_display_name, now_str, create_initial_game_state
-from .pongEngine import GameEngine
+from .pongScheduler import TickScheduler, ScheduledMatch
+from .pongFrames import FrameEncoder
+from .pongSpectators import SpectatorHub, tournament_channel
+from .pongCluster import PongCluster
+from .pongCheckpoint import Checkpointer
 
 class TournamentManager:
 
@@ -19,6 +23,8 @@ class TournamentManager:
     ║ • Controls semifinal, final, and 3rd place matches║
     ║ • Tracks rankings and player progression          ║
     ║ • Updates ELO ratings based on final placement    ║
+    ║ • Fills tournaments with players of every worker  ║
+    ║ • Finds a player's tournament by user id in O(1)  ║
     ╚═══════════════════════════════════════════════════╝
     """
 
@@ -28,7 +34,15 @@ class TournamentManager:
         """
         self.tournaments = {}
         self.next_tournament_id = 1
-        self.game_engine = GameEngine()
+        # Players of the running tournaments by user id, their tournament_id,
+        # match_id and player_number tell where they play
+        self.players_by_user = {}
+        self.scheduler = TickScheduler()
+        self.spectators = SpectatorHub()
+        self.cluster = PongCluster()
+        self.cluster.tournaments = self
+        self.checkpoints = Checkpointer()
+        self.checkpoints.tournaments = self
 
     #===========================================================#
     #                TOURNAMENT MANAGEMENT                      #
@@ -39,8 +53,12 @@ class TournamentManager:
         Create a new tournament and return its ID.
         """
 
-        tournament_id = self.next_tournament_id
-        self.next_tournament_id += 1
+        if self.cluster.enabled:
+            # Unique across the workers
+            tournament_id = await self.cluster.next_tournament_id()
+        else:
+            tournament_id = self.next_tournament_id
+            self.next_tournament_id += 1
         self.tournaments[tournament_id] = {
             "players": [],
             "semifinal_winners": {},
@@ -79,6 +97,7 @@ class TournamentManager:
         # Store player info
         player.tournament_id = tournament_id
         player.player_position = player_position
+        self.players_by_user[player.user.id] = player
         
         print(f"Player added to tournament {tournament_id} at position {player_position}")
         
@@ -89,6 +108,65 @@ class TournamentManager:
         
         return tournament_id, player_position
     
+    async def join_player(self, player):
+        """
+        Add a player, send the new state to everyone and start the
+        tournament once it is full.
+        """
+
+        # Add player to tournament
+        tournament_id, player_position = await self.add_player_to_tournament(player)
+
+        # Get tournament state
+        state = await self.get_tournament_state(tournament_id)
+        state["your_position"] = player_position
+
+        # Send state to player
+        print(f"Sending tournament state to {player.user.username}")
+        await player.send(text_data=json.dumps(state))
+
+        # Broadcast state to all players
+        await self.broadcast_tournament_state(tournament_id)
+        await self.cluster.track([player])
+
+        # Check if tournament can start
+        tournament = self.tournaments[tournament_id]
+        if tournament.get("ready_to_start", False):
+            print(f"Tournament {tournament_id} ready to start!")
+            # The next players fill a tournament on any worker
+            await self.cluster.release_tournament_host()
+            await self.start_tournament(tournament_id)
+
+    def find_player(self, user_id):
+        """
+        The player of a user in a running tournament, or None.
+        """
+
+        return self.players_by_user.get(user_id)
+
+    def release_players(self, players):
+        """
+        Forget the players of a tournament that is over.
+        """
+
+        for player in players:
+            if self.players_by_user.get(player.user.id) is player:
+                del self.players_by_user[player.user.id]
+
+    async def broadcast_tournament_state(self, tournament_id):
+        """
+        Broadcast the current tournament state to all participants.
+        """
+
+        tournament = self.tournaments[tournament_id]
+        for player in tournament["players"]:
+            try:
+                state = await self.get_tournament_state(tournament_id)
+                state["your_position"] = player.player_position
+                await player.send(text_data=json.dumps(state))
+            except Exception as e:
+                print(f"Error broadcasting tournament state: {str(e)}")
+
     async def get_tournament_state(self, tournament_id):
         """
         Get the current state of a tournament.
@@ -164,6 +242,7 @@ class TournamentManager:
                         if all_rankings_present:
                             print(f"Tournament {tournament_id} completing - all rankings present")
                             tournament["complete"] = True
+                            self.release_players(tournament["players"])
                             await self.broadcast_tournament_rankings(tournament_id)
                             await self.update_all_elo_ratings(tournament_id)
                     return
@@ -207,6 +286,7 @@ class TournamentManager:
 
             # Now mark as complete and broadcast final rankings
             tournament["complete"] = True  # Explicitly mark as complete
+            self.release_players(players)
             await self.broadcast_tournament_rankings(tournament_id)
             await self.update_all_elo_ratings(tournament_id)
             await self.cleanup_tournament(tournament_id)
@@ -251,6 +331,7 @@ class TournamentManager:
             
             # Now mark as complete and broadcast final rankings
             tournament["complete"] = True
+            self.release_players(players)
             await self.broadcast_tournament_rankings(tournament_id)
             await self.update_all_elo_ratings(tournament_id)
             await self.cleanup_tournament(tournament_id)
@@ -288,6 +369,13 @@ class TournamentManager:
                     "medal": "🥇" if position == 1 else "🥈" if position == 2 else "🥉" if position == 3 else ""
                 })
 
+        # Spectators of the bracket see every ranking update
+        self.spectators.announce((tournament_channel(tournament_id),), {
+            "type": "tournament_rankings",
+            "rankings": ranking_list,
+            "complete": is_complete,
+        })
+
         # Send to all players, but with different logic based on tournament state
         for player in players:
             try:
@@ -366,58 +454,86 @@ class TournamentManager:
                 "match_id": match_id,
                 "player_number": player.player_number,
                 "opponent": players[1-i].user.username,
-                "game_state": game_state
+                "game_state": game_state.to_dict(),
+                "tick_rate": self.scheduler.tick_rate,
+                "snapshot_rate": self.scheduler.snapshot_rate
             }))
         
         # Start the game loop
-        asyncio.create_task(self.run_match(match_id, tournament_id, players))
+        await self.run_match(match_id, tournament_id, players)
     
     async def run_match(self, match_id, tournament_id, players):
         """
-        Run a match between two players.
+        Register a match with the shared tick scheduler.
         """
 
         tournament = self.tournaments[tournament_id]
         game_state = tournament["match_states"][match_id]
-        
-        while True:
-            # Sleep to control game speed
-            await asyncio.sleep(0.02)  # 50 FPS
-            
-            # Check if players are still connected
-            if not all(hasattr(player, 'match_id') and player.match_id == match_id for player in players):
-                # Handle player disconnection
-                disconnected_player = next((p for p in players if not hasattr(p, 'match_id') or p.match_id != match_id), None)
-                if disconnected_player:
-                    connected_player = next((p for p in players if p != disconnected_player), None)
-                    if connected_player:
-                        await self.handle_match_result(match_id, tournament_id, connected_player.user.username, forfeit=True)
-                break
-            
-            # Update game state
-            self.game_engine.update_game_state(game_state)
-            
-            # Check for goals
-            game_over, winner_username = await self.game_engine.check_goals(game_state)
-            if game_over:
-                await self.handle_match_result(match_id, tournament_id, winner_username)
-                break
-            
-            # Send updated state to players
-            for player in players:
-                try:
-                    await player.send(text_data=json.dumps({
-                        "type": "game_update",
-                        "game_state": game_state
-                    }))
-                except Exception:
-                    pass
+        encoder = FrameEncoder(snapshots=self.scheduler.sends_snapshots)
+        # Tournament match ids ("final", ...) are only unique per tournament
+        scheduled_id = f"tournament_{tournament_id}_{match_id}"
+        self.spectators.open_feed(scheduled_id, game_state, tournament_id)
+
+        self.scheduler.add_match(ScheduledMatch(
+            scheduled_id,
+            game_state,
+            is_active=lambda: all(hasattr(player, 'match_id') and player.match_id == match_id for player in players),
+            on_frame=lambda: self.broadcast_game_update(scheduled_id, players, game_state, encoder),
+            on_game_over=lambda winner_username: self.handle_match_result(match_id, tournament_id, winner_username),
+            on_abort=lambda: self.handle_match_abort(match_id, tournament_id, players),
+            on_crash=lambda: self.handle_match_crash(match_id, tournament_id, players)
+        ))
+
+    async def broadcast_game_update(self, scheduled_id, players, game_state, encoder):
+        """
+        Send the updated state to both players, encoded once, then to the spectators.
+        """
+
+        for player in players:
+            try:
+                await player.send_frame(**encoder.payload(player, "game_update", game_state))
+            except Exception:
+                pass
+        self.spectators.publish(scheduled_id)
+
+    async def handle_match_abort(self, match_id, tournament_id, players):
+        """
+        Give the match to the connected player when the other one left.
+        """
+
+        disconnected_player = next((p for p in players if not hasattr(p, 'match_id') or p.match_id != match_id), None)
+        if disconnected_player:
+            connected_player = next((p for p in players if p != disconnected_player), None)
+            if connected_player:
+                await self.handle_match_result(match_id, tournament_id, connected_player.user.username, forfeit=True)
+                return
+        self.spectators.close_feed(f"tournament_{tournament_id}_{match_id}", {"type": "match_aborted"})
     
+    async def handle_match_crash(self, match_id, tournament_id, players):
+        """
+        The server lost the match: it is played again from the start. A
+        player who left meanwhile still forfeits it.
+        """
+
+        self.spectators.close_feed(f"tournament_{tournament_id}_{match_id}", {"type": "match_aborted"})
+        if tournament_id not in self.tournaments:
+            return
+        if not all(hasattr(player, 'match_id') and player.match_id == match_id for player in players):
+            await self.handle_match_abort(match_id, tournament_id, players)
+            return
+        print(f"Tournament {tournament_id}: match {match_id} lost by the server, restarting it")
+        await self.create_match(players, match_id, tournament_id)
+
     async def handle_match_result(self, match_id, tournament_id, winner_username, forfeit=False):
         """
         Handle the result of a match.
         """
 
+        self.spectators.close_feed(f"tournament_{tournament_id}_{match_id}", {
+            "type": "match_result",
+            "winner": winner_username,
+            "forfeit": forfeit,
+        })
         tournament = self.tournaments[tournament_id]
         players = tournament["players"]
 
@@ -729,6 +845,7 @@ class TournamentManager:
             # Mark tournament as cancelled FIRST to prevent duplicate processing
             tournament["cancelled"] = True
             tournament["cancelled_by"] = forfeiter_username
+            self.release_players(players)
             tournament["cancelled_at"] = now_str()
             
             # Track players who received penalties to avoid duplicates
@@ -780,6 +897,12 @@ class TournamentManager:
                     except Exception as e:
                         print(f"Error notifying player of cancellation: {e}")
             
+            self.spectators.announce((tournament_channel(tournament_id),), {
+                "type": "tournament_cancelled",
+                "forfeiter": forfeiter_username,
+                "forfeiter_display": forfeiter_display,
+            })
+
             # Keep the tournament record but mark as inactive
             tournament["active"] = False
             
@@ -788,6 +911,7 @@ class TournamentManager:
             print(f"Player {forfeiter_username} disconnected from waiting tournament {tournament_id}.")
             if not tournament.get("started", False):
                 tournament["players"] = [p for p in players if p != player]
+                self.release_players([player])
 
                 # Notify remaining players
                 if len(tournament["players"]) > 0:
@@ -801,10 +925,14 @@ class TournamentManager:
 
                 return True
     
-    async def handle_player_input(self, player, input_value):
+    async def handle_player_input(self, player, input_value, seq=None):
         """
-        Handle player input for paddle movement.
+        Buffer a paddle input until the next tick, seq being the client's
+        input sequence number.
         """
+        if input_value not in (-1, 0, 1) or (seq is not None and type(seq) is not int):
+            return False
+
         if not hasattr(player, 'tournament_id') or player.tournament_id is None:
             return False
             
@@ -824,6 +952,4 @@ class TournamentManager:
             
         game_state = tournament["match_states"][match_id]
         player_key = f"player{player.player_number}"
-        game_state["inputs"][player_key] = input_value
-        
-        return True
\ No newline at end of file
+        return game_state.queue_input(player_key, input_value, seq)
\ No newline at end of file
@@ -0,0 +1,384 @@
+"""
+╔═══════════════════════════════════════════════════╗
+║                 PongWorkers                       ║
+╠═══════════════════════════════════════════════════╣
+║ Shards running matches across worker processes    ║
+║                                                   ║
+║ • Each worker owns an engine and a tick loop      ║
+║ • Inputs and frames travel over one pipe each     ║
+║ • Consumers and callbacks stay in the ASGI process║
+║ • Mirrors worker frames into the local GameState  ║
+╚═══════════════════════════════════════════════════╝
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import time
+from collections import deque
+from .pongEngine import GameEngine
+
+logger = logging.getLogger('pong.workers')
+
+# Messages sent to a worker
+ADD = "add"
+INPUTS = "inputs"
+REMOVE = "remove"
+STOP = "stop"
+
+# Ticks replayed at once when a worker falls behind, beyond that they are dropped
+MAX_CATCH_UP = 5
+
+#===========================================================#
+#                WORKER PROCESS                             #
+#===========================================================#
+
+def worker_main(conn, tick_rate, collision_mode, deterministic, recorder=None):
+    """
+    Entry point of a worker process.
+    Steps its matches on a fixed timestep and sends one message per tick:
+    (frames, finished, steps, tick_duration, missed_ticks), where frames
+    holds (match_id, compact_state) and finished holds (match_id, winner).
+    Inputs come as one (input1, input2) per tick, taken one per step.
+    With a Recorder the worker records the matches it steps itself.
+    """
+
+    engine = GameEngine(tick_rate, collision_mode, deterministic)
+    interval = 1 / tick_rate
+    matches = {}
+    inputs = {}
+    recordings = {}
+    missed = 0
+    next_tick = time.monotonic() + interval
+
+    while True:
+        # Wait for the next tick, handling messages as they come
+        timeout = next_tick - time.monotonic()
+        while timeout > 0 and conn.poll(timeout):
+            if not handle_messages(conn, matches, inputs, recordings, recorder):
+                return
+            timeout = next_tick - time.monotonic()
+        if conn.poll() and not handle_messages(conn, matches, inputs, recordings, recorder):
+            return
+
+        now = time.monotonic()
+        due = int((now - next_tick) // interval) + 1
+        if due > MAX_CATCH_UP:
+            missed += due - MAX_CATCH_UP
+            due = MAX_CATCH_UP
+            next_tick = now + interval
+        else:
+            next_tick += due * interval
+
+        started = time.perf_counter()
+        frames, finished = [], []
+        for match_id, game_state in list(matches.items()):
+            recording = recordings.get(match_id)
+            queued = inputs[match_id]
+            for _ in range(due):
+                if queued:
+                    game_state.input1, game_state.input2 = queued.popleft()
+                if recording is not None:
+                    recording.record(game_state)
+                game_over, winner_username = engine.step(game_state)
+                if game_over:
+                    if recording is not None:
+                        recording.finish(game_state, winner_username)
+                        del recordings[match_id]
+                    finished.append((match_id, winner_username))
+                    del matches[match_id]
+                    del inputs[match_id]
+                    break
+            frames.append((match_id, game_state.to_compact()))
+        try:
+            conn.send((frames, finished, due, time.perf_counter() - started, missed))
+        except (EOFError, OSError):
+            return
+
+def handle_messages(conn, matches, inputs, recordings, recorder=None):
+    """
+    Applies every pending message, returns False when the worker must stop.
+    """
+
+    while conn.poll():
+        try:
+            message = conn.recv()
+        except EOFError:
+            return False
+        kind = message[0]
+        if kind == INPUTS:
+            for match_id, values in message[1]:
+                if match_id in inputs:
+                    inputs[match_id].extend(values)
+        elif kind == ADD:
+            matches[message[1]] = message[2]
+            inputs[message[1]] = deque()
+            if recorder is not None:
+                recordings[message[1]] = recorder.start(message[2], message[1])
+        elif kind == REMOVE:
+            game_state = matches.pop(message[1], None)
+            inputs.pop(message[1], None)
+            recording = recordings.pop(message[1], None)
+            if recording is not None:
+                recording.finish(game_state)
+        elif kind == STOP:
+            return False
+    return True
+
+#===========================================================#
+#                ASGI PROCESS SIDE                          #
+#===========================================================#
+
+class Worker:
+    """
+    Parent side of one worker process.
+    """
+
+    __slots__ = ("index", "process", "conn", "matches", "sent_inputs", "ticks", "missed_ticks", "max_tick_duration", "restarts")
+
+    def __init__(self, index, process, conn, restarts=0):
+        self.index = index
+        self.process = process
+        self.conn = conn
+        self.matches = {}
+        self.sent_inputs = {}
+        self.ticks = 0
+        self.missed_ticks = 0
+        self.max_tick_duration = 0.0
+        # Processes that died at this index before this one
+        self.restarts = restarts
+
+class WorkerPool:
+    """
+    ╔═══════════════════════════════════════════════════╗
+    ║                 WorkerPool                        ║
+    ╠═══════════════════════════════════════════════════╣
+    ║ Runs matches in worker processes for a scheduler  ║
+    ║                                                   ║
+    ║ • Assigns each match to the least loaded worker   ║
+    ║ • Forwards one paddle input per worker tick       ║
+    ║ • Calls the ScheduledMatch callbacks locally      ║
+    ║ • Replaces a dead worker, its matches end         ║
+    ╚═══════════════════════════════════════════════════╝
+    """
+
+    def __init__(self, processes, tick_rate, collision_mode, deterministic, snapshot_every, spawn, bots=None, recorder=None):
+        """
+        spawn(coro) runs a callback outside of the reader, as in TickScheduler.
+        Workers report every tick so inputs keep flowing, on_frame only runs
+        every snapshot_every ticks. The bots of a BotController get their
+        inputs from the mirrored states before they are forwarded.
+        A Recorder is handed to the workers, which write the recordings.
+        """
+
+        self.processes = processes
+        self.tick_rate = tick_rate
+        self.snapshot_every = snapshot_every
+        self.collision_mode = collision_mode
+        self.deterministic = deterministic
+        self.spawn = spawn
+        self.bots = bots
+        self.recorder = recorder
+        self.workers = []
+
+    def start(self):
+        """
+        Start the worker processes.
+        """
+
+        for index in range(self.processes):
+            self.workers.append(self.start_worker(index))
+        logger.info(f"{self.processes} workers de jeu démarrés")
+
+    def start_worker(self, index, restarts=0):
+        """
+        Start one worker process and watch its pipe on the running loop.
+        """
+
+        context = multiprocessing.get_context("spawn")
+        conn, child_conn = context.Pipe()
+        process = context.Process(
+            target=worker_main,
+            args=(child_conn, self.tick_rate, self.collision_mode, self.deterministic, self.recorder),
+            name=f"pong-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        worker = Worker(index, process, conn, restarts)
+        asyncio.get_running_loop().add_reader(conn.fileno(), self.on_readable, worker)
+        return worker
+
+    def send(self, worker, message):
+        """
+        Send a message to a worker, False if it died meanwhile. The reader
+        may not have seen the end of its pipe yet, the worker is replaced here.
+        """
+
+        try:
+            worker.conn.send(message)
+            return True
+        except (EOFError, OSError):
+            self.handle_worker_exit(worker)
+            return False
+
+    def stop(self):
+        """
+        Stop the workers, their matches are dropped without callbacks.
+        """
+
+        loop = asyncio.get_running_loop()
+        for worker in self.workers:
+            loop.remove_reader(worker.conn.fileno())
+            try:
+                worker.conn.send((STOP,))
+            except (BrokenPipeError, OSError):
+                pass
+            worker.process.join(timeout=1)
+            worker.conn.close()
+        self.workers = []
+
+    #===========================================================#
+    #                MATCH MANAGEMENT                           #
+    #===========================================================#
+
+    def add_match(self, match):
+        """
+        Hand a match to the least loaded worker. A worker found dead on
+        the way is replaced and the match goes to the least loaded again.
+        """
+
+        if not self.workers:
+            self.start()
+        game_state = match.game_state
+        for _ in range(2):
+            worker = min(self.workers, key=lambda worker: len(worker.matches))
+            if self.send(worker, (ADD, match.match_id, game_state)):
+                worker.matches[match.match_id] = match
+                worker.sent_inputs[match.match_id] = (game_state.input1, game_state.input2)
+                logger.info(f"Match {match.match_id} confié au worker {worker.index}")
+                return
+        logger.error(f"Aucun worker pour le match {match.match_id}")
+        self.spawn(match.crashed())
+
+    def remove_match(self, match_id):
+        for worker in self.workers:
+            match = worker.matches.pop(match_id, None)
+            if match is not None:
+                worker.sent_inputs.pop(match_id, None)
+                if self.bots is not None:
+                    self.bots.remove(match_id)
+                self.send(worker, (REMOVE, match_id))
+                return match
+        return None
+
+    #===========================================================#
+    #                FRAMES                                     #
+    #===========================================================#
+
+    def on_readable(self, worker):
+        """
+        Reader callback, handles every tick the worker sent.
+        """
+
+        try:
+            while worker.conn.poll():
+                self.handle_tick(worker, *worker.conn.recv())
+        except (EOFError, OSError):
+            self.handle_worker_exit(worker)
+
+    def handle_tick(self, worker, frames, finished, steps, duration, missed):
+        """
+        Mirror the frames locally, then run the callbacks like TickScheduler.tick.
+        """
+
+        worker.ticks += steps
+        worker.missed_ticks = missed
+        worker.max_tick_duration = max(worker.max_tick_duration, duration)
+
+        for match_id, compact in frames:
+            match = worker.matches.get(match_id)
+            if match is not None:
+                match.game_state.load_compact(compact, inputs=False)
+
+        for match_id, winner_username in finished:
+            match = worker.matches.pop(match_id, None)
+            worker.sent_inputs.pop(match_id, None)
+            if self.bots is not None:
+                self.bots.remove(match_id)
+            if match is not None:
+                logger.info(f"Match {match_id} terminé: {winner_username} a gagné")
+                self.spawn(match.on_game_over(winner_username))
+
+        if self.bots:
+            self.bots.update(worker.matches)
+
+        ready, inputs = [], []
+        for match_id, match in list(worker.matches.items()):
+            if not match.is_active():
+                self.remove_match(match_id)
+                self.spawn(match.on_abort())
+                continue
+            if match.frame_due(self.snapshot_every):
+                ready.append(match)
+            # One buffered input per tick the worker stepped, acknowledged in
+            # the next frame. The worker takes them one per step in turn, so a
+            # catch-up doesn't leave the buffer behind or merge its inputs.
+            game_state = match.game_state
+            values = []
+            for _ in range(steps):
+                game_state.apply_inputs()
+                values.append((game_state.input1, game_state.input2))
+                if not game_state.pending1 and not game_state.pending2:
+                    break
+            if values[-1] != worker.sent_inputs[match_id] or len(set(values)) > 1:
+                worker.sent_inputs[match_id] = values[-1]
+                inputs.append((match_id, values))
+
+        if inputs and not self.send(worker, (INPUTS, inputs)):
+            return
+        if ready:
+            self.spawn(self.deliver(ready))
+
+    async def deliver(self, matches):
+        results = await asyncio.gather(*(match.on_frame() for match in matches), return_exceptions=True)
+        for match, result in zip(matches, results):
+            if isinstance(result, Exception):
+                logger.error(f"Erreur lors de l'envoi du match {match.match_id}: {result}")
+
+    def handle_worker_exit(self, worker):
+        """
+        A worker died: its matches end without a result, and a new process
+        takes its place for the next matches.
+        """
+
+        if worker not in self.workers:
+            return
+        logger.error(f"Worker {worker.index} arrêté, {len(worker.matches)} matchs interrompus")
+        loop = asyncio.get_running_loop()
+        loop.remove_reader(worker.conn.fileno())
+        worker.conn.close()
+        worker.process.join(timeout=0)
+        position = self.workers.index(worker)
+        for match_id, match in worker.matches.items():
+            if self.bots is not None:
+                self.bots.remove(match_id)
+            self.spawn(match.crashed())
+        worker.matches.clear()
+
+        try:
+            self.workers[position] = self.start_worker(worker.index, worker.restarts + 1)
+            logger.info(f"Worker {worker.index} redémarré ({worker.restarts + 1} redémarrages)")
+        except Exception as e:
+            del self.workers[position]
+            logger.error(f"Redémarrage du worker {worker.index} impossible, {len(self.workers)}/{self.processes} workers restants: {e}")
+
+    def get_stats(self):
+        return [{
+            "worker": worker.index,
+            "matches": len(worker.matches),
+            "ticks": worker.ticks,
+            "missed_ticks": worker.missed_ticks,
+            "max_tick_ms": round(worker.max_tick_duration * 1000, 3),
+            "restarts": worker.restarts,
+        } for worker in self.workers]
@@ -2,9 +2,13 @@ from django.urls import re_path
 from .websockets.pongMatchConsumer import MatchConsumer
 from .websockets.pongTournamentConsumer import TournamentConsumer
 from .websockets.notificationConsumer import NotificationConsumer
+from .websockets.pongSpectatorConsumer import SpectatorConsumer
+from .websockets.pongReplayConsumer import ReplayConsumer
 
 websocket_urlpatterns = [
     re_path(r'ws/match/$', MatchConsumer.as_asgi()),
     re_path(r'ws/tournament/$', TournamentConsumer.as_asgi()),
     re_path(r'ws/notifications/$', NotificationConsumer.as_asgi()),
+    re_path(r'ws/spectate/$', SpectatorConsumer.as_asgi()),
+    re_path(r'ws/replay/$', ReplayConsumer.as_asgi()),
 ]
\ No newline at end of file
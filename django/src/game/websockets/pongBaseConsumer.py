@@ -3,6 +3,9 @@ import jwt
 from channels.db import database_sync_to_async
 from django.conf import settings
 import json
+from ..pongFrames import JSON, BINARY, BINARY_SUBPROTOCOL
+from ..pongHelper import game_setting
+from ..pongOutbound import OutboundQueue
 
 class BaseGameConsumer(AsyncWebsocketConsumer):
     """
@@ -14,16 +17,109 @@ class BaseGameConsumer(AsyncWebsocketConsumer):
     ║ • Handles JWT authentication                      ║
     ║ • Provides error handling                         ║
     ║ • Implements message formatting                   ║
+    ║ • Negotiates the game frame format                ║
+    ║ • Queues outbound messages, drops stale frames    ║
     ║ • Parent class for all game WebSocket consumers   ║
     ╚═══════════════════════════════════════════════════╝
     """
+
+    # Whether the binary frame subprotocol can be negotiated
+    binary_frames = True
     
     async def connect(self):
         """
         Handle WebSocket connection, accepting all connections initially.
         Authentication happens after connection is established.
         """
-        await self.accept()
+        await self.accept_game_connection()
+
+    async def accept_game_connection(self):
+        """
+        Accept the connection, switching the per-tick game frames to the
+        binary format when the client offers its subprotocol.
+        Clients that offer nothing keep the JSON frames.
+        """
+
+        self.frame_format = JSON
+        if (self.binary_frames and game_setting('PONG_BINARY_FRAMES', True) and
+            BINARY_SUBPROTOCOL in self.scope.get("subprotocols", [])):
+            self.frame_format = BINARY
+            await self.accept(subprotocol=BINARY_SUBPROTOCOL)
+        else:
+            await self.accept()
+
+        # Everything sent from now on goes through the writer task
+        self.outbound = OutboundQueue(
+            super().send,
+            game_setting('PONG_OUTBOUND_QUEUE_SIZE', 64),
+            self.close_slow_connection,
+        )
+        self.outbound.start()
+
+    #=====================================================#
+    #                  OUTBOUND QUEUE                     #
+    #=====================================================#
+
+    async def send(self, text_data=None, bytes_data=None, close=False):
+        """
+        Queue a message that must reach the client, in order.
+        """
+
+        outbound = getattr(self, "outbound", None)
+        if outbound is None:
+            await super().send(text_data, bytes_data, close)
+            return
+        payload = {"text_data": text_data} if text_data is not None else {"bytes_data": bytes_data}
+        outbound.put_control(payload)
+        if close:
+            await self.close()
+
+    async def send_frame(self, text_data=None, bytes_data=None):
+        """
+        Queue a per-tick game frame. If the previous frame is still waiting
+        the two are merged, a slow client only gets the newest state.
+        """
+
+        outbound = getattr(self, "outbound", None)
+        if outbound is None:
+            await super().send(text_data, bytes_data)
+            return
+        outbound.put_frame({"text_data": text_data} if text_data is not None else {"bytes_data": bytes_data})
+
+    async def close(self, code=None, reason=None):
+        """
+        Send what is still queued, then close the socket.
+        """
+
+        outbound = getattr(self, "outbound", None)
+        if outbound is not None:
+            await outbound.flush()
+            outbound.close()
+        await super().close(code, reason)
+
+    async def close_slow_connection(self):
+        """
+        The client stopped reading, its control messages piled up.
+        """
+
+        await super().close(code=1013)
+
+    async def pong_relay(self, event):
+        """
+        Message from the worker owning this player's match (PONG_CLUSTER).
+        """
+
+        self.match_owner = event["owner"]
+        if event["frame"]:
+            await self.send_frame(event["text"], event["bytes"])
+        else:
+            await self.send(event["text"], event["bytes"])
+
+    async def websocket_disconnect(self, message):
+        outbound = getattr(self, "outbound", None)
+        if outbound is not None:
+            outbound.close()
+        await super().websocket_disconnect(message)
     
     async def disconnect(self, close_code):
         """
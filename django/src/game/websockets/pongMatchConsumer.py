@@ -1,9 +1,11 @@
 from .pongBaseConsumer import BaseGameConsumer
 from ..pongLobby import LobbyManager
-from ..pongEngine import GameEngine
+from ..pongScheduler import TickScheduler, ScheduledMatch
+from ..pongFrames import FrameEncoder
+from ..pongSpectators import SpectatorHub
+from ..pongBots import is_bot
 from ..pongHelper import now_str
 import json
-import asyncio
 import jwt
 from django.conf import settings
 from channels.db import database_sync_to_async
@@ -23,9 +25,10 @@ class MatchConsumer(BaseGameConsumer):
     ╚═══════════════════════════════════════════════════╝
     """
 
-    # Create lobby and game instances.
+    # Shared lobby and game loop instances.
     lobby_manager = LobbyManager()
-    game_engine = GameEngine()
+    scheduler = TickScheduler()
+    spectators = SpectatorHub()
 
 
     #===========================================================#
@@ -85,7 +88,10 @@ class MatchConsumer(BaseGameConsumer):
             await self.close()
             return
             
-        await self.accept()
+        await self.accept_game_connection()
+
+        # Match restored from a checkpoint after a restart
+        await self.lobby_manager.checkpoints.reattach(self, "match")
 
     async def disconnect(self, close_code):
         """
@@ -95,7 +101,7 @@ class MatchConsumer(BaseGameConsumer):
         if hasattr(self, 'user') and self.user.is_authenticated:
             await self.cancel_user_invitations()
         if hasattr(self, 'user'):
-            await self.lobby_manager.remove_player(self)
+            await self.lobby_manager.matchmaker.leave(self)
 
     #===========================================================#
     #                INVITATION MANAGEMENT                      #
@@ -211,10 +217,6 @@ class MatchConsumer(BaseGameConsumer):
             }))
             return
 
-        # Disable matchmaking
-        if hasattr(self, 'match_task') and self.match_task:
-            self.match_task.cancel()
-
         # Look for opponent
         opponent_user = await self.get_user_by_username(opponent_username)
         if not opponent_user:
@@ -231,6 +233,11 @@ class MatchConsumer(BaseGameConsumer):
         self.match_id = game_id
         self.player_number = 1 if is_game_creator else 2
 
+        # With several workers the two players meet in Redis
+        if self.lobby_manager.cluster.enabled:
+            await self.join_invited_game_cluster(game_id, opponent_username, is_game_creator)
+            return
+
         # Initialize game if it doesn't exist
         if game_id not in self.lobby_manager.invited_games:
             self.lobby_manager.invited_games[game_id] = {
@@ -279,6 +286,27 @@ class MatchConsumer(BaseGameConsumer):
                 'game_id': game_id
             }))
 
+    async def join_invited_game_cluster(self, game_id, opponent_username, is_game_creator):
+        """
+        Invitation rendezvous shared by every worker, the second player to
+        join creates the match on its worker.
+        """
+
+        role = "creator" if is_game_creator else "recipient"
+        opponent = await self.lobby_manager.cluster.rendezvous(game_id, role, self)
+        if opponent is None:
+            await self.send(text_data=json.dumps({
+                'type': 'waiting_for_opponent' if is_game_creator else 'waiting_for_creator',
+                'message': f'En attente de {opponent_username}...',
+                'game_id': game_id
+            }))
+            return
+
+        # Player order
+        opponent.match_id = game_id
+        creator, recipient = (self, opponent) if is_game_creator else (opponent, self)
+        await self.lobby_manager.create_match_from_invitation(creator, recipient, game_id)
+
     #===========================================================#
     #                MESSAGE MANAGEMENT                         #
     #===========================================================#
@@ -294,21 +322,21 @@ class MatchConsumer(BaseGameConsumer):
             # Backward compatibility
             if 'input' in data and not message_type:
                 input_value = data.get('input', 0)
-                await self.process_player_input(input_value)
+                await self.process_player_input(input_value, data.get('seq'))
                 return
                 
             # Handle specific message types
             if message_type == "find_match":
                 await self.find_match()
             elif message_type == "cancel_matchmaking":
-                await self.lobby_manager.remove_player(self)
+                await self.lobby_manager.matchmaker.leave(self)
                 await self.send(text_data=json.dumps({
                     "type": "matchmaking_cancelled",
                     "message": "Recherche de match annulée"
                 }))
             elif message_type == "player_input":
                 input_value = data.get('input', 0)
-                await self.process_player_input(input_value)
+                await self.process_player_input(input_value, data.get('seq'))
             elif message_type == "invite_friend":
                 await self.handle_invite_friend(data)
             elif message_type == "cancel_invitation":
@@ -338,7 +366,7 @@ class MatchConsumer(BaseGameConsumer):
             await self.find_match()
             
         elif message_type == "cancel_matchmaking":
-            await self.lobby_manager.remove_player(self)
+            await self.lobby_manager.matchmaker.leave(self)
             await self.send_message("matchmaking_cancelled", {
                 "message": "Recherche de match annulée"
             })
@@ -348,7 +376,7 @@ class MatchConsumer(BaseGameConsumer):
                 return
                 
             input_value = data.get('input', 0)
-            await self.process_player_input(input_value)
+            await self.process_player_input(input_value, data.get('seq'))
 
     #===========================================================#
     #                MATCHMAKING MANAGEMENT                     #
@@ -363,69 +391,62 @@ class MatchConsumer(BaseGameConsumer):
         self.match_id = None
         self.player_number = None
         
-        # Add to matchmaking queue
-        await self.lobby_manager.add_player_to_queue(self)
-        
-        # Set up periodic matchmaking check
-        self.match_task = asyncio.create_task(self.periodic_matchmaking())
-            
-    async def periodic_matchmaking(self):
-        """
-        Periodically try to find matches for all waiting players.
-        """
-
-        try:
-            # Try to find matches
-            while not hasattr(self, 'match_id') or not self.match_id:
-                await self.lobby_manager.find_matches_for_all()
-                
-                # Update queue position
-                if not hasattr(self, 'match_id') or not self.match_id:
-                    position = 0
-                    for i, (player, _, _) in enumerate(self.lobby_manager.waiting_players):
-                        if player == self:
-                            position = i + 1
-                            break
-                            
-                    if position > 0:
-                        await self.send_message("matchmaking_update", {
-                            "queue_position": position,
-                            "message": f"Position dans la file: {position}"
-                        })
-                
-                # Wait for next attempt
-                await asyncio.sleep(2)
-                
-        # End of task
-        except asyncio.CancelledError:
-            pass
+        # Queued by the matchmaker, which also sends the position updates
+        await self.lobby_manager.matchmaker.join(self)
 
     #===========================================================#
     #                PONG MANAGEMENT                            #
     #===========================================================#
 
-    async def process_player_input(self, input_value):
+    async def process_player_input(self, input_value, seq=None):
         """
-        Update paddle position based on player input.
+        Buffer a paddle input until the next tick.
+        seq is the client's input sequence number, acknowledged in the frames.
         """
 
         # Verify input
-        if input_value not in [-1, 0, 1]:
+        if input_value not in [-1, 0, 1] or (seq is not None and type(seq) is not int):
             return
             
         # Find match to update
         match_data = self.lobby_manager.active_matches.get(self.match_id)
         if not match_data:
+            # Match ticked by another worker
+            if getattr(self, 'match_owner', None) and self.match_id:
+                await self.lobby_manager.cluster.forward(self.match_owner, {
+                    "type": "pong.input",
+                    "match_id": self.match_id,
+                    "player_number": self.player_number,
+                    "input": input_value,
+                    "seq": seq,
+                })
             return
             
         # Update game state with input
         player_key = f"player{self.player_number}"
-        match_data["game_state"]["inputs"][player_key] = input_value
+        match_data["game_state"].queue_input(player_key, input_value, seq)
+
 
+    async def pong_relay(self, event):
+        """
+        Follow the match state of a player whose match is on another worker.
+        """
+
+        await super().pong_relay(event)
+        if event["frame"] or event["text"] is None:
+            return
+        data = json.loads(event["text"])
+        if data.get("type") == "match_created":
+            self.match_id = data["match_id"]
+            self.player_number = data["player_number"]
+            self.lobby_manager.cluster.local_players.pop(self.channel_name, None)
+        elif data.get("type") in ("game_over", "match_aborted"):
+            self.match_id = None
+            self.player_number = None
 
     async def run_game_loop(self, match_id):
         """
-        Run the game loop for a match.
+        Register the match with the shared tick scheduler.
         """
 
         match_data = self.lobby_manager.active_matches.get(match_id)
@@ -438,51 +459,69 @@ class MatchConsumer(BaseGameConsumer):
 
         print(f"Starting game loop for match {match_id} with players: {[p.user.username for p in players]}")
 
-        try:
-            while True:
-                # Game speed control
-                await asyncio.sleep(0.02)  # 50 FPS
-
-                # Check players connection status
-                if not all(hasattr(player, 'match_id') and player.match_id == match_id for player in players):
-                    # Find remaining player to declare a winner
-                    remaining_player = next((p for p in players if hasattr(p, 'match_id') and p.match_id == match_id), None)
-                    if remaining_player:
-                        print(f"Declaring {remaining_player.user.username} as winner due to opponent disconnect")
-                        await self.handle_match_result(match_id, remaining_player.user.username)
-                    return
-
-                # Update game state
-                self.game_engine.update_game_state(game_state)
-
-                # Check for goals
-                game_over, winner_username = await self.game_engine.check_goals(game_state)
-
-                if game_over:
-                    print(f"Game over! Winner: {winner_username}")
-                    await self.handle_match_result(match_id, winner_username)
-                    return
-
-                # Send updated state to players
-                for player in players:
-                    try:
-                        await player.send(text_data=json.dumps({
-                            "type": "game_state",
-                            "game_state": game_state
-                        }))
-                    except Exception as e:
-                        print(f"Error sending game state to {player.user.username}: {e}")
-                    
-        except Exception as e:
-            print(f"Error in game loop for match {match_id}: {e}")
-            import traceback
-            traceback.print_exc()
+        encoder = FrameEncoder(snapshots=self.scheduler.sends_snapshots)
+        self.spectators.open_feed(match_id, game_state)
+        self.scheduler.add_match(ScheduledMatch(
+            match_id,
+            game_state,
+            is_active=lambda: all(hasattr(player, 'match_id') and player.match_id == match_id for player in players),
+            on_frame=lambda: self.broadcast_game_state(match_id, players, game_state, encoder),
+            on_game_over=lambda winner_username: self.handle_match_result(match_id, winner_username),
+            on_abort=lambda: self.handle_match_abort(match_id, players),
+            on_crash=lambda: self.handle_match_crash(match_id, players)
+        ))
+
+    async def broadcast_game_state(self, match_id, players, game_state, encoder):
+        """
+        Send the updated state to both players, encoded once, then to the spectators.
+        """
+
+        for player in players:
+            try:
+                await player.send_frame(**encoder.payload(player, "game_state", game_state))
+            except Exception as e:
+                print(f"Error sending game state to {player.user.username}: {e}")
+        self.spectators.publish(match_id)
+
+    async def handle_match_abort(self, match_id, players):
+        """
+        Declare the remaining player winner when the other one left.
+        """
+
+        remaining_player = next((p for p in players if hasattr(p, 'match_id') and p.match_id == match_id), None)
+        if remaining_player:
+            print(f"Declaring {remaining_player.user.username} as winner due to opponent disconnect")
+            await self.handle_match_result(match_id, remaining_player.user.username)
+        else:
+            self.spectators.close_feed(match_id, {"type": "match_aborted"})
+
+    async def handle_match_crash(self, match_id, players):
+        """
+        The server lost the match: it ends without a winner and unrated.
+        """
+
+        self.spectators.close_feed(match_id, {"type": "match_aborted"})
+        if match_id in self.lobby_manager.active_matches:
+            del self.lobby_manager.active_matches[match_id]
+        for player in players:
+            try:
+                await player.send(text_data=json.dumps({
+                    "type": "match_aborted",
+                    "message": "Partie interrompue par le serveur, aucun résultat enregistré"
+                }))
+            except Exception as e:
+                print(f"Error sending match abort notification: {str(e)}")
+            if hasattr(player, 'match_id'):
+                player.match_id = None
+            if hasattr(player, 'player_number'):
+                player.player_number = None
 
     async def handle_match_result(self, match_id, winner_username):
         """
         Handle the end of a match.
         """
 
+        self.spectators.close_feed(match_id, {"type": "game_over", "winner": winner_username})
         match_data = self.lobby_manager.active_matches.get(match_id)
         if not match_data:
             return
@@ -496,8 +535,8 @@ class MatchConsumer(BaseGameConsumer):
 
         loser = next((player for player in players if player != winner), None)
 
-        # Update ELO
-        if winner and loser:
+        # Update ELO, bot matches are not rated
+        if winner and loser and not is_bot(winner) and not is_bot(loser):
             await self.update_elo_ratings(winner.user, loser.user)
 
         # Display game result
@@ -0,0 +1,228 @@
+import asyncio
+import json
+import math
+import os
+from bisect import bisect_right
+from .pongBaseConsumer import BaseGameConsumer
+from ..pongRecorder import ReplayCursor, keyframe_state, list_recordings, load_recording, recording_name
+from ..pongHelper import game_setting
+
+# Playback speeds accepted from the client
+MIN_SPEED = 0.25
+MAX_SPEED = 8
+
+# Modes: re-simulate every tick, or only show the recorded keyframes
+SIMULATE = "simulate"
+KEYFRAMES = "keyframes"
+
+def parse_tick(value):
+    """
+    Tick asked by the client, None when it isn't a number >= 0.
+    """
+
+    try:
+        tick = int(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    return tick if tick >= 0 else None
+
+def parse_speed(value):
+    """
+    Playback speed asked by the client, clamped, None when it isn't a number.
+    """
+
+    try:
+        speed = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not math.isfinite(speed):
+        return None
+    return min(max(speed, MIN_SPEED), MAX_SPEED)
+
+class ReplayConsumer(BaseGameConsumer):
+    """
+    ╔═══════════════════════════════════════════════════╗
+    ║              ReplayConsumer                       ║
+    ╠═══════════════════════════════════════════════════╣
+    ║ WebSocket consumer for recorded Pong matches      ║
+    ║                                                   ║
+    ║ • Lists the latest recordings                     ║
+    ║ • Re-simulates a match or streams its keyframes   ║
+    ║ • Seeks, pauses and changes the playback speed    ║
+    ╚═══════════════════════════════════════════════════╝
+    """
+
+    # Replay frames are JSON, like the spectator frames
+    binary_frames = False
+
+    #===========================================================#
+    #                WEBSOCKET MANAGEMENT                       #
+    #===========================================================#
+
+    async def connect(self):
+        """
+        Only logged in users can watch replays.
+        """
+
+        self.user = self.scope["user"]
+        if not self.user.is_authenticated:
+            await self.close()
+            return
+
+        self.directory = game_setting('PONG_RECORDINGS_DIR', None)
+        self.frame_rate = game_setting('PONG_SPECTATOR_RATE', 20)
+        self.recording = None
+        self.cursor = None
+        self.mode = SIMULATE
+        self.speed = 1
+        self.playback = None
+        await self.accept_game_connection()
+
+    async def disconnect(self, close_code):
+        await self.pause()
+
+    #===========================================================#
+    #                MESSAGE MANAGEMENT                         #
+    #===========================================================#
+
+    async def handle_message(self, data, message_type):
+        if not self.directory:
+            await self.send_error("Les replays sont désactivés")
+        elif message_type == "list_replays":
+            replays = await asyncio.to_thread(list_recordings, self.directory)
+            await self.send_message("replay_list", {"replays": replays})
+        elif message_type == "replay":
+            await self.start_replay(data)
+        elif self.recording is None:
+            await self.send_error("Aucun replay en cours")
+        elif message_type == "seek":
+            tick = parse_tick(data.get("tick", 0))
+            if tick is None:
+                await self.send_error("tick invalide")
+                return
+            await self.pause()
+            await self.play(tick)
+        elif message_type == "pause":
+            await self.pause()
+            await self.send_message("replay_paused", {"tick": self.position()})
+        elif message_type == "resume":
+            await self.pause()
+            await self.play(self.position())
+        elif message_type == "stop_replay":
+            await self.pause()
+            self.recording = self.cursor = None
+            await self.send_message("replay_stopped", {})
+        else:
+            await self.send_error(f"Unknown message type: {message_type}")
+
+    async def start_replay(self, data):
+        """
+        Load a recording and play it from data["tick"].
+        """
+
+        tick = parse_tick(data.get("tick", 0))
+        speed = parse_speed(data.get("speed", 1))
+        if tick is None or speed is None:
+            await self.send_error("tick ou speed invalide")
+            return
+
+        await self.pause()
+        path = os.path.join(self.directory, recording_name(data.get("match_id", "")))
+        try:
+            self.recording = await asyncio.to_thread(load_recording, path)
+        except (OSError, ValueError):
+            self.recording = self.cursor = None
+            await self.send_error("Enregistrement introuvable")
+            return
+
+        self.mode = KEYFRAMES if data.get("mode") == KEYFRAMES else SIMULATE
+        self.speed = speed
+        self.cursor = ReplayCursor(self.recording) if self.mode == SIMULATE else None
+        header = self.recording.header
+        await self.send_message("replay_started", {
+            "match_id": header["match_id"],
+            "tournament_id": header["tournament_id"],
+            "players": header["players"],
+            "mode": self.mode,
+            "speed": self.speed,
+            "tick_rate": header["tick_rate"],
+            "end_tick": self.end_tick(),
+            "keyframes": [keyframe[0] for keyframe in self.recording.keyframes],
+            "finished": self.recording.end is not None,
+        })
+        await self.play(tick)
+
+    #===========================================================#
+    #                PLAYBACK                                   #
+    #===========================================================#
+
+    def end_tick(self):
+        if self.cursor is not None:
+            return self.cursor.end_tick
+        if self.recording.end is not None:
+            return self.recording.end[0]
+        return self.recording.keyframes[-1][0] if self.recording.keyframes else 0
+
+    def position(self):
+        return self.cursor.game_state.tick if self.cursor is not None else self.keyframe_tick
+
+    async def play(self, tick):
+        """
+        Seek to tick, then stream from there in a task of its own.
+        """
+
+        if self.cursor is not None:
+            # Re-simulating from the seed can take a few thousand steps
+            await asyncio.to_thread(self.cursor.seek, tick)
+            self.playback = asyncio.create_task(self.stream_simulation())
+        else:
+            self.keyframe_tick = tick
+            self.playback = asyncio.create_task(self.stream_keyframes(tick))
+
+    async def pause(self):
+        if getattr(self, "playback", None) is not None:
+            self.playback.cancel()
+            try:
+                await self.playback
+            except asyncio.CancelledError:
+                pass
+            self.playback = None
+
+    async def stream_simulation(self):
+        """
+        Steps the cursor in real time (times speed), sending a frame at the
+        spectator frame rate.
+        """
+
+        tick_rate = self.recording.header["tick_rate"] * self.speed
+        every = max(1, round(tick_rate / self.frame_rate))
+        running = True
+        while running:
+            await self.send_replay_frame(self.cursor.game_state)
+            await asyncio.sleep(every / tick_rate)
+            running = self.cursor.advance(every)
+        await self.send_replay_frame(self.cursor.game_state)
+        await self.send_message("replay_ended", {"tick": self.cursor.game_state.tick, "end": self.recording.end})
+
+    async def stream_keyframes(self, tick):
+        """
+        Sends the recorded keyframes from tick on, spaced as they were played.
+        """
+
+        keyframes = self.recording.keyframes
+        tick_rate = self.recording.header["tick_rate"] * self.speed
+        index = max(0, bisect_right([keyframe[0] for keyframe in keyframes], tick) - 1)
+        previous = None
+        for keyframe in keyframes[index:]:
+            if previous is not None:
+                await asyncio.sleep((keyframe[0] - previous) / tick_rate)
+            previous = self.keyframe_tick = keyframe[0]
+            await self.send_replay_frame(keyframe_state(self.recording, keyframe))
+        await self.send_message("replay_ended", {"tick": self.keyframe_tick, "end": self.recording.end})
+
+    async def send_replay_frame(self, game_state):
+        await self.send_frame(text_data=json.dumps({
+            "type": "replay_frame",
+            "tick": game_state.tick,
+            "game_state": game_state.to_dict(),
+        }))
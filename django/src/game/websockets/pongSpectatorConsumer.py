@@ -0,0 +1,77 @@
+from .pongBaseConsumer import BaseGameConsumer
+from ..pongSpectators import SpectatorHub, match_channel, tournament_channel
+from ..pongHelper import BASE_TICK_RATE, game_setting
+
+class SpectatorConsumer(BaseGameConsumer):
+    """
+    ╔═══════════════════════════════════════════════════╗
+    ║             SpectatorConsumer                     ║
+    ╠═══════════════════════════════════════════════════╣
+    ║ WebSocket consumer for Pong spectators            ║
+    ║                                                   ║
+    ║ • Lists the matches that can be watched           ║
+    ║ • Subscribes to a match or a tournament bracket   ║
+    ║ • Receives frames at the spectator frame rate     ║
+    ╚═══════════════════════════════════════════════════╝
+    """
+
+    # Spectator frames are JSON, they carry the match_id of the bracket
+    binary_frames = False
+
+    hub = SpectatorHub()
+
+    #===========================================================#
+    #                WEBSOCKET MANAGEMENT                       #
+    #===========================================================#
+
+    async def connect(self):
+        """
+        Only logged in users can watch.
+        """
+
+        self.user = self.scope["user"]
+        if not self.user.is_authenticated:
+            await self.close()
+            return
+
+        await self.accept_game_connection()
+
+    async def disconnect(self, close_code):
+        self.hub.unwatch(self)
+
+    #===========================================================#
+    #                MESSAGE MANAGEMENT                         #
+    #===========================================================#
+
+    async def handle_message(self, data, message_type):
+        if message_type == "list_matches":
+            await self.send_message("match_list", {"matches": self.hub.list_feeds()})
+        elif message_type == "spectate":
+            await self.spectate(data)
+        elif message_type == "stop_spectating":
+            self.hub.unwatch(self)
+            await self.send_message("spectate_stopped", {})
+        else:
+            await self.send_error(f"Unknown message type: {message_type}")
+
+    async def spectate(self, data):
+        """
+        Watch one match, or every match of a tournament as they start.
+        """
+
+        if data.get("tournament_id") is not None:
+            channel = tournament_channel(data["tournament_id"])
+        elif data.get("match_id") in self.hub.feeds:
+            channel = match_channel(data["match_id"])
+        else:
+            await self.send_error("Match introuvable")
+            return
+
+        # Queued before the first frame the hub sends to this viewer
+        feeds = self.hub.watch(self, channel)
+        await self.send_message("spectate_started", {
+            "channel": channel,
+            "tick_rate": game_setting('PONG_TICK_RATE', BASE_TICK_RATE),
+            "frame_rate": self.hub.frame_rate,
+            "matches": [{**feed.describe(), "game_state": feed.game_state.to_dict()} for feed in feeds],
+        })
@@ -64,12 +64,18 @@ class TournamentConsumer(BaseGameConsumer):
             await self.close()
             return
 
-        await self.accept()
+        await self.accept_game_connection()
+
+        # Tournament restored from a checkpoint after a restart
+        await self.tournament_manager.checkpoints.reattach(self, "tournament")
 
     async def disconnect(self, close_code):
         """
         Handle player disconnection from tournament.
         """
+        if getattr(self, 'tournament_owner', None):
+            await self.forward_to_owner("disconnect")
+            return
         if hasattr(self, 'user') and self.user.is_authenticated:
             # Check if player is in a tournament
             if hasattr(self, 'tournament_id') and self.tournament_id is not None:
@@ -107,6 +113,10 @@ class TournamentConsumer(BaseGameConsumer):
             if message_type == "create_tournament":
                 print(f"Processing tournament join request from {self.user.username}")
                 await self.join_tournament()
+            elif getattr(self, 'tournament_owner', None) and message_type == "leave_tournament":
+                await self.forward_to_owner("leave")
+            elif getattr(self, 'tournament_owner', None) and message_type == "player_input":
+                await self.forward_to_owner("input", input=data.get('input', 0), seq=data.get('seq'))
             elif message_type == "leave_tournament":
                 if hasattr(self, 'tournament_id') and not hasattr(self, 'match_id'):
                     await self.tournament_manager.handle_player_disconnect(self)
@@ -116,7 +126,7 @@ class TournamentConsumer(BaseGameConsumer):
                     }))
             elif message_type == "player_input":
                 input_value = data.get('input', 0)
-                await self.tournament_manager.handle_player_input(self, input_value)
+                await self.tournament_manager.handle_player_input(self, input_value, data.get('seq'))
             else:
                 print(f"Unknown message type: {message_type}")
 
@@ -200,40 +210,32 @@ class TournamentConsumer(BaseGameConsumer):
 
         print(f"Adding {self.user.username} to tournament")
         try:
-            # Add player to tournament
-            tournament_id, player_position = await self.tournament_manager.add_player_to_tournament(self)
-
-            # Get tournament state
-            state = await self.tournament_manager.get_tournament_state(tournament_id)
-            state["your_position"] = player_position
-
-            # Send state to player
-            print(f"Sending tournament state to {self.user.username}")
-            await self.send(text_data=json.dumps(state))
-
-            # Broadcast state to all players
-            await self.broadcast_tournament_state(tournament_id)
-
-            # Check if tournament can start
-            tournament = self.tournament_manager.tournaments[tournament_id]
-            if tournament.get("ready_to_start", False):
-                print(f"Tournament {tournament_id} ready to start!")
-                await self.tournament_manager.start_tournament(tournament_id)
+            cluster = self.tournament_manager.cluster
+            if cluster.enabled:
+                # Tournaments are filled on one worker at a time
+                host = await cluster.tournament_host()
+                if host != cluster.channel:
+                    self.tournament_owner = host
+                    await cluster.forward(host, {
+                        "type": "pong.tournament",
+                        "action": "join",
+                        "entry": cluster.player_entry(self),
+                    })
+                    return
+            await self.tournament_manager.join_player(self)
         except Exception as e:
             print(f"Error joining tournament: {str(e)}")
             import traceback
             traceback.print_exc()
 
-    async def broadcast_tournament_state(self, tournament_id):
+    async def forward_to_owner(self, action, **fields):
         """
-        Broadcast the current tournament state to all participants.
+        Send a tournament command to the worker hosting this player's tournament.
         """
 
-        tournament = self.tournament_manager.tournaments[tournament_id]
-        for player in tournament["players"]:
-            try:
-                state = await self.tournament_manager.get_tournament_state(tournament_id)
-                state["your_position"] = player.player_position
-                await player.send(text_data=json.dumps(state))
-            except Exception as e:
-                print(f"Error broadcasting tournament state: {str(e)}")
\ No newline at end of file
+        await self.tournament_manager.cluster.forward(self.tournament_owner, {
+            "type": "pong.tournament",
+            "action": action,
+            "channel": self.channel_name,
+            **fields,
+        })
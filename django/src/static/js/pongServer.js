@@ -15,6 +15,16 @@ class PongServerGame {
 		this.reconnectTimeout = null;
 		this.notificationReconnectTimeout = null;
 		this.playerNumber = null;
+		this.gameState = null;
+		this.snapshotRate = null;
+		this.snapshotAt = 0;
+		this.renderLoopId = null;
+		// SEQUENCED INPUTS NOT YET ACKNOWLEDGED BY THE SERVER
+		this.inputSeq = 0;
+		this.pendingInputs = [];
+		this.localInput = 0;
+		// pongHelper.PAD_SPEED * BASE_TICK_RATE, IN PX PER SECOND
+		this.padSpeed = 400;
 		this.playerInfo = {
 			player1: { username: "", nickname: "", elo: 0 },
 			player2: { username: "", nickname: "", elo: 0 }
@@ -131,7 +141,9 @@ class PongServerGame {
 			console.log(`[PONGSERVER]:Connecting WebSocket (useForMatchmaking: ${useForMatchmaking})`);
 	
 			const wsProtocol = window.location.protocol === 'https:' ? 'wss://' : 'ws://';
-			this.socket = new WebSocket(`${wsProtocol}${window.location.host}/ws/match/`);
+			// BINARY GAME FRAMES IF THE SERVER ACCEPTS THEM
+			this.socket = new WebSocket(`${wsProtocol}${window.location.host}/ws/match/`, ['pong.binary.v2']);
+			this.socket.binaryType = 'arraybuffer';
 	
 			this.socket.onopen = () => {
 
@@ -184,7 +196,9 @@ class PongServerGame {
 	
 			this.socket.onmessage = (event) => {
 				try {
-					const data = JSON.parse(event.data);
+					const data = event.data instanceof ArrayBuffer
+						? this.decodeBinaryFrame(event.data)
+						: JSON.parse(event.data);
 	
 					// HANDLE INVITE ACCEPTED NOTIFICATION
 					if (data.type === 'invitation_accepted') {
@@ -411,6 +425,9 @@ class PongServerGame {
 		if (data.type === 'match_created') {
 			console.log('[PONGSERVER]:Match created!', data);
 			this.playerNumber = data.player_number;
+			this.snapshotRate = data.snapshot_rate < data.tick_rate ? data.snapshot_rate : null;
+			this.pendingInputs = [];
+			this.localInput = 0;
 			this.isGameRunning = true;
 			this.match_id = data.match_id;
 			if (data.game_state && data.game_state.player_info) {
@@ -425,7 +442,8 @@ class PongServerGame {
 			}
 
 			// DISPLAY GAME
-			this.draw(data.game_state);
+			this.gameState = data.game_state;
+			this.draw(this.gameState);
 
 		// DURING MATCH
 		} else if (data.type === 'game_state') {
@@ -444,6 +462,17 @@ class PongServerGame {
 				}
 			}, 1000);
 		
+		// IF THE SERVER LOST THE MATCH, NO RESULT
+		} else if (data.type === 'match_aborted') {
+			alert(data.message || "Partie interrompue par le serveur");
+			this.stopGame();
+			this.displayWelcomeScreen();
+			setTimeout(() => {
+				if (window.gameInvitationsManager) {
+					window.gameInvitationsManager.resetInvitations();
+				}
+			}, 1000);
+
 		// IF GAME IS TERMINATED
 		} else if (data.type === 'game_over') {
 			// Handle end of game
@@ -498,8 +527,115 @@ class PongServerGame {
 			this.playerInfo = gameState.player_info;
 		}
 
+		// FRAMES ONLY CARRY CHANGED FIELDS
+		this.gameState = this.mergeFrame(this.gameState, gameState);
+		this.reconcileInputs(this.gameState);
+
+		// SNAPSHOTS BELOW THE TICK RATE, EXTRAPOLATE BETWEEN THEM
+		if (this.snapshotRate && gameState.velocity) {
+			this.snapshotAt = performance.now();
+			if (!this.renderLoopId) {
+				this.renderLoopId = requestAnimationFrame(() => this.renderSnapshots());
+			}
+			return;
+		}
+
 		// DISPLAY GAME
-		this.draw(gameState);
+		this.draw(this.predictPaddle(this.gameState, 0));
+	}
+
+	renderSnapshots() {
+		if (!this.isGameRunning || !this.gameState) {
+			this.renderLoopId = null;
+			return;
+		}
+		const elapsed = Math.min((performance.now() - this.snapshotAt) / 1000, 2 / this.snapshotRate);
+		this.draw(this.predictPaddle(this.extrapolate(this.gameState, elapsed), elapsed));
+		this.renderLoopId = requestAnimationFrame(() => this.renderSnapshots());
+	}
+
+	// BALL MOVED BY ITS VELOCITY, BOUNCING ON THE WALLS
+	extrapolate(state, seconds) {
+		const maxY = this.canvas.height - 7;
+		let y = state.ball.y + state.velocity.y * seconds;
+		y = ((y % (2 * maxY)) + 2 * maxY) % (2 * maxY);
+		if (y > maxY) {
+			y = 2 * maxY - y;
+		}
+		return {
+			...state,
+			ball: { x: state.ball.x + state.velocity.x * seconds, y: y }
+		};
+	}
+
+	// DROP THE INPUTS THE SERVER HAS APPLIED (ACKS ARE 16-BIT IN BINARY FRAMES)
+	reconcileInputs(state) {
+		if (!state.acks || !this.playerNumber) {
+			return;
+		}
+		const ack = state.acks['player' + this.playerNumber];
+		this.pendingInputs = this.pendingInputs.filter((pending) => {
+			const ahead = (pending.seq - ack) & 0xffff;
+			return ahead > 0 && ahead < 0x8000;
+		});
+	}
+
+	// OWN PADDLE MOVED BY THE LOCAL INPUT, AHEAD OF THE SERVER WHILE INPUTS ARE IN FLIGHT
+	predictPaddle(state, seconds) {
+		const key = 'player' + this.playerNumber;
+		if (!this.playerNumber || !state.pads || !state.pads[key]) {
+			return state;
+		}
+		if (this.pendingInputs.length) {
+			seconds += Math.min((performance.now() - this.pendingInputs[0].sentAt) / 1000, 0.25);
+		}
+		const maxY = this.canvas.height - 90;
+		const y = Math.max(0, Math.min(maxY, state.pads[key].y + this.localInput * this.padSpeed * seconds));
+		return {
+			...state,
+			pads: { ...state.pads, [key]: { ...state.pads[key], y: y } }
+		};
+	}
+
+	// PACKED FRAME, SEE pongFrames.BINARY_FRAME
+	decodeBinaryFrame(buffer) {
+		const view = new DataView(buffer);
+		const position = (offset) => view.getInt16(offset, true) / 16;
+		const direction = (offset) => view.getInt16(offset, true) / 32767;
+		const type = view.getUint8(0);
+		const frame = {
+			tick: view.getUint32(1, true),
+			ball: { x: position(5), y: position(7) },
+			directionBall: { x: direction(9), y: direction(11) },
+			pads: { player1: { y: position(13) }, player2: { y: position(15) } },
+			score: { player1: view.getUint8(17), player2: view.getUint8(18) },
+			ballTouched: (view.getUint8(19) & 1) === 1,
+			acks: { player1: view.getUint16(20, true), player2: view.getUint16(22, true) }
+		};
+
+		// SNAPSHOT: SERVER TIME AND BALL VELOCITY FOLLOW
+		if (type & 0x80) {
+			frame.server_time = view.getFloat64(24, true);
+			frame.velocity = { x: view.getInt16(32, true), y: view.getInt16(34, true) };
+		}
+		return {
+			type: (type & 0x7f) === 2 ? 'game_update' : 'game_state',
+			game_state: frame
+		};
+	}
+
+	mergeFrame(state, frame) {
+		if (!state || typeof state !== 'object') {
+			return frame;
+		}
+		for (const [key, value] of Object.entries(frame)) {
+			if (value !== null && typeof value === 'object' && !Array.isArray(value)) {
+				state[key] = this.mergeFrame(state[key], value);
+			} else {
+				state[key] = value;
+			}
+		}
+		return state;
 	}
 
 	declareForfeit() {
@@ -526,10 +662,18 @@ class PongServerGame {
 	}
 
 	sendInput(input) {
+		// KEY REPEATS DO NOT CHANGE THE INPUT
+		if (input === this.localInput) {
+			return;
+		}
 		if (this.socket && this.socket.readyState === WebSocket.OPEN && this.isGameRunning) {
+			this.inputSeq += 1;
+			this.localInput = input;
+			this.pendingInputs.push({ seq: this.inputSeq, sentAt: performance.now() });
 			this.socket.send(JSON.stringify({
 				type: 'player_input',
-				input: input
+				input: input,
+				seq: this.inputSeq
 			}));
 		}
 	}
@@ -16,6 +16,14 @@ class TournamentClient {
         this.matchId = null;
         this.keysPressed = {};
         this.animationFrameId = null;
+        this.snapshotRate = null;
+        this.snapshotAt = 0;
+        // Sequenced inputs not yet acknowledged by the server
+        this.inputSeq = 0;
+        this.pendingInputs = [];
+        this.localInput = 0;
+        // pongHelper.PAD_SPEED * BASE_TICK_RATE, in px per second
+        this.padSpeed = 400;
         this.authenticated = false;
         this.isTournamentCancelled = false; // Add this flag
         this.cancelledMatchIds = []; // Add this array
@@ -75,7 +83,9 @@ class TournamentClient {
 
     connectWebSocket() {
         const wsProtocol = window.location.protocol === 'https:' ? 'wss://' : 'ws://';
-        this.socket = new WebSocket(`${wsProtocol}${window.location.host}/ws/tournament/`);
+        // Binary game frames if the server accepts them
+        this.socket = new WebSocket(`${wsProtocol}${window.location.host}/ws/tournament/`, ['pong.binary.v2']);
+        this.socket.binaryType = 'arraybuffer';
 
         this.socket.onopen = () => {
             console.log('Tournament WebSocket connection established.');
@@ -88,7 +98,9 @@ class TournamentClient {
         this.socket.onmessage = (event) => {
             console.log('Tournament WebSocket message received:', event.data);
             try {
-                const data = JSON.parse(event.data);
+                const data = event.data instanceof ArrayBuffer
+                    ? this.decodeBinaryFrame(event.data)
+                    : JSON.parse(event.data);
                 console.log('Parsed message type:', data.type);
 
                 if (this.isTournamentCancelled && data.type === 'game_update') {
@@ -225,8 +237,19 @@ class TournamentClient {
                 data.game_state &&
                 data.game_state.match_id === this.matchId) {
 
-                this.gameState = data.game_state;
-                this.renderGame(this.gameState);
+                // Frames only carry the fields that changed
+                this.gameState = this.mergeFrame(this.gameState, data.game_state);
+                this.reconcileInputs(this.gameState);
+
+                // Snapshots below the tick rate are extrapolated until the next one
+                if (this.snapshotRate && data.game_state.velocity) {
+                    this.snapshotAt = performance.now();
+                    if (!this.animationFrameId) {
+                        this.animationFrameId = requestAnimationFrame(() => this.renderSnapshots());
+                    }
+                } else {
+                    this.renderGame(this.predictPaddle(this.gameState, 0));
+                }
             }
             return;
         }
@@ -253,6 +276,9 @@ class TournamentClient {
             this.isInMatch = true;
             this.matchId = data.match_id;
             this.playerNumber = data.player_number;
+            this.snapshotRate = data.snapshot_rate < data.tick_rate ? data.snapshot_rate : null;
+            this.pendingInputs = [];
+            this.localInput = 0;
             this.opponent = data.opponent;
             this.gameState = data.game_state;
             const infoDiv = document.getElementById('tournamentInfo');
@@ -267,6 +293,102 @@ class TournamentClient {
         }
     }
 
+    // Packed frame, see pongFrames.BINARY_FRAME. Only the players of the
+    // current match receive it, so it belongs to this.matchId
+    decodeBinaryFrame(buffer) {
+        const view = new DataView(buffer);
+        const position = (offset) => view.getInt16(offset, true) / 16;
+        const direction = (offset) => view.getInt16(offset, true) / 32767;
+        const type = view.getUint8(0);
+        const frame = {
+            match_id: this.matchId,
+            tick: view.getUint32(1, true),
+            ball: { x: position(5), y: position(7) },
+            directionBall: { x: direction(9), y: direction(11) },
+            pads: { player1: { y: position(13) }, player2: { y: position(15) } },
+            score: { player1: view.getUint8(17), player2: view.getUint8(18) },
+            ballTouched: (view.getUint8(19) & 1) === 1,
+            acks: { player1: view.getUint16(20, true), player2: view.getUint16(22, true) }
+        };
+
+        // Snapshot frames append the server time and the ball velocity
+        if (type & 0x80) {
+            frame.server_time = view.getFloat64(24, true);
+            frame.velocity = { x: view.getInt16(32, true), y: view.getInt16(34, true) };
+        }
+        return {
+            type: (type & 0x7f) === 2 ? 'game_update' : 'game_state',
+            game_state: frame
+        };
+    }
+
+    renderSnapshots() {
+        if (!this.isInMatch || !this.gameState) {
+            this.animationFrameId = null;
+            return;
+        }
+        const elapsed = Math.min((performance.now() - this.snapshotAt) / 1000, 2 / this.snapshotRate);
+        this.renderGame(this.predictPaddle(this.extrapolate(this.gameState, elapsed), elapsed));
+        this.animationFrameId = requestAnimationFrame(() => this.renderSnapshots());
+    }
+
+    // Ball moved by its velocity, bouncing on the walls
+    extrapolate(state, seconds) {
+        const maxY = this.canvas.height - 7;
+        let y = state.ball.y + state.velocity.y * seconds;
+        y = ((y % (2 * maxY)) + 2 * maxY) % (2 * maxY);
+        if (y > maxY) {
+            y = 2 * maxY - y;
+        }
+        return {
+            ...state,
+            ball: { x: state.ball.x + state.velocity.x * seconds, y: y }
+        };
+    }
+
+    // Drop the inputs the server has applied (acks are 16-bit in binary frames)
+    reconcileInputs(state) {
+        if (!state.acks || !this.playerNumber) {
+            return;
+        }
+        const ack = state.acks['player' + this.playerNumber];
+        this.pendingInputs = this.pendingInputs.filter((pending) => {
+            const ahead = (pending.seq - ack) & 0xffff;
+            return ahead > 0 && ahead < 0x8000;
+        });
+    }
+
+    // Own paddle moved by the local input, ahead of the server while inputs are in flight
+    predictPaddle(state, seconds) {
+        const key = 'player' + this.playerNumber;
+        if (!this.playerNumber || !state.pads || !state.pads[key]) {
+            return state;
+        }
+        if (this.pendingInputs.length) {
+            seconds += Math.min((performance.now() - this.pendingInputs[0].sentAt) / 1000, 0.25);
+        }
+        const maxY = this.canvas.height - 90;
+        const y = Math.max(0, Math.min(maxY, state.pads[key].y + this.localInput * this.padSpeed * seconds));
+        return {
+            ...state,
+            pads: { ...state.pads, [key]: { ...state.pads[key], y: y } }
+        };
+    }
+
+    mergeFrame(state, frame) {
+        if (!state || typeof state !== 'object') {
+            return frame;
+        }
+        for (const [key, value] of Object.entries(frame)) {
+            if (value !== null && typeof value === 'object' && !Array.isArray(value)) {
+                state[key] = this.mergeFrame(state[key], value);
+            } else {
+                state[key] = value;
+            }
+        }
+        return state;
+    }
+
     displayTournamentCancelled(data) {
         console.log("⚠️ Displaying tournament cancellation screen", data);
 
@@ -801,9 +923,16 @@ class TournamentClient {
         if (this.keysPressed['ArrowUp']) input = -1;
         if (this.keysPressed['ArrowDown']) input = 1;
 
+        // Key repeats do not change the input
+        if (input === this.localInput) return;
+
+        this.inputSeq += 1;
+        this.localInput = input;
+        this.pendingInputs.push({ seq: this.inputSeq, sentAt: performance.now() });
         this.socket.send(JSON.stringify({
             type: 'player_input',
-            input: input
+            input: input,
+            seq: this.inputSeq
         }));
     }
 }
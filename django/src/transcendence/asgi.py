@@ -12,9 +12,11 @@ from channels.auth import AuthMiddlewareStack
 from channels.sessions import SessionMiddlewareStack
 from game.routing import websocket_urlpatterns
 from game.gameMiddleware import JWTAuthMiddleware
+from game.pongAPI.api_inputs import PaddleInputApp
 
 application = ProtocolTypeRouter({
-	"http": get_asgi_application(),
+	# Paddle inputs answered before the Django stack
+	"http": PaddleInputApp(get_asgi_application()),
 	"websocket": JWTAuthMiddleware(
 		AuthMiddlewareStack(
 			SessionMiddlewareStack(
@@ -52,6 +52,52 @@ CHANNEL_LAYERS = {
 
 AUTH_USER_MODEL = 'users.customUser'
 
+# Pong server loop: simulation rate (Hz) and ball collision mode ('discrete', or 'swept' to stop fast balls tunnelling)
+PONG_TICK_RATE = int(os.getenv('PONG_TICK_RATE', 50))
+PONG_COLLISION_MODE = os.getenv('PONG_COLLISION_MODE', 'discrete')
+# Quantize the simulation and log inputs, so a match replays from its seed and inputs
+PONG_DETERMINISTIC = os.getenv('PONG_DETERMINISTIC', 'False') == 'True'
+# Worker processes stepping the matches, 0 keeps them on the ASGI event loop
+PONG_WORKER_PROCESSES = int(os.getenv('PONG_WORKER_PROCESSES', 0))
+# In-game frames: 'delta' (changed fields + keyframe every N frames) or 'full'
+PONG_FRAME_MODE = os.getenv('PONG_FRAME_MODE', 'delta')
+PONG_KEYFRAME_INTERVAL = int(os.getenv('PONG_KEYFRAME_INTERVAL', 50))
+# Accept the packed binary frame format from clients that offer its subprotocol
+PONG_BINARY_FRAMES = os.getenv('PONG_BINARY_FRAMES', 'True') == 'True'
+# Frames sent per second (rounded to send every Nth tick), below PONG_TICK_RATE clients extrapolate between snapshots
+PONG_SNAPSHOT_RATE = int(os.getenv('PONG_SNAPSHOT_RATE', PONG_TICK_RATE))
+# Messages waiting per game connection, stale frames are merged, a full queue of control messages closes the socket
+PONG_OUTBOUND_QUEUE_SIZE = int(os.getenv('PONG_OUTBOUND_QUEUE_SIZE', 64))
+# Frames per second sent to spectators (rounded to every Nth tick), independent of the players' rate
+PONG_SPECTATOR_RATE = int(os.getenv('PONG_SPECTATOR_RATE', 20))
+# Seconds in the matchmaking queue before a server-side bot is offered (0, the default, disables bots),
+# bot level 'easy', 'medium' or 'hard' (default: from the player's ELO)
+PONG_BOT_FILL_TIMEOUT = int(os.getenv('PONG_BOT_FILL_TIMEOUT', 0))
+PONG_BOT_LEVEL = os.getenv('PONG_BOT_LEVEL')
+# Match recordings (input changes + a keyframe every N ticks) for replays, an empty directory disables them
+PONG_RECORDINGS_DIR = os.getenv('PONG_RECORDINGS_DIR', os.path.join(BASE_DIR, 'recordings'))
+PONG_RECORDING_KEYFRAME_INTERVAL = int(os.getenv('PONG_RECORDING_KEYFRAME_INTERVAL', 250))
+# Share the queue, invitations and tournaments of several web workers through Redis (docker compose up --scale web=N)
+PONG_CLUSTER = os.getenv('PONG_CLUSTER', 'False') == 'True'
+# Checkpoints of the running matches and tournaments: 'redis', a file path, or empty to disable.
+# A restarted worker restores them under its name (default: hostname) and waits PONG_RECONNECT_GRACE
+# seconds for the players to reconnect before they forfeit. A recreated container gets a new hostname:
+# it takes over the Redis checkpoints of the workers that stopped refreshing their name for 15s
+PONG_CHECKPOINT = os.getenv('PONG_CHECKPOINT', 'redis')
+PONG_CHECKPOINT_NAME = os.getenv('PONG_CHECKPOINT_NAME', '')
+PONG_CHECKPOINT_INTERVAL = float(os.getenv('PONG_CHECKPOINT_INTERVAL', 1))
+PONG_RECONNECT_GRACE = int(os.getenv('PONG_RECONNECT_GRACE', 30))
+# Seconds between two pairing passes of the matchmaking loop
+PONG_MATCHMAKING_INTERVAL = float(os.getenv('PONG_MATCHMAKING_INTERVAL', 2))
+# Longest wait of a REST matchmaking long-poll (GET /api/pong/matchmaking/<ticket>/) before it answers with the queue position
+PONG_MATCHMAKING_WAIT = float(os.getenv('PONG_MATCHMAKING_WAIT', 25))
+# Default events per second of the REST state stream (GET /api/pong/stream/?rate=), at most PONG_TICK_RATE
+PONG_STREAM_RATE = float(os.getenv('PONG_STREAM_RATE', 20))
+# Events kept per REST player besides the last frame, match_created and game_over
+PONG_API_MESSAGE_BUFFER = int(os.getenv('PONG_API_MESSAGE_BUFFER', 64))
+# POST /api/pong/paddle/ handled in front of Django (no middleware, token cached until it expires)
+PONG_PADDLE_FASTPATH = os.getenv('PONG_PADDLE_FASTPATH', 'True') == 'True'
+
 SIMPLE_JWT = {
 	'ACCESS_TOKEN_LIFETIME': timedelta(minutes=5),
 	'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
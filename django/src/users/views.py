@@ -506,21 +506,25 @@ def forfeit_match(request):
 		user = request.user
 		forfeit_successful = False
 
-		for match_id, match_data in list(MatchConsumer.lobby_manager.active_matches.items()):
+		found = MatchConsumer.lobby_manager.active_matches.for_user(user.id)
+		if found:
+			match_id, match_data, _ = found
 			players = match_data.get('players', [])
 
-			# Find if the current user is in this match
-			for player in players:
-				if player.user.id == user.id:
-					# Use existing game logic to handle forfeit
-					# This will eventually call remove_player
-					winner = next((p for p in players if p.user.id != user.id), None)
-					if winner:
-						# Use the existing method for handling match results
-						async_to_sync(MatchConsumer().handle_match_result)(
-							match_id, winner.user.username
-						)
-						forfeit_successful = True
+			# Use existing game logic to handle forfeit
+			# This will eventually call remove_player
+			winner = next((p for p in players if p.user.id != user.id), None)
+			if winner:
+				# Use the existing method for handling match results
+				async_to_sync(MatchConsumer().handle_match_result)(
+					match_id, winner.user.username
+				)
+				forfeit_successful = True
+
+		# Match ticked by another worker
+		cluster = MatchConsumer.lobby_manager.cluster
+		if not forfeit_successful and cluster.enabled:
+			forfeit_successful = async_to_sync(cluster.forfeit)(user.id)
 
 		return JsonResponse({
 			'success': True,
@@ -550,16 +554,15 @@ def forfeit_tournament(request):
 		# Access the singleton tournament manager
 		tournament_manager = TournamentConsumer.tournament_manager
 
-		# Find all tournaments where the user is participating
-		for tournament_id, tournament in list(tournament_manager.tournaments.items()):
-			players = tournament.get("players", [])
+		# Find the running tournament of the user
+		player = tournament_manager.find_player(user.id)
+		if player is not None:
+			# Use existing tournament logic to handle player disconnect
+			forfeit_successful = bool(async_to_sync(tournament_manager.handle_player_disconnect)(player))
 
-			# Find if the current user is in this tournament
-			for player in players:
-				if player.user.id == user.id:
-					# Use existing tournament logic to handle player disconnect
-					forfeit_successful = async_to_sync(tournament_manager.handle_player_disconnect)(player)
-					break
+		# Tournament hosted by another worker
+		if not forfeit_successful and tournament_manager.cluster.enabled:
+			forfeit_successful = async_to_sync(tournament_manager.cluster.forfeit)(user.id)
 
 		return JsonResponse({
 			'success': True,